@@ -0,0 +1,140 @@
+# caches compiled reports by the content of all files that pdflatex read to compile them
+import hashlib
+import json
+import os
+import shutil
+
+from .Export_manifest import get_fingerprint
+from .Track_notebook_pdfs import get_file_hash
+from .Write_files import copy_file_atomically, write_file_if_changed
+
+
+class Compile_cache:
+    """Content-addressed cache of compiled reports. Each entry stores the pdf and the auxiliary files of a
+    compilation under the hash of the content of all its inputs: the files that pdflatex read (chapters,
+    appendices, code, images, notebook pdfs, packages), the .bib files and a salt that identifies the
+    document and the TeX installation. An entry is found again if all its inputs have the same content,
+    e.g. after switching back to an earlier branch or after reverting an edit.
+
+    The input files of each entry are remembered, such that a lookup hashes the same files as the
+    compilation that created the entry. Content hashes are only recomputed for files of which the
+    modification time or size changed. At most max_entries entries are kept, the least recently used
+    entry is removed first.
+    """
+
+    version = 1
+
+    def __init__(self, cache_dir, max_entries=10):
+        self.cache_dir = cache_dir
+        self.index_filepath = os.path.join(cache_dir, "index.json")
+        self.max_entries = max_entries
+        # list of dictionaries with the key, input files and compile state, most recently used first
+        self.entries = []
+        # dictionary from file to its last known fingerprint and content hash
+        self.content_hashes = {}
+        try:
+            with open(self.index_filepath) as f:
+                index = json.load(f)
+            if index.get("version") == self.version:
+                self.entries = index["entries"]
+                self.content_hashes = index["content_hashes"]
+        except (OSError, ValueError):
+            pass
+
+    def find(self, salt):
+        """Returns the most recently used entry of which all inputs still have the same content, or None.
+
+        :param salt: String that identifies the compiled document and the TeX installation.
+        """
+        for entry in self.entries:
+            if self.get_key(entry["inputs"], salt) == entry["key"] and os.path.isdir(
+                self.get_entry_dir(entry["key"])
+            ):
+                self.entries.remove(entry)
+                self.entries.insert(0, entry)
+                return entry
+        return None
+
+    def add(self, input_filepaths, salt, filepaths, state):
+        """Stores copies of the files of a compilation under the hash of its inputs, and removes the least
+        recently used entries if there are more than max_entries.
+
+        :param input_filepaths: List of absolute paths to the files that the compilation read.
+        :param salt: String that identifies the compiled document and the TeX installation.
+        :param filepaths: List of absolute paths to the pdf and auxiliary files that are stored.
+        :param state: Dictionary with the compile state that is restored together with the files.
+        """
+        key = self.get_key(input_filepaths, salt)
+        entry_dir = self.get_entry_dir(key)
+        os.makedirs(entry_dir, exist_ok=True)
+        for filepath in filepaths:
+            copy_file_atomically(filepath, os.path.join(entry_dir, os.path.basename(filepath)))
+        self.entries = [entry for entry in self.entries if entry["key"] != key]
+        self.entries.insert(0, {"key": key, "inputs": sorted(input_filepaths), "state": state})
+        for entry in self.entries[self.max_entries :]:
+            shutil.rmtree(self.get_entry_dir(entry["key"]), ignore_errors=True)
+        del self.entries[self.max_entries :]
+
+    def restore(self, entry, target_dir):
+        """Copies the files of an entry into a directory, and returns their paths.
+
+        :param entry: An entry that was returned by find.
+        :param target_dir: Directory into which the files are copied.
+        """
+        entry_dir = self.get_entry_dir(entry["key"])
+        filepaths = []
+        for filename in sorted(os.listdir(entry_dir)):
+            filepath = os.path.join(target_dir, filename)
+            copy_file_atomically(os.path.join(entry_dir, filename), filepath)
+            filepaths.append(filepath)
+        return filepaths
+
+    def save(self):
+        """Writes the index of the cache, without the content hashes of files that no entry uses."""
+        used_filepaths = {filepath for entry in self.entries for filepath in entry["inputs"]}
+        content_hashes = {
+            filepath: content_hash
+            for filepath, content_hash in self.content_hashes.items()
+            if filepath in used_filepaths
+        }
+        os.makedirs(self.cache_dir, exist_ok=True)
+        write_file_if_changed(
+            json.dumps(
+                {"version": self.version, "entries": self.entries, "content_hashes": content_hashes},
+                indent=1,
+                sort_keys=True,
+            ),
+            self.index_filepath,
+        )
+
+    def get_key(self, input_filepaths, salt):
+        """Returns the hash of the paths and contents of the input files of a compilation.
+
+        :param input_filepaths: List of absolute paths to the files that the compilation read.
+        :param salt: String that identifies the compiled document and the TeX installation.
+        """
+        key = hashlib.sha256(salt.encode("utf-8"))
+        for filepath in sorted(input_filepaths):
+            key.update(f"\0{filepath}\0{self.get_content_hash(filepath)}".encode("utf-8"))
+        return key.hexdigest()
+
+    def get_content_hash(self, filepath):
+        """Returns the hash of the content of a file, or None if it does not exist.
+
+        :param filepath: Absolute path to the file.
+        """
+        fingerprint = get_fingerprint(filepath)
+        if fingerprint is None:
+            return None
+        known = self.content_hashes.get(filepath)
+        if known is None or known[0] != list(fingerprint):
+            known = [list(fingerprint), get_file_hash(filepath)]
+            self.content_hashes[filepath] = known
+        return known[1]
+
+    def get_entry_dir(self, key):
+        """Returns the directory in which the files of an entry are stored.
+
+        :param key: The key of the entry.
+        """
+        return os.path.join(self.cache_dir, key)
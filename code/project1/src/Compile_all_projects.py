@@ -0,0 +1,199 @@
+# compiles the latex reports of multiple projects concurrently
+import argparse
+import concurrent.futures
+import os
+import time
+
+from .Compile_latex import Compile_latex
+from .Export_all_projects import get_project_nrs
+
+
+class Compile_job_result:
+    """stores the outcome of compiling the report of a single project."""
+
+    __slots__ = (
+        "project_nr",
+        "status",
+        "exit_status",
+        "duration",
+        "log_filepath",
+        "error",
+        "report",
+    )
+
+    def __init__(
+        self, project_nr, status, exit_status, duration, log_filepath, error=None, report=None
+    ):
+        self.project_nr = project_nr
+        # "compiled", "up to date", "cached", "failed", "timed out", "cancelled" or "error" (an exception was raised)
+        self.status = status
+        self.exit_status = exit_status
+        self.duration = duration
+        self.log_filepath = log_filepath
+        self.error = error
+        # the Compile_report of the compilation as a dictionary, None if the report was up to date
+        self.report = report
+
+
+def compile_all(
+    project_nrs=None,
+    latex_filename="main.tex",
+    max_workers=None,
+    use_format=False,
+    timeout=None,
+    preview=False,
+):
+    """Compiles the latex reports of multiple projects concurrently on a process pool, with at most one
+    pdflatex job per CPU core. Each report is compiled in its own build directory (see Compile_latex).
+    Returns a dictionary from project number to Compile_job_result, and prints a summary.
+
+    :param project_nrs: (Default value = None) List of project numbers, all projects are compiled if it is not given.
+    :param latex_filename: (Default value = "main.tex") Name of the main latex document of each project.
+    :param max_workers: (Default value = None) Maximum number of concurrent jobs, the number of CPU cores if it is not given.
+    :param use_format: (Default value = False) Load the preamble of each report from a precompiled format.
+    :param timeout: (Default value = None) Wall-clock time in seconds after which the compilation of a report is killed.
+    :param preview: (Default value = False) Only typeset the changed chapters and appendices, see Compile_latex.
+    """
+    if project_nrs is None:
+        project_nrs = get_project_nrs(latex_filename)
+    if max_workers is None:
+        max_workers = os.cpu_count() or 1
+    results = {}
+    with concurrent.futures.ProcessPoolExecutor(
+        max_workers=min(max_workers, max(len(project_nrs), 1))
+    ) as executor:
+        futures = {
+            executor.submit(
+                compile_project, project_nr, latex_filename, use_format, timeout, preview
+            ): project_nr
+            for project_nr in project_nrs
+        }
+        try:
+            for future in concurrent.futures.as_completed(futures):
+                project_nr = futures[future]
+                try:
+                    results[project_nr] = future.result()
+                except Exception as error:
+                    # the worker process itself failed, e.g. it was killed
+                    results[project_nr] = Compile_job_result(
+                        project_nr, "error", None, None, None, repr(error)
+                    )
+        except KeyboardInterrupt:
+            # the running workers receive the interrupt as well and kill their pdflatex process groups
+            for future in futures:
+                future.cancel()
+            raise
+    results = {project_nr: results[project_nr] for project_nr in project_nrs}
+    print_summary(results)
+    return results
+
+
+def compile_project(
+    project_nr, latex_filename="main.tex", use_format=False, timeout=None, preview=False
+):
+    """Compiles the latex report of a single project and returns its Compile_job_result. Runs in a worker process.
+
+    :param project_nr: The number indicating which project is compiled.
+    :param latex_filename: (Default value = "main.tex") Name of the main latex document of the project.
+    :param use_format: (Default value = False) Load the preamble from a precompiled format.
+    :param timeout: (Default value = None) Wall-clock time in seconds after which the compilation is killed.
+    :param preview: (Default value = False) Only typeset the changed chapters and appendices.
+    """
+    start_time = time.perf_counter()
+    try:
+        compile_latex = Compile_latex(
+            project_nr, latex_filename, use_format=use_format, timeout=timeout, preview=preview
+        )
+    except Exception as error:
+        return Compile_job_result(
+            project_nr, "error", None, time.perf_counter() - start_time, None, repr(error)
+        )
+    if compile_latex.is_up_to_date:
+        status = "up to date"
+    elif compile_latex.is_cached:
+        status = "cached"
+    elif compile_latex.timed_out:
+        status = "timed out"
+    elif compile_latex.cancelled:
+        status = "cancelled"
+    elif compile_latex.exit_status == 0:
+        status = "compiled"
+    else:
+        status = "failed"
+    return Compile_job_result(
+        project_nr,
+        status,
+        compile_latex.exit_status,
+        time.perf_counter() - start_time,
+        compile_latex.log_filepath,
+        report=None if compile_latex.report is None else compile_latex.report.to_dict(),
+    )
+
+
+def print_summary(results):
+    """Prints one line per compiled project with its status, duration and log file.
+
+    :param results: Dictionary from project number to Compile_job_result.
+    """
+    for project_nr, result in results.items():
+        duration = "" if result.duration is None else f" in {result.duration:.1f} s"
+        details = result.error if result.error else result.log_filepath
+        if result.report:
+            details = f"{result.report['pages']} pages, {len(result.report['warnings'])} warnings, {details}"
+        print(f"project{project_nr}: {result.status}{duration} ({details})")
+    failed = [
+        result for result in results.values() if result.status in ["failed", "timed out", "error"]
+    ]
+    cancelled = [result for result in results.values() if result.status == "cancelled"]
+    summary = f"Compiled {len(results)} reports, {len(failed)} failed"
+    if cancelled:
+        summary += f", {len(cancelled)} cancelled"
+    print(f"{summary}.")
+
+
+def parse_args():
+    """Returns the command line arguments of the batch compilation."""
+    parser = argparse.ArgumentParser(
+        description="Compiles the latex reports of multiple projects concurrently."
+    )
+    parser.add_argument(
+        "project_nrs",
+        nargs="*",
+        type=int,
+        help="Numbers of the projects that are compiled, all projects are compiled if none are given.",
+    )
+    parser.add_argument("--latex-filename", default="main.tex")
+    parser.add_argument("--max-workers", type=int, default=None)
+    parser.add_argument(
+        "--use-format",
+        action="store_true",
+        help="Precompile the preamble of each report into a format (requires the mylatexformat package).",
+    )
+    parser.add_argument(
+        "--timeout",
+        type=float,
+        default=600.0,
+        help="Seconds after which the compilation of a report is killed (default: 600).",
+    )
+    parser.add_argument(
+        "--preview",
+        action="store_true",
+        help="Only typeset the chapters and appendices that changed, with placeholders for graphics (main_preview.pdf).",
+    )
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    results = compile_all(
+        args.project_nrs or None,
+        args.latex_filename,
+        args.max_workers,
+        args.use_format,
+        args.timeout,
+        args.preview,
+    )
+    if any(
+        result.status in ["failed", "timed out", "cancelled", "error"] for result in results.values()
+    ):
+        raise SystemExit(1)
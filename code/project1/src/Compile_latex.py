@@ -1,48 +1,428 @@
-# runs a jupyter notebook and converts it to pdf
+# compiles the latex report of a project to pdf
 
+import hashlib
+import json
 import os
+import re
 import shutil
-import nbformat
-from nbconvert.preprocessors import ExecutePreprocessor
+import subprocess
+import time
+
+try:
+    import fcntl
+except ImportError:  # Windows, compilations of the same project are not locked against each other
+    fcntl = None
+
+from .Cache_compiled_reports import Compile_cache
+from .Create_preview_latex import create_preview_latex, get_report_units, get_unit_key
+from .Scan_latex_dependencies import get_graphics_paths
+from .Export_manifest import get_fingerprint
+from .Parse_latex_log import Compile_report, add_file_durations, parse_latex_log
+from .Run_command import run_command
+from .Write_files import copy_file_atomically, read_text_if_exists, write_file_if_changed
+
+# Auxiliary files of which the content is read back by the next pdflatex pass.
+auxiliary_extensions = ['.aux', '.toc', '.out', '.lof', '.lot']
+
+# Files that are generated while compiling, they are never inputs of the report.
+generated_extensions = auxiliary_extensions + ['.log', '.fls', '.bbl', '.blg', '.bcf', '.run.xml', '.pdf']
+
+# Name of the directory in latex/projectN/ in which the report is compiled, it persists between compilations.
+build_dirname = 'build'
+
+# Identity of the TeX installation, computed once per process.
+tex_installation_key = None
 
 class Compile_latex:
 
-    def __init__(self,project_nr,latex_filename):
+    def __init__(self,project_nr,latex_filename,max_passes=5,use_format=False,timeout=None,cancel_event=None,echo_output=False,preview=False,use_cache=True):
         self.script_dir = self.get_script_dir()
+        self.max_passes = max_passes
+        # wall-clock time in seconds for all passes together, the running command is killed when it expires
+        self.deadline = None if timeout is None else time.perf_counter()+timeout
+        self.cancel_event = cancel_event
+        self.echo_output = echo_output
+        self.timed_out = False
+        self.cancelled = False
+        self.output_tail = []
+        # the problems and build statistics of the last compilation, None if the report was up to date
+        self.report = None
+        # load the preamble from a precompiled format (built with mylatexformat) instead of parsing it every pass
+        self.use_format = use_format
+        self.format_name = None
+        self.format_inputs = {}
+        # pdflatex runs from the root of the repository, in which the paths of the main tex file are valid
+        self.root_dir = os.path.normpath(f'{self.script_dir}/../../..')
         relative_dir = f'latex/project{project_nr}/'
-        self.compile_latex(relative_dir,latex_filename)
-        self.clean_up_after_compilation(latex_filename)
-        self.move_pdf_into_latex_dir(relative_dir,latex_filename)
-
-    # runs jupyter notebook
-    def compile_latex(self,relative_dir,latex_filename):
-        os.system(f'pdflatex {relative_dir}{latex_filename}')
-        
-    def clean_up_after_compilation(self,latex_filename):
-        latex_filename_without_extention = latex_filename[:-4]
-        print(f'latex_filename_without_extention={latex_filename_without_extention}')
-        self.delete_file_if_exists(f'{latex_filename_without_extention}.aux')
-        self.delete_file_if_exists(f'{latex_filename_without_extention}.log')
-        self.delete_file_if_exists(f'texput.log')
-    
-    def move_pdf_into_latex_dir(self,relative_dir,latex_filename):
-        pdf_filename = f'{latex_filename[:-4]}.pdf'
-        destination= f'{self.get_script_dir()}/../../../{relative_dir}{pdf_filename}'
-        
-        try:
-            shutil.move(pdf_filename, destination)
-        except:
-            print("Error while moving file ", pdf_filename)
-    
-    def delete_file_if_exists(self,filename):
+        # the directory of the main tex file, which contains the .bib files and receives the compiled pdf
+        self.project_dir = relative_dir
+        self.build_dir = f'{relative_dir}{build_dirname}/'
+        # a preview only typesets the chapters and appendices that changed, with placeholders for graphics and pdfs
+        self.preview = preview
+        self.unit_keys = None
+        self.included_units = []
+        self.include_aux_filepaths = []
+        jobname = f'{latex_filename[:-4]}_preview' if preview else latex_filename[:-4]
+        self.log_filepath = self.get_build_path(jobname,'.log')
+        # the terminal output of all commands of the last compilation
+        self.output_filepath = self.get_build_path(jobname,'.output')
+        # exit status of the last pdflatex pass (or of bibtex if it failed), 0 if the report was up to date
+        self.exit_status = 0
+        # the program that exited with exit_status
+        self.exit_program = 'pdflatex'
+        self.is_up_to_date = False
+        # True if the pdf was restored from the compile cache instead of compiled
+        self.is_cached = False
+        # previews are not cached, their .aux files depend on which units were typeset before
+        self.cache = Compile_cache(self.get_path(f'{self.build_dir}cache')) if use_cache and not preview else None
+        os.makedirs(self.get_path(self.build_dir),exist_ok=True)
+        with open(self.get_path(f'{self.build_dir}.lock'),'w') as lock_file:
+            # compilations of the same project wait for each other, different projects compile concurrently
+            if not fcntl is None:
+                fcntl.flock(lock_file,fcntl.LOCK_EX)
+            if preview:
+                # the preview is compiled from a copy of the main tex file in the build directory
+                latex_dir,compiled_filename = self.build_dir,self.create_preview(latex_filename)
+                state_filepath = self.get_path(f'{self.build_dir}compile_preview_state.json')
+            else:
+                latex_dir,compiled_filename = relative_dir,latex_filename
+                state_filepath = self.get_path(f'{self.build_dir}compile_state.json')
+            state = self.compile_latex(latex_dir,compiled_filename,self.load_state(state_filepath))
+            if not state is None and self.exit_status == 0:
+                self.publish_pdf(compiled_filename)
+                state['pdf'] = get_fingerprint(self.get_pdf_filepath(compiled_filename))
+                self.save_state(state_filepath,state)
+                self.record_units(latex_filename)
+                if not self.cache is None:
+                    if not self.is_cached:
+                        self.store_in_cache(latex_filename[:-4],state)
+                    self.cache.save()
+            elif self.timed_out:
+                print(f'Error: compiling {relative_dir}{latex_filename} timed out, see {self.log_filepath}')
+            elif self.cancelled:
+                print(f'Compiling {relative_dir}{latex_filename} was cancelled.')
+            elif not state is None:
+                print('\n'.join(self.report.errors or self.output_tail))
+                print(f'Error: {self.exit_program} exited with status {self.exit_status}, see {self.log_filepath}')
+
+    # compiles the report until its auxiliary files reach a fixpoint, returns the new state or None if the report was up to date
+    def compile_latex(self,relative_dir,latex_filename,state=None):
+        state = state or {}
+        jobname = latex_filename[:-4]
+        if self.inputs_are_unchanged(state,latex_filename):
+            print(f'{self.project_dir}{jobname}.pdf is up to date.')
+            self.is_up_to_date = True
+            return None
+        if not self.cache is None:
+            entry = self.cache.find(self.get_cache_salt(jobname))
+            if not entry is None:
+                self.cache.restore(entry,self.get_path(self.build_dir))
+                print(f'{self.project_dir}{jobname}.pdf is restored from the compile cache.')
+                self.is_cached = True
+                return {'inputs': {filepath: get_fingerprint(filepath) for filepath in entry['inputs']},'bibliography': entry['state']['bibliography']}
+
+        write_file_if_changed('',self.output_filepath)
+        self.report = Compile_report()
+        if self.use_format:
+            self.format_name = self.prepare_format(relative_dir,latex_filename)
+        auxiliary_hashes = self.get_auxiliary_hashes(jobname)
+        bibliography_checked = False
+        for pass_nr in range(self.max_passes):
+            self.exit_status = self.run_pdflatex(relative_dir,latex_filename)
+            if self.exit_status != 0:
+                # with -halt-on-error another pass can not fix the error
+                break
+            if not bibliography_checked:
+                bibliography_checked = True
+                bibliography_key = self.get_bibliography_key(self.project_dir,jobname)
+                if bibliography_key != state.get('bibliography') or not os.path.isfile(self.get_build_path(jobname,'.bbl')):
+                    bibliography_status = self.run_bibliography(self.project_dir,jobname)
+                    if not bibliography_status is None and bibliography_status != 0:
+                        # the .bbl is stale or incomplete, the report is not compiled (nor its state saved) until the bibliography is fixed
+                        self.exit_status = bibliography_status
+                        break
+                    if not bibliography_status is None:
+                        # the next pass reads the new .bbl, so the auxiliary files are not at a fixpoint yet
+                        auxiliary_hashes = None
+                        continue
+            new_auxiliary_hashes = self.get_auxiliary_hashes(jobname)
+            if new_auxiliary_hashes == auxiliary_hashes:
+                break
+            auxiliary_hashes = new_auxiliary_hashes
+        else:
+            print(f'Warning: the auxiliary files of {jobname} did not converge in {self.max_passes} passes.')
+
+        parse_latex_log(read_text_if_exists(self.log_filepath) or '',self.report)
+        self.save_report(jobname)
+        print(f'{self.project_dir}{jobname}.pdf: {self.report.get_summary()}')
+
+        inputs = self.get_input_fingerprints(jobname)
+        # the files that were read while building the format are inputs of the report as well
+        inputs.update(self.format_inputs)
+        for filepath in self.get_bibliography_filepaths(self.project_dir,jobname):
+            inputs[self.get_path(filepath)] = get_fingerprint(self.get_path(filepath))
+        return {'inputs': inputs,'bibliography': self.get_bibliography_key(self.project_dir,jobname)}
+
+    # runs a single pdflatex pass in the build directory that records the files it reads in the .fls file
+    def run_pdflatex(self,relative_dir,latex_filename):
+        format_options = [] if self.format_name is None else [f'-fmt={self.format_name}']
+        # the moments at which pdflatex reports that it opens and closes files tell in which files it spends its time
+        timed_output = []
+        start_time = time.perf_counter()
+        exit_status = self.run_command(['pdflatex','-recorder','-interaction=nonstopmode','-halt-on-error',f'-output-directory={self.build_dir}']
+            +format_options+[f'{relative_dir}{latex_filename}'],output_handler=lambda text: timed_output.append((time.perf_counter(),text)))
+        end_time = time.perf_counter()
+        self.report.pass_durations.append(end_time-start_time)
+        add_file_durations(timed_output,start_time,end_time,self.report.file_durations)
+        return exit_status
+
+    # builds the precompiled format of the preamble if the preamble, the files it loads or the TeX installation changed
+    def prepare_format(self,relative_dir,latex_filename):
+        ''' returns the name of the format for -fmt, or None if it can not be built (e.g. mylatexformat is not installed) '''
+        format_jobname = f'{latex_filename[:-4]}_preamble'
+        main_tex_code = read_text_if_exists(self.get_path(f'{relative_dir}{latex_filename}')) or ''
+        end_index = main_tex_code.find('\\begin{document}')
+        if end_index == -1:
+            return None
+        key = hashlib.sha256((main_tex_code[:end_index]+get_tex_installation_key()).encode('utf-8')).hexdigest()
+        format_state_filepath = self.get_build_path(format_jobname,'.json')
+        format_state = self.load_state(format_state_filepath)
+        format_is_current = (
+            format_state.get('key') == key
+            and os.path.isfile(self.get_build_path(format_jobname,'.fmt'))
+            and all(get_fingerprint(filepath) == fingerprint for filepath,fingerprint in format_state.get('inputs',{}).items())
+        )
+        if not format_is_current:
+            exit_status = self.run_command(['pdflatex','-ini','-recorder','-interaction=nonstopmode','-halt-on-error',f'-jobname={format_jobname}',
+                f'-output-directory={self.build_dir}','&pdflatex','mylatexformat.ltx',f'{relative_dir}{latex_filename}'])
+            if self.timed_out or self.cancelled:
+                return None
+            if exit_status != 0 or not os.path.isfile(self.get_build_path(format_jobname,'.fmt')):
+                print(f'Warning: could not build the precompiled preamble, see {self.get_build_path(format_jobname,".log")}')
+                return None
+            # the preamble of the main document is covered by the key, changes in its body do not affect the format
+            format_inputs = self.get_input_fingerprints(format_jobname)
+            format_inputs.pop(os.path.normpath(self.get_path(f'{relative_dir}{latex_filename}')),None)
+            format_state = {'key': key,'inputs': format_inputs}
+            self.save_state(format_state_filepath,format_state)
+        self.format_inputs = format_state['inputs']
+        return f'{self.build_dir}{format_jobname}'
+
+    # runs bibtex (or biber for biblatex reports), returns its exit status or None if the report has no bibliography
+    def run_bibliography(self,relative_dir,jobname):
+        if os.path.isfile(self.get_build_path(jobname,'.bcf')):
+            command = ['biber',f'--input-directory={self.build_dir}',f'--output-directory={self.build_dir}',jobname]
+        elif self.get_bibliography_names(jobname):
+            command = ['bibtex',f'{self.build_dir}{jobname}']
+        else:
+            return None
+        # let bibtex find the .bib files next to the main tex file
+        environment = dict(os.environ)
+        environment['BIBINPUTS'] = f'{relative_dir}{os.pathsep}{environment.get("BIBINPUTS","")}'
+        exit_status = self.run_command(command,environment)
+        # bibtex exits with status 1 if it only printed warnings
+        if command[0] == 'bibtex' and exit_status == 1:
+            return 0
+        if exit_status != 0 and not self.timed_out and not self.cancelled:
+            self.exit_program = command[0]
+            self.report.errors.append(f'{command[0]} exited with status {exit_status}, see {self.get_build_path(jobname,".blg")}')
+        return exit_status
+
+    def run_command(self,command,environment=None,output_handler=None):
+        ''' runs a command in the root directory of the repository within the remaining time and returns its exit status '''
+        if self.timed_out or self.cancelled:
+            return -1
+        timeout = None if self.deadline is None else max(self.deadline-time.perf_counter(),0)
+        result = run_command(command,self.root_dir,environment,timeout,self.output_filepath,self.cancel_event,self.echo_output,
+            output_handler=output_handler)
+        self.timed_out = result.timed_out
+        self.cancelled = result.cancelled
+        self.output_tail = result.output_tail
+        if result.exit_status is None:
+            print(f'Error: could not run {command[0]}: {result.output_tail[-1]}')
+            return -1
+        return result.exit_status
+
+    def inputs_are_unchanged(self,state,latex_filename):
+        ''' returns True if the pdf in the latex directory was compiled from the current inputs (including the .bib files) '''
+        if not state.get('inputs'):
+            return False
+        if get_fingerprint(self.get_pdf_filepath(latex_filename)) != state.get('pdf'):
+            return False
+        for filepath,fingerprint in state['inputs'].items():
+            if get_fingerprint(filepath) != fingerprint:
+                return False
+        return True
+
+    def get_auxiliary_hashes(self,jobname):
+        ''' returns the hashes of the auxiliary files that the next pass reads, including the .aux files of \\include '''
+        hashes = {}
+        for filepath in [self.get_build_path(jobname,extension) for extension in auxiliary_extensions]+self.include_aux_filepaths:
+            try:
+                with open(filepath,'rb') as f:
+                    hashes[filepath] = hashlib.sha256(f.read()).hexdigest()
+            except OSError:
+                pass
+        return hashes
+
+    def get_input_fingerprints(self,jobname):
+        ''' returns the fingerprints of the files that pdflatex read, as recorded in the .fls file '''
+        working_dir = self.root_dir
+        inputs = set()
+        outputs = set()
+        for line in (read_text_if_exists(self.get_build_path(jobname,'.fls')) or '').splitlines():
+            kind,_,path = line.partition(' ')
+            if kind == 'PWD':
+                working_dir = path
+            elif kind in ['INPUT','OUTPUT']:
+                path = os.path.normpath(os.path.join(working_dir,path))
+                (inputs if kind == 'INPUT' else outputs).add(path)
+        return {
+            path: get_fingerprint(path) for path in sorted(inputs - outputs)
+            if not any(path.endswith(extension) for extension in generated_extensions)
+        }
+
+    def get_bibliography_names(self,jobname):
+        ''' returns the names of the .bib files in the \\bibdata of the .aux file '''
+        names = []
+        for bibdata in re.findall(r'\\bibdata\{([^}]*)\}',read_text_if_exists(self.get_build_path(jobname,'.aux')) or ''):
+            names.extend(name.strip() for name in bibdata.split(',') if name.strip())
+        return names
+
+    def get_bibliography_filepaths(self,relative_dir,jobname):
+        ''' returns the paths of the .bib files of the report, which are searched next to the main tex file first '''
+        filepaths = []
+        for name in self.get_bibliography_names(jobname):
+            for filepath in [f'{relative_dir}{name}.bib',f'{name}.bib']:
+                if os.path.isfile(self.get_path(filepath)):
+                    filepaths.append(filepath)
+                    break
+        return filepaths
+
+    def get_bibliography_key(self,relative_dir,jobname):
+        ''' returns a hash of the cited keys and the content of the .bib files, which changes if bibtex has to run again '''
+        aux = read_text_if_exists(self.get_build_path(jobname,'.aux')) or ''
+        citations = set()
+        for citation in re.findall(r'\\citation\{([^}]*)\}',aux):
+            citations.update(key.strip() for key in citation.split(','))
+        bibliography = hashlib.sha256(json.dumps(sorted(citations)).encode('utf-8'))
+        for filepath in self.get_bibliography_filepaths(relative_dir,jobname):
+            with open(self.get_path(filepath),'rb') as f:
+                bibliography.update(f.read())
+        return bibliography.hexdigest()
+
+    def load_state(self,state_filepath):
+        ''' returns the state of the previous compilation, or an empty state '''
         try:
-            os.remove(filename)
-        except:
-            print(f'Error while deleting file: {filename} but that is not too bad because the intention is for it to not be there.')
-    
+            with open(state_filepath) as f:
+                state = json.load(f)
+        except (OSError,ValueError):
+            state = {}
+        return state
+
+    def save_state(self,state_filepath,state):
+        write_file_if_changed(json.dumps(state,indent=1,sort_keys=True),state_filepath)
+
+    # writes the preview of the main tex file into the build directory and returns its filename
+    def create_preview(self,latex_filename):
+        main_tex_code = read_text_if_exists(self.get_path(f'{self.project_dir}{latex_filename}')) or ''
+        units = get_report_units(main_tex_code,self.root_dir)
+        self.unit_keys = self.get_unit_keys(main_tex_code,units)
+        record = self.load_state(self.get_build_path(latex_filename[:-4],'_units.json'))
+        changed_units = [unit for unit in units if record.get('units',{}).get(unit) != self.unit_keys[unit]]
+        # if nothing changed since the last build, the units of the previous preview are typeset again, or all units if there was none
+        self.included_units = changed_units or [unit for unit in record.get('preview',[]) if unit in units] or units
+        print(f'Previewing {len(self.included_units)} of {len(units)} chapters and appendices: {", ".join(self.included_units)}')
+        # \include writes an .aux file per unit, in the same directories below the build directory
+        for unit in units:
+            os.makedirs(os.path.dirname(self.get_path(f'{self.build_dir}{unit}')),exist_ok=True)
+        self.include_aux_filepaths = [self.get_path(f'{self.build_dir}{unit[:-4]}.aux') for unit in units]
+        preview_filename = f'{latex_filename[:-4]}_preview.tex'
+        write_file_if_changed(
+            create_preview_latex(main_tex_code,units,self.included_units,self.root_dir),
+            self.get_path(f'{self.build_dir}{preview_filename}'),
+        )
+        return preview_filename
+
+    # records from which version of each chapter and appendix the last build was made, the next preview only typesets the changed ones
+    def record_units(self,latex_filename):
+        if self.unit_keys is None:
+            main_tex_code = read_text_if_exists(self.get_path(f'{self.project_dir}{latex_filename}')) or ''
+            self.unit_keys = self.get_unit_keys(main_tex_code,get_report_units(main_tex_code,self.root_dir))
+        record_filepath = self.get_build_path(latex_filename[:-4],'_units.json')
+        record = self.load_state(record_filepath)
+        record['units'] = self.unit_keys
+        if self.preview:
+            record['preview'] = self.included_units
+        self.save_state(record_filepath,record)
+
+    def get_unit_keys(self,main_tex_code,units):
+        ''' returns the key of each chapter and appendix, which changes if a file that it includes changes '''
+        graphics_paths = get_graphics_paths(main_tex_code)
+        return {unit: get_unit_key(unit,self.root_dir,graphics_paths) for unit in units}
+
+    # stores the pdf and auxiliary files under the hash of the content of all inputs, except the files in the build directory (e.g. the format)
+    def store_in_cache(self,jobname,state):
+        build_dir = os.path.normpath(self.get_path(self.build_dir))
+        input_filepaths = [filepath for filepath in state['inputs'] if not filepath.startswith(build_dir+os.sep)]
+        filepaths = [self.get_build_path(jobname,extension) for extension in auxiliary_extensions+['.bbl','.pdf']]
+        self.cache.add(input_filepaths,self.get_cache_salt(jobname),[filepath for filepath in filepaths if os.path.isfile(filepath)],
+            {'bibliography': state['bibliography']})
+
+    def get_cache_salt(self,jobname):
+        ''' returns the part of the cache key that identifies the document and the TeX installation '''
+        return json.dumps([self.project_dir,jobname,get_tex_installation_key()])
+
+    # stores the report of this compilation, and appends its statistics to the history of all compilations
+    def save_report(self,jobname):
+        report = self.report.to_dict()
+        write_file_if_changed(json.dumps(report,indent=1,sort_keys=True),self.get_build_path(jobname,'_report.json'))
+        statistics = {key: report[key] for key in ['pages','output_size','pass_durations','rerun_requested']}
+        statistics.update({key: len(report[key]) for key in ['errors','warnings','undefined_references','overfull_boxes']})
+        statistics['time'] = time.time()
+        statistics['slowest_files'] = dict(self.report.get_slowest_files(10))
+        with open(self.get_build_path(jobname,'_history.jsonl'),'a') as f:
+            f.write(json.dumps(statistics,sort_keys=True)+'\n')
+
+    # copies the pdf from the build directory into the latex directory, readers never see a partially written pdf
+    def publish_pdf(self,latex_filename):
+        pdf_filepath = self.get_build_path(latex_filename[:-4],'.pdf')
+        if os.path.isfile(pdf_filepath):
+            copy_file_atomically(pdf_filepath,self.get_pdf_filepath(latex_filename))
+        else:
+            print(f'Error: pdflatex did not create {pdf_filepath}')
+
+    def clean_build_dir(self):
+        ''' deletes the build directory, such that the next compilation starts from scratch '''
+        shutil.rmtree(self.get_path(self.build_dir),ignore_errors=True)
+
+    def get_path(self,relative_path):
+        ''' returns the absolute path of a path relative to the root of the repository '''
+        return os.path.join(self.root_dir,relative_path)
+
+    def get_build_path(self,jobname,extension):
+        ''' returns the absolute path of a file that pdflatex generates in the build directory '''
+        return self.get_path(f'{self.build_dir}{jobname}{extension}')
+
+    def get_pdf_filepath(self,latex_filename):
+        ''' returns the path of the compiled pdf in the latex directory of the project '''
+        return f'{self.get_script_dir()}/../../../{self.project_dir}{latex_filename[:-4]}.pdf'
+
     def get_script_dir(self):
         ''' returns the directory of this script regardles of from which level the code is executed '''
         return os.path.dirname(__file__)
 
+def get_tex_installation_key():
+    ''' returns the version of pdflatex and the fingerprint of its base format, which change if the TeX installation is updated '''
+    global tex_installation_key
+    if tex_installation_key is None:
+        try:
+            version = subprocess.run(['pdflatex','--version'],capture_output=True,text=True).stdout.split('\n')[0]
+            base_format = subprocess.run(['kpsewhich','pdflatex.fmt'],capture_output=True,text=True).stdout.strip()
+        except OSError:
+            version,base_format = '',''
+        tex_installation_key = json.dumps([version,base_format,get_fingerprint(base_format) if base_format else None])
+    return tex_installation_key
+
 if __name__ == '__main__':
     main = Compile_latex()
\ No newline at end of file
@@ -0,0 +1,81 @@
+# creates a preview of a latex report in which only the changed chapters and appendices are typeset
+import hashlib
+import json
+import os
+
+from .Export_manifest import get_fingerprint
+from .Parse_latex import tokenize_latex
+from .Scan_latex_dependencies import get_tex_path, is_taken, scan_latex_dependencies
+
+# Packages that show placeholders of the right size instead of the graphics and pdfs in a preview.
+draft_packages = ["graphicx", "pdfpages"]
+
+
+def get_report_units(main_tex_code, root_dir):
+    """Returns the paths, relative to the root of the repository, of the chapters and appendices: the
+    files that the body of the main document includes with \\input. Only the \\IfFileExists branches
+    that are taken when the report is compiled from the root of the repository are used.
+
+    :param main_tex_code: The latex code of the main document.
+    :param root_dir: The root directory of the repository, from which pdflatex runs.
+    """
+    begin_index = main_tex_code.find("\\begin{document}")
+    if begin_index == -1:
+        return []
+    begin_line_nr = main_tex_code.count("\n", 0, begin_index)
+    units = []
+    for command in tokenize_latex(main_tex_code.splitlines(), ["input"]):
+        if command.line_nr <= begin_line_nr or not is_taken(command.conditions, root_dir):
+            continue
+        path = get_tex_path(command.argument)
+        if os.path.isfile(os.path.join(root_dir, path)) and not path in units:
+            units.append(path)
+    return units
+
+
+def get_unit_key(unit, root_dir, graphics_paths=None):
+    """Returns a hash of the fingerprints of a chapter or appendix and of all files that it includes
+    (e.g. the code of a code appendix or its figures), which changes if the unit has to be typeset again.
+
+    :param unit: Path of the chapter or appendix relative to the root of the repository.
+    :param root_dir: The root directory of the repository, from which pdflatex runs.
+    :param graphics_paths: (Default value = None) Directories in which \\includegraphics searches, see scan_latex_dependencies.
+    """
+    graph = scan_latex_dependencies(unit, root_dir, graphics_paths or [])
+    fingerprints = [[unit, get_fingerprint(os.path.join(root_dir, unit))]]
+    for dependencies in graph.dependencies.values():
+        for dependency in dependencies:
+            fingerprints.append(
+                [dependency.target, get_fingerprint(os.path.join(root_dir, dependency.target))]
+            )
+    return hashlib.sha256(json.dumps(fingerprints).encode("utf-8")).hexdigest()
+
+
+def create_preview_latex(main_tex_code, units, included_units, root_dir):
+    """Returns the latex code of the preview of a report. The chapters and appendices are included with
+    \\include instead of \\input, such that \\includeonly typesets only the included units while the
+    references to the other units are read from their .aux files of earlier builds. The graphics and the
+    included pdfs are replaced by placeholders.
+
+    :param main_tex_code: The latex code of the main document.
+    :param units: The chapters and appendices of the report, as returned by get_report_units.
+    :param included_units: The units that are typeset in the preview.
+    :param root_dir: The root directory of the repository, from which pdflatex runs.
+    """
+    lines = main_tex_code.splitlines(keepends=True)
+    for command in tokenize_latex(lines, ["input"]):
+        path = get_tex_path(command.argument)
+        if path in units and is_taken(command.conditions, root_dir):
+            lines[command.line_nr] = lines[command.line_nr].replace(
+                f"\\input{{{command.argument}}}", f"\\include{{{path[: -len('.tex')]}}}", 1
+            )
+    preview_tex_code = "".join(lines)
+    begin_index = preview_tex_code.find("\\begin{document}")
+    include_only = ",".join(unit[: -len(".tex")] for unit in units if unit in included_units)
+    draft_options = "".join(
+        f"\\PassOptionsToPackage{{draft}}{{{package}}}\n" for package in draft_packages
+    )
+    return (
+        f"{draft_options}{preview_tex_code[:begin_index]}\\includeonly{{{include_only}}}\n"
+        f"{preview_tex_code[begin_index:]}"
+    )
@@ -0,0 +1,217 @@
+# lists the files of the code and latex directories once per run
+import fnmatch
+import os
+import threading
+
+# Directories that never contain code or appendices that belong in the report.
+default_ignored_directories = [
+    "__pycache__",
+    ".ipynb_checkpoints",
+    ".git",
+    ".hg",
+    ".svn",
+    ".tox",
+    ".nox",
+    ".venv",
+    "venv",
+    ".mypy_cache",
+    ".pytest_cache",
+    "node_modules",
+    "site-packages",
+]
+
+
+class File_discovery:
+    """Lists the files in a directory tree with os.scandir. Ignored directories are pruned before
+    they are entered, files and directories that match the .gitignore patterns of the scanned tree
+    (and of its parent directories up to the repository root) are skipped, and the listing of each
+    scanned directory is cached for the rest of the run. A single instance can be shared by the
+    threads that export multiple projects, the caches are guarded by a lock.
+    """
+
+    def __init__(self, ignored_directories=None, ignore_patterns=None):
+        if ignored_directories is None:
+            ignored_directories = default_ignored_directories
+        self.ignored_directories = set(ignored_directories)
+        self.extra_ignore_rules = []
+        for pattern in ignore_patterns or []:
+            rule = parse_ignore_pattern(pattern, None)
+            if not rule is None:
+                self.extra_ignore_rules.append(rule)
+        self.listings = {}
+        self.gitignore_rules = {}
+        # reentrant, as scanning a directory also reads the cached .gitignore rules
+        self.lock = threading.RLock()
+
+    def get_filenames_in_dir(self, extension, path, excluded_files=None):
+        """Returns a list of the paths to all files within some path that match the given file extension.
+
+        :param extension: The file extension of the files that are sought, e.g. ".py" or ".tex".
+        :param path: Absolute filepath in which files are being sought.
+        :param excluded_files: (Default value = None) Files that will not be included even if they are found.
+        """
+        filepaths = []
+        for filepath in self.get_filepaths(path):
+            filename = filepath[filepath.rfind("/") + 1 :]
+            if filename.endswith(extension):
+                if (excluded_files is None) or (not filename in excluded_files):
+                    filepaths.append(filepath)
+        return filepaths
+
+    def get_filepaths(self, path):
+        """Returns the cached list of paths to all files that are not ignored within some path.
+
+        :param path: Absolute filepath in which files are being sought.
+        """
+        with self.lock:
+            if not path in self.listings:
+                filepaths = []
+                if os.path.isdir(path):
+                    self.scan_directory(
+                        path,
+                        os.path.abspath(path),
+                        self.get_parent_ignore_rules(path),
+                        filepaths,
+                    )
+                self.listings[path] = filepaths
+            return self.listings[path]
+
+    def invalidate(self, path=None):
+        """Drops the cached listing of a path, or of all paths if no path is given, e.g. after
+        files were created or deleted in it.
+
+        :param path: (Default value = None) Absolute filepath of which the listing is dropped.
+        """
+        with self.lock:
+            if path is None:
+                self.listings = {}
+            else:
+                self.listings.pop(path, None)
+
+    def scan_directory(self, directory, directory_path, ignore_rules, filepaths):
+        """Appends the paths to the files in a directory to filepaths, and recursively scans the
+        subdirectories that are not ignored.
+
+        :param directory: Path of the directory as it is written in the returned filepaths.
+        :param directory_path: Normalised absolute path of the directory, used to match ignore patterns.
+        :param ignore_rules: List of ignore rules that apply to this directory.
+        :param filepaths: List of filepaths to which the found files are appended.
+        """
+        ignore_rules = ignore_rules + self.get_gitignore_rules(directory_path)
+        with os.scandir(directory) as entries:
+            entries = sorted(entries, key=lambda entry: entry.name)
+        subdirectories = []
+        for entry in entries:
+            entry_path = os.path.join(directory_path, entry.name)
+            if entry.is_dir():
+                if not self.directory_is_ignored(entry, entry_path, ignore_rules):
+                    subdirectories.append((entry, entry_path))
+            elif not path_is_ignored(entry_path, False, ignore_rules):
+                filepaths.append(directory + "/" + entry.name)
+        for entry, entry_path in subdirectories:
+            self.scan_directory(
+                os.path.join(directory, entry.name), entry_path, ignore_rules, filepaths
+            )
+
+    def directory_is_ignored(self, entry, entry_path, ignore_rules):
+        """Returns True if a directory should not be entered.
+
+        :param entry: The os.DirEntry of the directory.
+        :param entry_path: Normalised absolute path of the directory.
+        :param ignore_rules: List of ignore rules that apply to the parent directory.
+        """
+        if entry.name in self.ignored_directories:
+            return True
+        if path_is_ignored(entry_path, True, ignore_rules):
+            return True
+        # virtual environments can have any name, but always contain a pyvenv.cfg
+        return os.path.isfile(os.path.join(entry_path, "pyvenv.cfg"))
+
+    def get_parent_ignore_rules(self, path):
+        """Returns the ignore rules of the .gitignore files in the parent directories of a path,
+        up to and including the root directory of the git repository.
+
+        :param path: Absolute filepath in which files are being sought.
+        """
+        directory_paths = []
+        directory_path = os.path.dirname(os.path.abspath(path))
+        while True:
+            directory_paths.append(directory_path)
+            if os.path.exists(os.path.join(directory_path, ".git")):
+                break
+            parent_path = os.path.dirname(directory_path)
+            if parent_path == directory_path:
+                break
+            directory_path = parent_path
+
+        ignore_rules = list(self.extra_ignore_rules)
+        for directory_path in reversed(directory_paths):
+            ignore_rules = ignore_rules + self.get_gitignore_rules(directory_path)
+        return ignore_rules
+
+    def get_gitignore_rules(self, directory_path):
+        """Returns the (cached) ignore rules of the .gitignore file in a directory.
+
+        :param directory_path: Normalised absolute path of the directory.
+        """
+        with self.lock:
+            if not directory_path in self.gitignore_rules:
+                rules = []
+                try:
+                    with open(os.path.join(directory_path, ".gitignore")) as f:
+                        for line in f:
+                            rule = parse_ignore_pattern(line, directory_path)
+                            if not rule is None:
+                                rules.append(rule)
+                except OSError:
+                    pass
+                self.gitignore_rules[directory_path] = rules
+            return self.gitignore_rules[directory_path]
+
+
+def parse_ignore_pattern(line, base_dir):
+    """Returns an ignore rule as a tuple of (base directory, pattern, negated, directory only, anchored),
+    or None if the line of a .gitignore file does not contain a pattern.
+
+    :param line: A line of a .gitignore file.
+    :param base_dir: Directory that contains the .gitignore file, or None if the pattern applies everywhere.
+    """
+    pattern = line.rstrip("\n").rstrip()
+    if pattern == "" or pattern.startswith("#"):
+        return None
+    negated = pattern.startswith("!")
+    if negated:
+        pattern = pattern[1:]
+    directory_only = pattern.endswith("/")
+    pattern = pattern.rstrip("/")
+    anchored = "/" in pattern
+    pattern = pattern.lstrip("/")
+    if pattern == "":
+        return None
+    return (base_dir, pattern, negated, directory_only, anchored)
+
+
+def path_is_ignored(path, is_directory, ignore_rules):
+    """Returns True if the last ignore rule that matches a path ignores it, following .gitignore semantics.
+
+    :param path: Normalised absolute path of a file or directory.
+    :param is_directory: True if the path is a directory.
+    :param ignore_rules: List of ignore rules as returned by parse_ignore_pattern.
+    """
+    ignored = False
+    name = os.path.basename(path)
+    for base_dir, pattern, negated, directory_only, anchored in ignore_rules:
+        if directory_only and not is_directory:
+            continue
+        if anchored:
+            if base_dir is None:
+                continue
+            relative_path = os.path.relpath(path, base_dir)
+            if relative_path.startswith(".."):
+                continue
+            matches = fnmatch.fnmatchcase(relative_path.replace(os.sep, "/"), pattern)
+        else:
+            matches = fnmatch.fnmatchcase(name, pattern)
+        if matches:
+            ignored = not negated
+    return ignored
@@ -0,0 +1,139 @@
+# exports the code of multiple projects into their latex reports in a single run
+import argparse
+import concurrent.futures
+import os
+
+from .Discover_files import File_discovery
+from .Export_code_to_latex import export_code_to_latex, get_root_dir, get_script_dir
+from .Log_export import configure_logging
+
+
+def export_code_of_projects(
+    project_nrs=None,
+    main_latex_filename="main.tex",
+    max_workers=None,
+    file_discovery=None,
+    appendix_indices=None,
+    **export_options,
+):
+    """Exports the python files and compiled notebook pdfs of multiple projects into the appendices of
+    their latex reports. The projects share a single File_discovery and dictionary of appendix indices,
+    and are exported concurrently on a thread pool. Returns a dictionary from project number to the
+    exception that was raised while exporting that project, or None if the export succeeded.
+
+    :param project_nrs: (Default value = None) List of project numbers, all projects are exported if it is not given.
+    :param main_latex_filename: (Default value = "main.tex") Name of the main latex document of each project.
+    :param max_workers: (Default value = None) Maximum number of projects that are exported concurrently.
+    :param file_discovery: (Default value = None) File_discovery that is shared by the projects, a new one if it is not given.
+    :param appendix_indices: (Default value = None) Dictionary of appendix indices that is shared by the projects.
+    :param export_options: The options of export_code_to_latex, e.g. highlight_code, max_listing_lines,
+    build_root or stale_notebook_pdfs, which apply to every project.
+    """
+    if project_nrs is None:
+        project_nrs = get_project_nrs()
+    if file_discovery is None:
+        file_discovery = File_discovery()
+    if appendix_indices is None:
+        appendix_indices = {}
+    results = {}
+    with concurrent.futures.ThreadPoolExecutor(max_workers=max_workers) as executor:
+        futures = {
+            executor.submit(
+                export_code_to_latex,
+                main_latex_filename,
+                project_nr,
+                file_discovery,
+                appendix_indices,
+                **export_options,
+            ): project_nr
+            for project_nr in project_nrs
+        }
+        for future in concurrent.futures.as_completed(futures):
+            results[futures[future]] = future.exception()
+    return {project_nr: results[project_nr] for project_nr in project_nrs}
+
+
+def get_project_nrs(main_latex_filename="main.tex"):
+    """Returns the sorted list of project numbers that have both a code/projectN/src directory and
+    a latex/projectN/ directory with a main latex document.
+
+    :param main_latex_filename: (Default value = "main.tex") Name of the main latex document of each project.
+    """
+    root_dir = get_root_dir(get_script_dir())
+    project_nrs = []
+    with os.scandir(f"{root_dir}code") as entries:
+        for entry in entries:
+            project_nr = entry.name[len("project") :]
+            if entry.name.startswith("project") and project_nr.isdigit():
+                if os.path.isdir(f"{entry.path}/src") and os.path.isfile(
+                    f"{root_dir}latex/project{project_nr}/{main_latex_filename}"
+                ):
+                    project_nrs.append(int(project_nr))
+    return sorted(project_nrs)
+
+
+def parse_args():
+    """Returns the command line arguments of the batch export."""
+    parser = argparse.ArgumentParser(
+        description="Exports the code of multiple projects into the appendices of their latex reports."
+    )
+    parser.add_argument(
+        "project_nrs",
+        nargs="*",
+        type=int,
+        help="Numbers of the projects that are exported, all projects are exported if none are given.",
+    )
+    parser.add_argument("--main-latex-filename", default="main.tex")
+    parser.add_argument("--max-workers", type=int, default=None)
+    parser.add_argument(
+        "--highlight-code",
+        action="store_true",
+        help="Include the python files as listings that are pre-highlighted with Pygments.",
+    )
+    parser.add_argument(
+        "--max-listing-lines",
+        type=int,
+        default=None,
+        help="Split the listings of python files into chunks of at most this many lines.",
+    )
+    parser.add_argument(
+        "--build-root",
+        choices=["root", "project"],
+        default=None,
+        help="Only include the files with the paths as seen from the root of the repository or from latex/projectN/.",
+    )
+    parser.add_argument(
+        "--stale-notebook-pdfs",
+        choices=["warn", "error", "ignore"],
+        default="warn",
+        help="What to do with notebook pdfs that were not converted from the current notebook (default: warn).",
+    )
+    parser.add_argument(
+        "-v",
+        "--verbose",
+        action="count",
+        default=0,
+        help="Log a summary of each export (-v), or also the duration of each phase (-vv).",
+    )
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    configure_logging(args.verbose)
+    results = export_code_of_projects(
+        args.project_nrs or None,
+        args.main_latex_filename,
+        args.max_workers,
+        highlight_code=args.highlight_code,
+        max_listing_lines=args.max_listing_lines,
+        build_root=args.build_root,
+        stale_notebook_pdfs=args.stale_notebook_pdfs,
+    )
+    for project_nr, exception in results.items():
+        if exception is None:
+            print(f"Exported project{project_nr}.")
+        else:
+            print(f"Failed to export project{project_nr}: {exception!r}")
+    if any(not exception is None for exception in results.values()):
+        raise SystemExit(1)
@@ -1,11 +1,32 @@
 # runs a jupyter notebook and converts it to pdf
+import logging
 import os
 import shutil
 import nbformat
 from nbconvert.preprocessors import ExecutePreprocessor
 
+from .Discover_files import File_discovery
+from .Export_manifest import Export_manifest
+from .Highlight_code import get_fragment_path, highlight_code_file
+from .Log_export import Phase_timer
+from .Parse_latex import group_commands_by_line, tokenize_latex
+from .Track_notebook_pdfs import Notebook_pdf_tracker, notebook_pdfs_filename
+from .Write_files import write_file_if_changed
 
-def export_code_to_latex(main_latex_filename, project_nr):
+logger = logging.getLogger(__name__)
+
+
+def export_code_to_latex(
+    main_latex_filename,
+    project_nr,
+    file_discovery=None,
+    appendix_indices=None,
+    delete_orphaned_appendices=True,
+    highlight_code=False,
+    max_listing_lines=None,
+    build_root=None,
+    stale_notebook_pdfs="warn",
+):
     """This function exports the python files and compiled pdfs of jupiter notebooks into the
     latex of the same project number. First it scans which appendices (without code, without
     notebooks) are already manually included in the main latex code. Next, all appendices
@@ -13,44 +34,198 @@ def export_code_to_latex(main_latex_filename, project_nr):
     First, the __main__.py file is included, followed by the main.py file, followed by all
     python code files in alphabetic order. After this, all the pdfs of the compiled notebooks
     are added in alphabetic order of filename. This order of appendices is overwritten in the
-    main tex file.
+    main tex file. Appendices of which the included code file no longer exists are not included
+    in the main tex file, and are deleted if they were auto generated. The duration of each phase
+    (discover, index, create, order and write) is logged at DEBUG level and a summary at INFO level.
 
     :param main_latex_filename: Name of the main latex document of this project number
     :param project_nr: The number  indicating which project this code pertains to.
+    :param file_discovery: (Default value = None) File_discovery that caches the directory listings,
+    can be shared by the exports of multiple projects.
+    :param appendix_indices: (Default value = None) Dictionary from appendix directory to Appendix_index,
+    can be shared by the exports of multiple projects.
+    :param delete_orphaned_appendices: (Default value = True) Delete the auto generated appendices of which
+    the included code file no longer exists, instead of only leaving them out of the main tex file.
+    :param highlight_code: (Default value = False) Pre-render the syntax highlighting of the python files
+    with Pygments into latex/projectN/Highlighted_code/ (cached by the hash of each file), and include
+    those fragments in newly created appendices instead of letting the listings package highlight
+    the code at every compilation. Raises a ValueError if the main tex file does not define \\pythonhighlighted.
+    :param max_listing_lines: (Default value = None) Split the listings of python files into chunks of at
+    most this many lines, preferably at the start of functions and classes, such that pdflatex never
+    typesets a single very large listing. The chunks are written into the same fragments as the
+    highlighted code, and only the chunks of which the code changed are rendered again.
+    :param build_root: (Default value = None) Directory from which the report is compiled, either "root"
+    (the root of this repository, as Compile_latex does) or "project" (latex/projectN/, as Overleaf does).
+    If it is given, the main tex file and the auto generated appendices include every file once with the path
+    as seen from that directory, instead of with both paths in the branches of an \\IfFileExists. The auto
+    generated appendices are rewritten when the build root differs from the one of the previous export.
+    :param stale_notebook_pdfs: (Default value = "warn") What to do with notebook pdfs that were not converted
+    from the current cells of their notebook: "warn" includes them and logs a warning, "error" raises a
+    ValueError before anything is exported and "ignore" includes them silently.
     """
+    if not build_root in [None, "root", "project"]:
+        raise ValueError(f"build_root should be None, \"root\" or \"project\", not {build_root!r}.")
+    if not stale_notebook_pdfs in ["warn", "error", "ignore"]:
+        raise ValueError(
+            f"stale_notebook_pdfs should be \"warn\", \"error\" or \"ignore\", not {stale_notebook_pdfs!r}."
+        )
+    timer = Phase_timer(f"project{project_nr}", logger)
+    timer.start_phase("discover")
     script_dir = get_script_dir()
     relative_dir = f"latex/project{project_nr}/"
     appendix_dir = script_dir + "/../../../" + relative_dir + "Appendices/"
     path_to_main_latex_file = (
         f"{script_dir}/../../../{relative_dir}/{main_latex_filename}"
     )
-    root_dir = script_dir[0 : script_dir.rfind(f"code/project{project_nr}")]
+    root_dir = get_root_dir(script_dir)
+    src_dir = f"{root_dir}code/project{project_nr}/src"
+    manifest = Export_manifest(
+        f"{script_dir}/../../../{relative_dir}.export_manifest.json",
+        root_dir,
+        appendix_dir,
+    )
 
-    # Get paths to files containing python code.
-    python_filepaths = get_filenames_in_dir("py", script_dir, ["__init__.py"])
-    compiled_notebook_pdf_filepaths = get_compiled_notebook_paths(script_dir)
+    # List the source and appendix directories once, all listings below are answered from this cache.
+    if file_discovery is None:
+        file_discovery = File_discovery()
+    if appendix_indices is None:
+        appendix_indices = {}
 
-    # Check which files are already included in the latex appendicess.
-    python_files_already_included_in_appendices = get_code_files_already_included_in_appendices(
-        python_filepaths, appendix_dir, ".py", project_nr, root_dir
+    # Get paths to files containing python code.
+    python_filepaths = get_filenames_in_dir(
+        "py", src_dir, ["__init__.py"], file_discovery
     )
-    notebook_pdf_files_already_included_in_appendices = get_code_files_already_included_in_appendices(
-        compiled_notebook_pdf_filepaths, appendix_dir, ".ipynb", project_nr, root_dir,
+    compiled_notebook_pdf_filepaths = get_compiled_notebook_paths(
+        src_dir, file_discovery
     )
-
-    # Get which appendices are still missing.
-    missing_python_files_in_appendices = get_code_files_not_yet_included_in_appendices(
-        python_filepaths, python_files_already_included_in_appendices, ".py"
+    # The pdfs only become stale if their notebooks or the record of their conversions change.
+    notebook_filepaths = [
+        pdf_filepath[: -len(".pdf")] + ".ipynb"
+        for pdf_filepath in compiled_notebook_pdf_filepaths
+    ] + [f"{src_dir}/{notebook_pdfs_filename}"]
+
+    # Skip the export if no code file, notebook, appendix or main latex file changed since the last export.
+    options = {
+        "highlight_code": highlight_code,
+        "max_listing_lines": max_listing_lines,
+        "build_root": build_root,
+    }
+    use_code_fragments = highlight_code or not max_listing_lines is None
+    state = manifest.create_state(
+        python_filepaths + compiled_notebook_pdf_filepaths,
+        get_filenames_in_dir(".tex", appendix_dir, None, file_discovery),
+        path_to_main_latex_file,
+        options,
+        notebook_filepaths,
+    )
+    if manifest.is_unchanged(state):
+        report_stale_notebook_pdfs(manifest.get_stale_notebook_pdfs(), stale_notebook_pdfs)
+        timer.stop("appendices are up to date")
+        return
+    stale_pdf_filepaths = get_stale_notebook_pdf_paths(
+        src_dir, compiled_notebook_pdf_filepaths
     )
-    missing_notebook_files_in_appendices = get_code_files_not_yet_included_in_appendices(
-        compiled_notebook_pdf_filepaths,
-        notebook_pdf_files_already_included_in_appendices,
-        ".pdf",
+    report_stale_notebook_pdfs(stale_pdf_filepaths, stale_notebook_pdfs)
+
+    timer.start_phase("index")
+    if use_code_fragments and get_index_of_substring_in_list(
+        read_file(path_to_main_latex_file), "\\newcommand\\pythonhighlighted"
+    ) is None:
+        raise ValueError(
+            f"{main_latex_filename} of project{project_nr} does not define \\pythonhighlighted, which the "
+            "highlighted and chunked code listings need (see latex/project1/main.tex)."
+        )
+    # Parse every appendix once, all appendix lookups below are answered from this index.
+    if not appendix_dir in appendix_indices:
+        appendix_indices[appendix_dir] = Appendix_index(
+            appendix_dir, file_discovery=file_discovery
+        )
+    appendix_index = appendix_indices[appendix_dir]
+
+    # Leave out (and delete) the appendices of deleted or renamed code files.
+    orphaned_appendix_filepaths = deactivate_orphaned_appendices(
+        appendix_index,
+        [root_dir, f"{script_dir}/../../../{relative_dir}"],
+        delete_orphaned_appendices,
     )
+    if orphaned_appendix_filepaths:
+        file_discovery.invalidate(appendix_dir)
+
+    # The state was captured before the orphaned appendices were left out, so it only describes the
+    # appendices if there were none.
+    if not orphaned_appendix_filepaths and manifest.appendices_are_unchanged(state):
+        # The manifest knows in which appendix each previously seen code file is included.
+        missing_python_files_in_appendices = manifest.get_code_files_not_yet_included(
+            python_filepaths
+        )
+        missing_notebook_files_in_appendices = manifest.get_code_files_not_yet_included(
+            compiled_notebook_pdf_filepaths
+        )
+        included_code_files = manifest.get_included_code_files(
+            python_filepaths + compiled_notebook_pdf_filepaths
+        )
+    else:
+        # Check which files are already included in the latex appendicess.
+        python_files_already_included_in_appendices = get_code_files_already_included_in_appendices(
+            python_filepaths, appendix_dir, ".py", project_nr, root_dir, appendix_index
+        )
+        notebook_pdf_files_already_included_in_appendices = get_code_files_already_included_in_appendices(
+            compiled_notebook_pdf_filepaths,
+            appendix_dir,
+            ".ipynb",
+            project_nr,
+            root_dir,
+            appendix_index,
+        )
+
+        # Get which appendices are still missing.
+        missing_python_files_in_appendices = get_code_files_not_yet_included_in_appendices(
+            python_filepaths, python_files_already_included_in_appendices, ".py"
+        )
+        missing_notebook_files_in_appendices = get_code_files_not_yet_included_in_appendices(
+            compiled_notebook_pdf_filepaths,
+            notebook_pdf_files_already_included_in_appendices,
+            ".pdf",
+        )
+        included_code_files = {
+            contained_code.code_filepath: contained_code.appendix_filepath
+            for contained_code in python_files_already_included_in_appendices
+            + notebook_pdf_files_already_included_in_appendices
+        }
+
+    # The auto generated appendices are rewritten if they include their code with paths for another build
+    # root, or as plain listings instead of highlighted or chunked fragments (or vice versa).
+    if any(manifest.option_changed(state, name) for name in options):
+        rewrite_code_inclusions_of_appendices(
+            included_code_files,
+            project_nr,
+            root_dir,
+            appendix_index,
+            build_root,
+            use_code_fragments,
+        )
 
     # Create the missing appendices.
+    timer.start_phase("create")
+    # Pre-render the (chunked) code fragments of the python files that changed since the last export.
+    if use_code_fragments:
+        for python_filepath in python_filepaths:
+            highlight_code_file(
+                python_filepath,
+                f"{script_dir}/../../../{relative_dir}{get_fragment_path(python_filepath, root_dir)}",
+                highlight_code,
+                max_listing_lines,
+            )
+
     created_python_appendix_filenames = create_appendices_with_code(
-        appendix_dir, missing_python_files_in_appendices, ".py", project_nr, root_dir
+        appendix_dir,
+        missing_python_files_in_appendices,
+        ".py",
+        project_nr,
+        root_dir,
+        appendix_index,
+        use_code_fragments,
+        build_root,
     )
 
     created_notebook_appendix_filenames = create_appendices_with_code(
@@ -59,10 +234,15 @@ def export_code_to_latex(main_latex_filename, project_nr):
         ".ipynb",
         project_nr,
         root_dir,
+        appendix_index,
+        build_root=build_root,
     )
 
+    file_discovery.invalidate(appendix_dir)
+
+    timer.start_phase("order")
     appendices = get_list_of_appendix_files(
-        appendix_dir, compiled_notebook_pdf_filepaths, python_filepaths
+        appendix_dir, compiled_notebook_pdf_filepaths, python_filepaths, appendix_index
     )
 
     main_tex_code, start_index, end_index, appendix_tex_code = get_appendix_tex_code(
@@ -76,53 +256,56 @@ def export_code_to_latex(main_latex_filename, project_nr):
         main_non_code_appendix_inclusion_lines,
     ) = get_order_of_non_code_appendices_in_main(appendices, appendix_tex_code)
 
-    python_appendix_filenames = list(
-        map(
-            lambda x: x.appendix_filename,
-            filter_appendices_by_type(appendices, "python"),
-        )
-    )
     sorted_created_python_appendices = sort_python_appendices(
         filter_appendices_by_type(appendices, "python")
     )
-    sorted_python_appendix_filenames = list(
-        map(lambda x: x.appendix_filename, sorted_created_python_appendices)
-    )
-
-    notebook_appendix_filenames = list(
-        map(
-            lambda x: x.appendix_filename,
-            filter_appendices_by_type(appendices, "notebook"),
-        )
-    )
     sorted_created_notebook_appendices = sort_notebook_appendices_alphabetically(
         filter_appendices_by_type(appendices, "notebook")
     )
-    sorted_notebook_appendix_filenames = list(
-        map(lambda x: x.appendix_filename, sorted_created_notebook_appendices)
-    )
 
     appendix_latex_code = create_appendices_latex_code(
         main_non_code_appendix_inclusion_lines,
         sorted_created_notebook_appendices,
         project_nr,
         sorted_created_python_appendices,
+        build_root,
     )
     
     updated_main_tex_code = substitute_appendix_code(
         end_index, main_tex_code, start_index, appendix_latex_code
     )
-    print(f'\n\n')
-    print(f"updated_main_tex_code={updated_main_tex_code}")
-    
+
+    timer.start_phase("write")
     overwrite_content_to_file(updated_main_tex_code, path_to_main_latex_file)
 
+    # Store the state after this export such that the next run can skip it if nothing changed.
+    for code_filepath, appendix_filename in zip(
+        missing_python_files_in_appendices + missing_notebook_files_in_appendices,
+        created_python_appendix_filenames + created_notebook_appendix_filenames,
+    ):
+        included_code_files[code_filepath] = f"{appendix_dir}{appendix_filename}"
+    manifest.save(
+        manifest.create_state(
+            python_filepaths + compiled_notebook_pdf_filepaths,
+            appendix_index.get_appendix_filepaths(),
+            path_to_main_latex_file,
+            options,
+            notebook_filepaths,
+        ),
+        included_code_files,
+        stale_pdf_filepaths,
+    )
+    timer.stop(
+        f"created {len(created_python_appendix_filenames + created_notebook_appendix_filenames)} appendices"
+    )
+
 
 def create_appendices_latex_code(
     main_non_code_appendix_inclusion_lines,
     notebook_appendices,
     project_nr,
     python_appendices,
+    build_root=None,
 ):
     """Creates the latex code that includeds the appendices in the main latex file.
 
@@ -130,13 +313,22 @@ def create_appendices_latex_code(
     :param notebook_appendices: List of Appendix objects representing appendices that include the pdf files of compiled Jupiter notebooks
     :param project_nr: The number indicating which project this code pertains to.
     :param python_appendices: List of Appendix objects representing appendices that include the python code files.
+    :param build_root: (Default value = None) Either "root" or "project" to only include the appendices with
+    the paths as seen from that directory, both are included in the branches of an \\IfFileExists otherwise.
     """
     main_appendix_inclusion_lines = main_non_code_appendix_inclusion_lines
-    print(f"main_appendix_inclusion_lines={main_appendix_inclusion_lines}")
 
     appendices_of_all_types = [python_appendices, notebook_appendices]
+    if not build_root is None:
+        main_appendix_inclusion_lines = append_latex_inclusion_command(
+            appendices_of_all_types,
+            build_root == "root",
+            main_appendix_inclusion_lines,
+            project_nr,
+        )
+        logger.debug("main_appendix_inclusion_lines=%s", main_appendix_inclusion_lines)
+        return main_appendix_inclusion_lines
 
-    print(f"\n\n")
     main_appendix_inclusion_lines.append(
         f"\IfFileExists{{latex/project{project_nr}/main.tex}}{{"
     )
@@ -147,8 +339,8 @@ def create_appendices_latex_code(
     main_appendix_inclusion_lines = append_latex_inclusion_command(
         appendices_of_all_types, False, main_appendix_inclusion_lines, project_nr,
     )
-    #main_appendix_inclusion_lines.append(f"}}")
-    print(f"main_appendix_inclusion_lines={main_appendix_inclusion_lines}")
+    main_appendix_inclusion_lines.append(f"}}\n")
+    logger.debug("main_appendix_inclusion_lines=%s", main_appendix_inclusion_lines)
     return main_appendix_inclusion_lines
 
 
@@ -160,7 +352,6 @@ def append_latex_inclusion_command(
             line = update_appendix_tex_code(
                 appendix.appendix_filename, is_from_root_dir, project_nr
             )
-            print(f"appendix.appendix_filename={appendix.appendix_filename}")
             main_appendix_inclusion_lines.append(line)
     return main_appendix_inclusion_lines
 
@@ -248,30 +439,44 @@ def get_order_of_non_code_appendices_in_main(appendices, appendix_tex_code):
     non_code_appendices = []
     non_code_appendix_lines = []
     appendix_tex_code = list(dict.fromkeys(appendix_tex_code))
-    for line in appendix_tex_code:
-        appendix_filename = get_filename_from_latex_appendix_line(appendices, line)
-
-        # Check if line is not commented
-        if not appendix_filename is None:
-            if not line_is_commented(line, appendix_filename):
-                appendix = get_appendix_from_filename(appendices, appendix_filename)
+    appendices_by_filename = get_appendices_by_filename(appendices)
+    input_commands_by_line = group_commands_by_line(
+        tokenize_latex(appendix_tex_code, ["input"])
+    )
+    for line_nr, line in enumerate(appendix_tex_code):
+        # Only uncommented \input commands are tokenized.
+        for input_command in input_commands_by_line.get(line_nr, []):
+            appendix = appendices_by_filename.get(input_command.get_filename())
+            if not appendix is None:
                 if appendix.appendix_type == "no_code":
                     non_code_appendices.append(appendix)
                     non_code_appendix_lines.append(line)
+                break
     return non_code_appendices, non_code_appendix_lines
 
 
-def get_filename_from_latex_appendix_line(appendices, appendix_line):
-    """Returns the first filename from a list of incoming filenames that
-    occurs in a latex code line.
+def get_appendices_by_filename(appendices):
+    """Returns a dictionary from appendix filename to the first Appendix object with that filename.
 
     :param appendices: List of Appendix objects
+    """
+    appendices_by_filename = {}
+    for appendix in appendices:
+        appendices_by_filename.setdefault(appendix.appendix_filename, appendix)
+    return appendices_by_filename
+
+
+def get_filename_from_latex_appendix_line(appendices_by_filename, appendix_line):
+    """Returns the filename of the first appendix that is included by an uncommented \\input command
+    in a latex code line.
+
+    :param appendices_by_filename: Dictionary from appendix filename to Appendix object, as returned by
+    get_appendices_by_filename, such that it is built once for all lines.
     :param appendix_line: latex code (in particular expected to be the code from main that is used to include appendix latex files.)
     """
-    for filename in list(map(lambda appendix: appendix.appendix_filename, appendices)):
-        if filename in appendix_line:
-            if not line_is_commented(appendix_line, filename):
-                return filename
+    for input_command in tokenize_latex([appendix_line], ["input"]):
+        if input_command.get_filename() in appendices_by_filename:
+            return input_command.get_filename()
 
 
 def get_appendix_from_filename(appendices, appendix_filename):
@@ -286,13 +491,17 @@ def get_appendix_from_filename(appendices, appendix_filename):
             return appendix
 
 
-def get_compiled_notebook_paths(script_dir):
+def get_compiled_notebook_paths(script_dir, file_discovery=None):
     """Returns the list of jupiter notebook filepaths that were compiled successfully and that are
     included in the same dias this script (the src directory).
 
-    :param script_dir: absolute path of this file.
+    :param script_dir: absolute path of the src directory that contains the notebooks.
+    :param file_discovery: (Default value = None) File_discovery that caches the directory listings of this run.
     """
-    notebook_filepaths = get_filenames_in_dir(".ipynb", script_dir)
+    if file_discovery is None:
+        file_discovery = File_discovery()
+    notebook_filepaths = get_filenames_in_dir(".ipynb", script_dir, None, file_discovery)
+    listed_filepaths = set(file_discovery.get_filepaths(script_dir))
     compiled_notebook_filepaths = []
 
     # check if the jupyter notebooks were compiled
@@ -302,108 +511,122 @@ def get_compiled_notebook_paths(script_dir):
         notebook_filepath = notebook_filepath.replace(".ipynb", ".pdf")
 
         # check if file exists
-        if os.path.isfile(notebook_filepath):
+        if notebook_filepath in listed_filepaths:
             compiled_notebook_filepaths.append(notebook_filepath)
     return compiled_notebook_filepaths
 
 
+def get_stale_notebook_pdf_paths(src_dir, pdf_filepaths):
+    """Returns the compiled notebook pdfs that were not converted from the current cell sources and
+    outputs of their notebook (or that are older than their notebook, if the conversion was not recorded).
+
+    :param src_dir: absolute path of the src directory that contains the notebooks.
+    :param pdf_filepaths: List of absolute paths to the compiled notebook pdf files.
+    """
+    tracker = Notebook_pdf_tracker(src_dir)
+    stale_pdf_filepaths = [
+        pdf_filepath
+        for pdf_filepath in pdf_filepaths
+        if tracker.is_stale(pdf_filepath[: -len(".pdf")] + ".ipynb")
+    ]
+    # store the fingerprints of the notebooks of which only the modification time changed
+    tracker.save()
+    return stale_pdf_filepaths
+
+
+def report_stale_notebook_pdfs(stale_pdf_filepaths, stale_notebook_pdfs="warn"):
+    """Logs a warning per out of date notebook pdf, or raises a ValueError if they are not allowed.
+
+    :param stale_pdf_filepaths: List of absolute paths to the notebook pdfs that are out of date.
+    :param stale_notebook_pdfs: (Default value = "warn") Either "warn", "error" or "ignore", see export_code_to_latex.
+    """
+    if stale_notebook_pdfs == "ignore":
+        return
+    if stale_pdf_filepaths and stale_notebook_pdfs == "error":
+        raise ValueError(
+            f"The notebook pdfs {stale_pdf_filepaths} are out of date, convert their notebooks again."
+        )
+    for stale_pdf_filepath in stale_pdf_filepaths:
+        logger.warning(
+            "Including out of date notebook pdf, convert its notebook again: %s",
+            stale_pdf_filepath,
+        )
+
+
 def get_list_of_appendix_files(
-    appendix_dir, absolute_notebook_filepaths, absolute_python_filepaths
+    appendix_dir,
+    absolute_notebook_filepaths,
+    absolute_python_filepaths,
+    appendix_index=None,
 ):
     """Returns a list of Appendix objects that contain all the appendix files with .tex extension.
 
     :param appendix_dir: Absolute path that contains the appendix .tex files.
     :param absolute_notebook_filepaths: List of absolute paths to the compiled notebook pdf files.
     :param absolute_python_filepaths: List of absolute paths to the python files.
+    :param appendix_index: (Default value = None) Appendix_index of the appendix_dir, it is created if it is not given.
     """
-    appendices = []
-    appendices_paths = get_filenames_in_dir(".tex", appendix_dir)
-
-    for appendix_filepath in appendices_paths:
-        appendix_type = "no_code"
-        appendix_filecontent = read_file(appendix_filepath)
-        line_nr_python_file_inclusion = get_line_of_latex_command(
-            appendix_filecontent, "\pythonexternal{"
-        )
-        line_nr_notebook_file_inclusion = get_line_of_latex_command(
-            appendix_filecontent, "\includepdf[pages="
-        )
-        if line_nr_python_file_inclusion > -1:
-            appendix_type = "python"
-            # get python filename
-            line = appendix_filecontent[line_nr_python_file_inclusion]
-            filename = get_filename_from_latex_inclusion_command(
-                line, ".py", "\pythonexternal{"
-            )
-            appendices.append(
-                Appendix(
-                    appendix_filepath,
-                    appendix_filecontent,
-                    appendix_type,
-                    filename,
-                    line,
-                )
-            )
-        if line_nr_notebook_file_inclusion > -1:
-            appendix_type = "notebook"
-            line = appendix_filecontent[line_nr_notebook_file_inclusion]
-            filename = get_filename_from_latex_inclusion_command(
-                line, ".pdf", "\includepdf[pages="
-            )
-            appendices.append(
-                Appendix(
-                    appendix_filepath,
-                    appendix_filecontent,
-                    appendix_type,
-                    filename,
-                    line,
-                )
-            )
-        else:
-            appendices.append(
-                Appendix(appendix_filepath, appendix_filecontent, appendix_type)
-            )
-    return appendices
+    if appendix_index is None:
+        appendix_index = Appendix_index(appendix_dir)
+    return list(appendix_index.appendices)
 
 
-def get_filename_from_latex_inclusion_command(
-    appendix_line, extension, start_substring
-):
-    """returns the code/notebook filename in a latex command which includes that code in an appendix.
-    The inclusion command includes a python code or jupiter notebook pdf.
+def parse_appendix(appendix_filepath, appendix_filecontent, latex_commands=None):
+    """Returns the list of Appendix objects that describe a single appendix file. An appendix that
+    includes python code yields a "python" Appendix, an appendix that includes a notebook pdf yields
+    a "notebook" Appendix and an appendix that includes neither yields a single "no_code" Appendix.
 
-    :param appendix_line: :Line of latex code (in particular expected to be the latex code from an appendix.).
-    :param extension: The file extension of the file that is sought in the appendix line. Either ".py" or ".pdf".
-    :param start_substring: The substring that characterises the latex inclusion command.
+    :param appendix_filepath: Absolute path to the appendix .tex file.
+    :param appendix_filecontent: Content of the appendix file, with one string per line.
+    :param latex_commands: (Default value = None) The tokenized file inclusion commands of the appendix,
+    they are tokenized from the appendix_filecontent if they are not given.
     """
-    start_index = appendix_line.index(start_substring)
-    end_index = appendix_line.index(extension)
-    return get_filename_from_dir(
-        appendix_line[start_index : end_index + len(extension)]
-    )
+    if latex_commands is None:
+        latex_commands = tokenize_latex(appendix_filecontent)
+    appendices = []
+    for appendix_type, command_name in [
+        ("python", "pythonexternal"),
+        ("notebook", "includepdf"),
+    ]:
+        for latex_command in latex_commands:
+            code_inclusion = get_code_inclusion(latex_command)
+            if not code_inclusion is None and code_inclusion[0] == command_name:
+                appendices.append(
+                    Appendix(
+                        appendix_filepath,
+                        appendix_type,
+                        get_filename_from_dir(code_inclusion[1]),
+                        latex_command.line_nr,
+                    )
+                )
+                break
+    if not appendices:
+        appendices.append(Appendix(appendix_filepath, "no_code"))
+    return appendices
 
 
-def get_filenames_in_dir(extension, path, excluded_files=None):
+def get_filenames_in_dir(extension, path, excluded_files=None, file_discovery=None):
     """Returns a list of the relative paths to all files within the some path that match
-    the given file extension.
+    the given file extension. Ignored directories (e.g. __pycache__, .ipynb_checkpoints and
+    virtual environments) and files matching the .gitignore patterns are skipped.
 
     :param extension: The file extension of the file that is sought in the appendix line. Either ".py" or ".pdf".
     :param path: Absolute filepath in which files are being sought.
     :param excluded_files: (Default value = None) Files that will not be included even if they are found.
+    :param file_discovery: (Default value = None) File_discovery that caches the directory listings of this run.
     """
-    filepaths = []
-    for r, d, f in os.walk(path):
-        for file in f:
-            if file.endswith(extension):
-                if (excluded_files is None) or (
-                    (not excluded_files is None) and (not file in excluded_files)
-                ):
-                    filepaths.append(r + "/" + file)
-    return filepaths
+    if file_discovery is None:
+        file_discovery = File_discovery()
+    return file_discovery.get_filenames_in_dir(extension, path, excluded_files)
 
 
 def get_code_files_already_included_in_appendices(
-    absolute_code_filepaths, appendix_dir, extension, project_nr, root_dir
+    absolute_code_filepaths,
+    appendix_dir,
+    extension,
+    project_nr,
+    root_dir,
+    appendix_index=None,
 ):
     """Returns a list of code filepaths that are already properly included the latex appendix files of this project.
 
@@ -412,67 +635,34 @@ def get_code_files_already_included_in_appendices(
     :param extension: The file extension of the file that is sought in the appendix line. Either ".py" or ".pdf".
     :param project_nr: The number  indicating which project this code pertains to.
     :param root_dir: The root directory of this repository.
+    :param appendix_index: (Default value = None) Appendix_index of the appendix_dir, it is created if it is not given.
     """
-    appendix_files = get_filenames_in_dir(".tex", appendix_dir)
+    if appendix_index is None:
+        appendix_index = Appendix_index(appendix_dir)
     contained_codes = []
+    command_name = get_latex_inclusion_command_name(extension)
     for code_filepath in absolute_code_filepaths:
-        for appendix_filepath in appendix_files:
-            appendix_filecontent = read_file(appendix_filepath)
-            line_nr = check_if_appendix_contains_file(
-                appendix_filecontent, code_filepath, extension, project_nr, root_dir
-            )
-            if line_nr > -1:
-                # add filepath to list of files that are already in the appendices
-                contained_codes.append(
-                    Appendix_with_code(
-                        code_filepath,
-                        appendix_filepath,
-                        appendix_filecontent,
-                        line_nr,
-                        ".py",
+        # the code is included from the root directory, from latex/projectN/, or both
+        latex_relative_filepaths = [
+            f"latex/project{project_nr}/../../{code_filepath[len(root_dir):]}",
+            f"../../{code_filepath[len(root_dir):]}",
+        ]
+        appendix_filepaths = set()
+        for latex_relative_filepath in latex_relative_filepaths:
+            for appendix_filepath, line_nr in appendix_index.get_inclusions(
+                command_name, latex_relative_filepath
+            ):
+                if not appendix_filepath in appendix_filepaths:
+                    appendix_filepaths.add(appendix_filepath)
+                    # add filepath to list of files that are already in the appendices
+                    contained_codes.append(
+                        Appendix_with_code(
+                            code_filepath, appendix_filepath, line_nr, extension
+                        )
                     )
-                )
     return contained_codes
 
 
-def check_if_appendix_contains_file(
-    appendix_content, code_filepath, extension, project_nr, root_dir
-):
-    """Scans an appendix content to determine whether it contains a substring that
-    includes a code file (of either python or compiled notebook=pdf extension).
-
-    :param appendix_content: content in an appendix latex file.
-    :param code_filepath: Absolute path to a code file (either python files or compiled jupyter notebook pdfs).
-    :param extension: The file extension of the file that is sought in the appendix line. Either ".py" or ".pdf".
-    :param project_nr: The number  indicating which project this code pertains to.
-    :param root_dir: The root directory of this repository.
-    """
-    # convert code_filepath to the inclusion format in latex format
-    latex_relative_filepath = (
-        f"latex/project{project_nr}/../../{code_filepath[len(root_dir):]}"
-    )
-    latex_command = get_latex_inclusion_command(extension, latex_relative_filepath)
-    return get_line_of_latex_command(appendix_content, latex_command)
-
-
-def get_line_of_latex_command(appendix_content, latex_command):
-    """Returns the line number of a latex command if it is found. Returns -1 otherwise.
-
-    :param appendix_content: content in an appendix latex file.
-    :param latex_command: A line of latex code. (Expected to come from some appendix)
-    """
-    # check if the file is in the latex code
-    line_nr = 0
-    for line in appendix_content:
-        if latex_command in line:
-            if line_is_commented(line, latex_command):
-                commented = True
-            else:
-                return line_nr
-        line_nr = line_nr + 1
-    return -1
-
-
 def line_is_commented(line, target_substring):
     """Returns True if a latex code line is commented, returns False otherwise
 
@@ -485,6 +675,43 @@ def line_is_commented(line, target_substring):
     return False
 
 
+def get_code_inclusion(latex_command):
+    """Returns the (command name, included filepath) tuple of a tokenized latex command that includes a
+    python file or compiled notebook pdf, or None for other commands. A pre-highlighted python file
+    (\\pythonhighlighted{fragment}{code}) counts as a \\pythonexternal inclusion of its code file.
+
+    :param latex_command: A Latex_command object.
+    """
+    if latex_command.name == "pythonhighlighted":
+        if len(latex_command.arguments) < 2:
+            return None
+        return ("pythonexternal", latex_command.arguments[1])
+    if latex_command.name in ["pythonexternal", "includepdf"]:
+        return (latex_command.name, latex_command.argument)
+
+
+def get_latex_inclusion_command_name(extension):
+    """Returns the name (without backslash) of the latex command that includes either a python file
+    or a compiled jupiter notebook pdf.
+
+    :param extension: The file extension of the file that is sought in the appendix line. Either ".py" or ".ipynb".
+    """
+    if extension == ".py":
+        return "pythonexternal"
+    elif extension == ".ipynb":
+        return "includepdf"
+
+
+def get_latex_highlighted_inclusion_command(fragment_filepath, code_filepath):
+    """Creates and returns a latex command that includes the pre-highlighted fragment of a python file.
+    The \\pythonhighlighted command falls back to \\pythonexternal if the fragment does not exist.
+
+    :param fragment_filepath: Relative path towards the highlighted .tex fragment of the python file.
+    :param code_filepath: Relative path towards the python file.
+    """
+    return f"\\pythonhighlighted{{{fragment_filepath}}}{{{code_filepath}}}"
+
+
 def get_latex_inclusion_command(extension, latex_relative_filepath_to_codefile):
     """Creates and returns a latex command that includes either a python file or a compiled jupiter
     notebook pdf (whereever the command is placed). The command is intended to be placed in the appendix.
@@ -538,7 +765,14 @@ def get_code_files_not_yet_included_in_appendices(
 
 
 def create_appendices_with_code(
-    appendix_dir, code_filepaths, extension, project_nr, root_dir
+    appendix_dir,
+    code_filepaths,
+    extension,
+    project_nr,
+    root_dir,
+    appendix_index=None,
+    use_code_fragments=False,
+    build_root=None,
 ):
     """Creates the latex appendix files in with relevant codes included.
 
@@ -548,10 +782,16 @@ def create_appendices_with_code(
     :param extension: The file extension of the file that is sought in the appendix line. Either ".py" or ".pdf".
     :param project_nr: The number  indicating which project this code pertains to.
     :param root_dir: The root directory of this repository.
+    :param appendix_index: (Default value = None) Appendix_index of the appendix_dir, the created appendices are added to it.
+    :param use_code_fragments: (Default value = False) Include python code through its fragment in
+    latex/projectN/Highlighted_code/, which contains the pre-highlighted or chunked listing of the code.
+    :param build_root: (Default value = None) Either "root" or "project" to only include the code with the
+    path as seen from that directory, both are included in the branches of an \\IfFileExists otherwise.
     """
     appendix_filenames = []
     appendix_reference_index = (
-        get_index_of_auto_generated_appendices(appendix_dir, extension) + 1
+        get_index_of_auto_generated_appendices(appendix_dir, extension, appendix_index)
+        + 1
     )
 
     for code_filepath in code_filepaths:
@@ -571,15 +811,18 @@ def create_appendices_with_code(
             latex_relative_filepath,
             project_nr,
             root_dir,
+            use_code_fragments,
+            build_root,
         )
 
-        print(f"content={content}")
+        logger.debug("content=%s", content)
 
-        overwrite_content_to_file(
-            content,
-            f"{appendix_dir}Auto_generated_{extension[1:]}_App{appendix_reference_index}.tex",
-            False,
-        )
+        appendix_filepath = f"{appendix_dir}Auto_generated_{extension[1:]}_App{appendix_reference_index}.tex"
+        overwrite_content_to_file(content, appendix_filepath, False)
+        if not appendix_index is None:
+            appendix_index.add_appendix(
+                appendix_filepath, list(map(lambda line: line + "\n", content))
+            )
         appendix_filenames.append(
             f"Auto_generated_{extension[1:]}_App{appendix_reference_index}.tex"
         )
@@ -595,6 +838,8 @@ def add_include_code_in_appendix(
     latex_relative_filepath,
     project_nr,
     root_dir,
+    use_code_fragments=False,
+    build_root=None,
 ):
     """Includes the latex code that includes code in the script.
 
@@ -603,36 +848,144 @@ def add_include_code_in_appendix(
     :param extension: The file extension of the file that is sought in the appendix line. Either ".py" or ".pdf".
     :param latex_relative_filepath_to_codefile: The latex compilation requires a relative path towards code files
     that are included. Therefore, a relative path towards the code is given.
+    :param use_code_fragments: (Default value = False) Include python code through its fragment in
+    latex/projectN/Highlighted_code/, which contains the pre-highlighted or chunked listing of the code.
+    :param build_root: (Default value = None) Either "root" or "project" to only include the code with the
+    path as seen from that directory, both are included in the branches of an \\IfFileExists otherwise.
     """
-    print(f"before={content}")
+    if use_code_fragments and extension == ".py":
+        fragment_path = get_fragment_path(code_filepath, root_dir)
+        root_inclusion = get_latex_highlighted_inclusion_command(
+            f"latex/project{project_nr}/{fragment_path}", latex_relative_filepath
+        )
+        project_inclusion = get_latex_highlighted_inclusion_command(
+            fragment_path, code_path_from_latex_main_path
+        )
+    else:
+        root_inclusion = get_latex_inclusion_command(extension, latex_relative_filepath)
+        project_inclusion = get_latex_inclusion_command(
+            extension, code_path_from_latex_main_path
+        )
+    if build_root == "root":
+        content.append(root_inclusion)
+        return content
+    if build_root == "project":
+        content.append(project_inclusion)
+        return content
     # TODO: append if exists}
     content.append(
         f"\IfFileExists{{latex/project{project_nr}/../../{code_filepath[len(root_dir):]}}}{{"
     )
     # append current line
-    content.append(get_latex_inclusion_command(extension, latex_relative_filepath))
+    content.append(root_inclusion)
     # TODO: append {}
     content.append(f"}}{{")
     # TODO: code_path_from latex line
-    content.append(
-        get_latex_inclusion_command(extension, code_path_from_latex_main_path)
-    )
+    content.append(project_inclusion)
     # TODO: add closing bracket }
     content.append(f"}}")
-    print(f"after={content}")
     return content
 
 
-def get_index_of_auto_generated_appendices(appendix_dir, extension):
+def rewrite_code_inclusions_of_appendices(
+    included_code_files,
+    project_nr,
+    root_dir,
+    appendix_index,
+    build_root=None,
+    use_code_fragments=False,
+):
+    """Rewrites the latex code that includes the code in the auto generated appendices, such that it uses
+    the paths of the build root and the code fragments if they are used, and updates the appendix index.
+    The section header of each appendix is kept. Returns the list of rewritten appendices.
+
+    :param included_code_files: Dictionary from absolute code filepath to absolute appendix filepath.
+    :param project_nr: The number indicating which project this code pertains to.
+    :param root_dir: The root directory of this repository.
+    :param appendix_index: Appendix_index of the appendix directory of this project.
+    :param build_root: (Default value = None) Either "root" or "project" to only include the code with the
+    path as seen from that directory, both are included in the branches of an \\IfFileExists otherwise.
+    :param use_code_fragments: (Default value = False) Include python code through its fragment in
+    latex/projectN/Highlighted_code/, which contains the pre-highlighted or chunked listing of the code.
+    """
+    rewritten_appendix_filepaths = []
+    # the index may spell the path of an appendix differently than the manifest
+    indexed_filepaths = {
+        get_filename_from_dir(filepath): filepath
+        for filepath in appendix_index.get_appendix_filepaths()
+    }
+    for code_filepath, appendix_filepath in included_code_files.items():
+        if not is_auto_generated_appendix(appendix_filepath):
+            continue
+        appendix_filepath = indexed_filepaths.get(
+            get_filename_from_dir(appendix_filepath), appendix_filepath
+        )
+        appendix_content = read_file(appendix_filepath)
+        extension = ".py" if code_filepath.endswith(".py") else ".ipynb"
+        content = add_include_code_in_appendix(
+            [appendix_content[0].rstrip("\n")],
+            code_filepath,
+            f"../../{code_filepath[len(root_dir):]}",
+            extension,
+            f"latex/project{project_nr}/../../{code_filepath[len(root_dir):]}",
+            project_nr,
+            root_dir,
+            use_code_fragments,
+            build_root,
+        )
+        if overwrite_content_to_file(content, appendix_filepath, False):
+            appendix_index.remove_appendix(appendix_filepath)
+            appendix_index.add_appendix(
+                appendix_filepath, list(map(lambda line: line + "\n", content))
+            )
+            rewritten_appendix_filepaths.append(appendix_filepath)
+    return rewritten_appendix_filepaths
+
+
+def deactivate_orphaned_appendices(
+    appendix_index, base_dirs, delete_auto_generated_appendices=True
+):
+    """Removes the appendices that include a python file or notebook pdf that no longer exists from
+    the appendix index, such that they are not included in the main tex file. Auto generated orphaned
+    appendices are also deleted from disk. Returns the list of filepaths of the orphaned appendices.
+
+    :param appendix_index: Appendix_index of the appendix directory of this project.
+    :param base_dirs: List of directories (ending in a slash) relative to which the latex inclusion
+    paths are resolved, e.g. the root directory of this repository and the latex directory of this project.
+    :param delete_auto_generated_appendices: (Default value = True) Delete the orphaned auto generated appendices.
+    """
+    orphaned_appendix_filepaths = appendix_index.get_orphaned_appendix_filepaths(base_dirs)
+    for appendix_filepath in orphaned_appendix_filepaths:
+        appendix_index.remove_appendix(appendix_filepath)
+        if delete_auto_generated_appendices and is_auto_generated_appendix(
+            appendix_filepath
+        ):
+            logger.info("Deleting orphaned appendix: %s", appendix_filepath)
+            os.remove(appendix_filepath)
+        else:
+            logger.warning("Leaving out orphaned appendix: %s", appendix_filepath)
+    return orphaned_appendix_filepaths
+
+
+def is_auto_generated_appendix(appendix_filepath):
+    """Returns True if an appendix file was generated by export_code_to_latex.
+
+    :param appendix_filepath: Path to an appendix .tex file.
+    """
+    return get_filename_from_dir(appendix_filepath).startswith("Auto_generated_")
+
+
+def get_index_of_auto_generated_appendices(appendix_dir, extension, appendix_index=None):
     """Returns the maximum index of auto generated appendices of
     a specific extension type.
 
     :param extension: The file extension of the file that is sought in the appendix line. Either ".py" or ".pdf".
     :param appendix_dir: Absolute path that contains the appendix .tex files.
+    :param appendix_index: (Default value = None) Appendix_index of the appendix_dir, the directory is listed if it is not given.
     """
     max_index = -1
     appendices = get_auto_generated_appendix_filenames_of_specific_extension(
-        appendix_dir, extension
+        appendix_dir, extension, appendix_index
     )
     for appendix in appendices:
         substring = f"Auto_generated_{extension[1:]}_App"
@@ -646,18 +999,23 @@ def get_index_of_auto_generated_appendices(appendix_dir, extension):
 
 
 def get_auto_generated_appendix_filenames_of_specific_extension(
-    appendix_dir, extension
+    appendix_dir, extension, appendix_index=None, file_discovery=None
 ):
     """Returns the list of auto generated appendices of
     a specific extension type.
 
     :param extension: The file extension of the file that is sought in the appendix line. Either ".py" or ".pdf".
     :param appendix_dir: Absolute path that contains the appendix .tex files.
+    :param appendix_index: (Default value = None) Appendix_index of the appendix_dir, the directory is listed if it is not given.
+    :param file_discovery: (Default value = None) File_discovery that caches the directory listings of this run.
     """
     appendices_of_extension_type = []
 
     # get all appendices
-    appendix_files = get_filenames_in_dir(".tex", appendix_dir)
+    if appendix_index is None:
+        appendix_files = get_filenames_in_dir(".tex", appendix_dir, None, file_discovery)
+    else:
+        appendix_files = appendix_index.get_appendix_filepaths()
 
     # get appendices of particular extention type
     for appendix_filepath in appendix_files:
@@ -690,18 +1048,19 @@ def create_section(appendix_reference_index, code_filename, content):
 
 def overwrite_content_to_file(content, filepath, content_has_newlines=True):
     """Writes a list of lines of tex code from the content argument to a .tex file
-    using overwriting method. The content has one line per element.
+    using overwriting method. The content has one line per element. The file is only
+    written if its content changes, and is replaced atomically. Returns True if the file
+    was written.
 
     :param content: The content that is being written to file.
     :param filepath: Path towards the file that is being read.
     :param content_has_newlines:  (Default value = True)
     """
-    with open(filepath, "w") as f:
-        for line in content:
-            if content_has_newlines:
-                f.write(line)
-            else:
-                f.write(line + "\n")
+    if content_has_newlines:
+        text = "".join(content)
+    else:
+        text = "".join(map(lambda line: line + "\n", content))
+    return write_file_if_changed(text, filepath)
 
 
 def get_appendix_tex_code(main_latex_filename):
@@ -714,6 +1073,17 @@ def get_appendix_tex_code(main_latex_filename):
     end = "\end{appendices}"
     start_index = get_index_of_substring_in_list(main_tex_code, start) + 1
     end_index = get_index_of_substring_in_list(main_tex_code, end)
+
+    # Code left of the end command (e.g. the brace that closes an \IfFileExists) belongs to the appendix code.
+    end_line = main_tex_code[end_index]
+    left_of_end = end_line[: end_line.index(end)]
+    if left_of_end.strip() != "":
+        main_tex_code = (
+            main_tex_code[:end_index]
+            + [left_of_end + "\n", end_line[len(left_of_end) :]]
+            + main_tex_code[end_index + 1 :]
+        )
+        end_index = end_index + 1
     return main_tex_code, start_index, end_index, main_tex_code[start_index:end_index]
 
 
@@ -763,7 +1133,6 @@ def substitute_appendix_code(
         + updated_appendices_tex_code
         + main_tex_code[end_index:]
     )
-    print(f"start_index={start_index}")
     return updated_main_tex_code
 
 
@@ -775,6 +1144,15 @@ def get_filename_from_dir(path):
     return path[path.rfind("/") + 1 :]
 
 
+def get_root_dir(script_dir):
+    """Returns the root directory of this repository, ending in a slash (or an empty string if the
+    script directory is relative to the root directory).
+
+    :param script_dir: absolute path of the src directory of some project.
+    """
+    return script_dir[0 : script_dir.rfind("code/project")]
+
+
 def get_script_dir():
     """returns the directory of this script regardles of from which level the code is executed"""
     return os.path.dirname(__file__)
@@ -782,38 +1160,170 @@ def get_script_dir():
 
 class Appendix_with_code:
     """stores in which appendix file and accompanying line number in the appendix in which a code file is
-    already included. Does not take into account whether this appendix is in the main tex file or not
+    already included. Does not take into account whether this appendix is in the main tex file or not.
+    The content of the appendix is not stored, it is read from the appendix file when it is requested.
     """
 
-    def __init__(
-        self,
-        code_filepath,
-        appendix_filepath,
-        appendix_content,
-        file_line_nr,
-        extension,
-    ):
+    __slots__ = ("code_filepath", "appendix_filepath", "file_line_nr", "extension")
+
+    def __init__(self, code_filepath, appendix_filepath, file_line_nr, extension):
         self.code_filepath = code_filepath
         self.appendix_filepath = appendix_filepath
-        self.appendix_content = appendix_content
         self.file_line_nr = file_line_nr
         self.extension = extension
 
+    @property
+    def appendix_content(self):
+        """Returns the content of the appendix file, with one string per line."""
+        return read_file(self.appendix_filepath)
+
 
 class Appendix:
-    """stores in appendix files and type of appendix."""
+    """stores in appendix files and type of appendix. The content of the appendix is not stored, it is
+    read from the appendix file when it is requested."""
+
+    __slots__ = (
+        "appendix_filepath",
+        "appendix_filename",
+        "appendix_type",
+        "code_filename",
+        "appendix_inclusion_line_nr",
+    )
 
     def __init__(
         self,
         appendix_filepath,
-        appendix_content,
         appendix_type,
         code_filename=None,
-        appendix_inclusion_line=None,
+        appendix_inclusion_line_nr=None,
     ):
         self.appendix_filepath = appendix_filepath
         self.appendix_filename = get_filename_from_dir(self.appendix_filepath)
-        self.appendix_content = appendix_content
         self.appendix_type = appendix_type  # TODO: perform validation of input values
         self.code_filename = code_filename
-        self.appendix_inclusion_line = appendix_inclusion_line
+        self.appendix_inclusion_line_nr = appendix_inclusion_line_nr
+
+    @property
+    def appendix_content(self):
+        """Returns the content of the appendix file, with one string per line."""
+        return read_file(self.appendix_filepath)
+
+    @property
+    def appendix_inclusion_line(self):
+        """Returns the line of the appendix file that includes the code, or None for appendices without code."""
+        if self.appendix_inclusion_line_nr is None:
+            return None
+        return self.appendix_content[self.appendix_inclusion_line_nr]
+
+
+class Appendix_index:
+    """Parses every appendix .tex file of a project once, and stores the Appendix objects per
+    appendix type together with the (uncommented) latex commands that include code files. All the
+    appendix lookups of a single export run are answered from this index instead of re-reading the
+    appendix files. The contents of the appendices are not kept, only the parsed records.
+    """
+
+    def __init__(self, appendix_dir, appendix_filepaths=None, file_discovery=None):
+        self.appendix_dir = appendix_dir
+        self.appendices = []
+        self.appendices_by_type = {"no_code": [], "python": [], "notebook": []}
+        self.appendix_filepaths = []
+        self.inclusions = {}
+        if appendix_filepaths is None:
+            appendix_filepaths = get_filenames_in_dir(
+                ".tex", appendix_dir, None, file_discovery
+            )
+        for appendix_filepath in appendix_filepaths:
+            self.add_appendix(appendix_filepath, read_file(appendix_filepath))
+
+    def add_appendix(self, appendix_filepath, appendix_filecontent):
+        """Parses a single appendix and adds it to the index.
+
+        :param appendix_filepath: Absolute path to the appendix .tex file.
+        :param appendix_filecontent: Content of the appendix file, with one string per line.
+        """
+        self.appendix_filepaths.append(appendix_filepath)
+        latex_commands = tokenize_latex(
+            appendix_filecontent, ["pythonexternal", "pythonhighlighted", "includepdf"]
+        )
+        for appendix in parse_appendix(
+            appendix_filepath, appendix_filecontent, latex_commands
+        ):
+            self.appendices.append(appendix)
+            self.appendices_by_type[appendix.appendix_type].append(appendix)
+        for latex_command in latex_commands:
+            self.inclusions.setdefault(get_code_inclusion(latex_command), []).append(
+                (appendix_filepath, latex_command.line_nr)
+            )
+
+    def get_inclusions(self, command_name, included_filepath):
+        """Returns the list of (appendix filepath, line number) tuples of the appendices that
+        include the incoming file uncommented with the incoming latex command.
+
+        :param command_name: Name of the latex command without backslash, e.g. "pythonexternal".
+        :param included_filepath: The path to the included file as it is written in the latex command.
+        """
+        return self.inclusions.get((command_name, included_filepath), [])
+
+    def get_orphaned_appendix_filepaths(self, base_dirs):
+        """Returns the filepaths of the appendices that include python files or notebook pdfs, of which
+        none of the included files exist.
+
+        :param base_dirs: List of directories (ending in a slash) relative to which the latex inclusion paths are resolved.
+        """
+        included_filepaths_per_appendix = {}
+        for (command_name, included_filepath), inclusions in self.inclusions.items():
+            for appendix_filepath, line_nr in inclusions:
+                included_filepaths_per_appendix.setdefault(appendix_filepath, set()).add(
+                    included_filepath
+                )
+        orphaned_appendix_filepaths = []
+        for appendix_filepath in self.appendix_filepaths:
+            included_filepaths = included_filepaths_per_appendix.get(appendix_filepath)
+            if included_filepaths is None:
+                continue
+            if not any(
+                os.path.isfile(f"{base_dir}{included_filepath}")
+                for included_filepath in included_filepaths
+                for base_dir in base_dirs
+            ):
+                orphaned_appendix_filepaths.append(appendix_filepath)
+        return orphaned_appendix_filepaths
+
+    def remove_appendix(self, appendix_filepath):
+        """Removes an appendix from the index.
+
+        :param appendix_filepath: Absolute path to the appendix .tex file.
+        """
+        if appendix_filepath in self.appendix_filepaths:
+            self.appendix_filepaths.remove(appendix_filepath)
+        self.appendices = [
+            appendix
+            for appendix in self.appendices
+            if appendix.appendix_filepath != appendix_filepath
+        ]
+        for appendix_type, appendices in self.appendices_by_type.items():
+            self.appendices_by_type[appendix_type] = [
+                appendix
+                for appendix in appendices
+                if appendix.appendix_filepath != appendix_filepath
+            ]
+        for key, inclusions in list(self.inclusions.items()):
+            inclusions = [
+                inclusion for inclusion in inclusions if inclusion[0] != appendix_filepath
+            ]
+            if inclusions:
+                self.inclusions[key] = inclusions
+            else:
+                del self.inclusions[key]
+
+    def get_appendix_filepaths(self):
+        """Returns the absolute paths of all indexed appendix files."""
+        return list(self.appendix_filepaths)
+
+    def get_appendices_of_type(self, appendix_type):
+        """Returns the list of Appendix objects of a certain appendix type.
+
+        :param appendix_type: Can consist of "no_code", "python", or "notebook" and indicates different appendix types
+        """
+        return list(self.appendices_by_type[appendix_type])
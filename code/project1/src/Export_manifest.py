@@ -0,0 +1,181 @@
+# stores which code files and appendices the last export of a project saw
+import json
+import os
+
+from .Write_files import write_file_if_changed
+
+
+class Export_manifest:
+    """Persistent record of the code files, compiled notebook pdfs, appendix files and main latex file
+    that were seen in the last export_code_to_latex run of a project, together with the appendix in
+    which each code file is included and the notebook pdfs that were out of date. Files are compared on
+    their modification time and size, such that an unchanged project can be recognised without reading
+    any file content.
+    """
+
+    version = 1
+
+    def __init__(self, manifest_filepath, root_dir, appendix_dir):
+        self.manifest_filepath = manifest_filepath
+        self.root_dir = root_dir
+        self.appendix_dir = appendix_dir
+        self.state = None
+        self.included_code_files = {}
+        self.stale_notebook_pdfs = []
+        self.load()
+
+    def load(self):
+        """Loads the manifest of the previous run, if it exists and is readable."""
+        try:
+            with open(self.manifest_filepath) as f:
+                manifest = json.load(f)
+        except (OSError, ValueError):
+            return
+        if manifest.get("version") == self.version:
+            self.state = manifest["state"]
+            self.included_code_files = manifest["included_code_files"]
+            self.stale_notebook_pdfs = manifest.get("stale_notebook_pdfs", [])
+
+    def create_state(
+        self,
+        code_filepaths,
+        appendix_filepaths,
+        path_to_main_latex_file,
+        options=None,
+        tracked_filepaths=None,
+    ):
+        """Returns the current state of the project as a dictionary of file fingerprints.
+
+        :param code_filepaths: List of absolute paths to the python files and compiled notebook pdfs.
+        :param appendix_filepaths: List of absolute paths to the appendix .tex files.
+        :param path_to_main_latex_file: Absolute path to the main latex file of the project.
+        :param options: (Default value = None) Dictionary of the export options that change the generated latex.
+        :param tracked_filepaths: (Default value = None) List of absolute paths to other files of which the
+        export depends, e.g. the notebooks of the compiled pdfs and the record of their conversions.
+        """
+        return {
+            "options": options or {},
+            "tracked_files": {
+                self.get_code_key(filepath): get_fingerprint(filepath)
+                for filepath in tracked_filepaths or []
+            },
+            "code_files": {
+                self.get_code_key(filepath): get_fingerprint(filepath)
+                for filepath in code_filepaths
+            },
+            "appendix_files": {
+                self.get_appendix_key(filepath): get_fingerprint(filepath)
+                for filepath in appendix_filepaths
+            },
+            "main_tex": get_fingerprint(path_to_main_latex_file),
+        }
+
+    def is_unchanged(self, state):
+        """Returns True if the incoming state equals the state of the previous run.
+
+        :param state: Dictionary of file fingerprints as returned by create_state.
+        """
+        return self.state == state
+
+    def option_changed(self, state, name):
+        """Returns True if an export option differs from the previous run, or if there was no previous run.
+
+        :param state: Dictionary of file fingerprints as returned by create_state.
+        :param name: Name of the export option.
+        """
+        return self.state is None or self.state["options"].get(name) != state["options"].get(name)
+
+    def appendices_are_unchanged(self, state):
+        """Returns True if no appendix file was added, removed or modified since the previous run.
+
+        :param state: Dictionary of file fingerprints as returned by create_state.
+        """
+        return (
+            self.state is not None
+            and self.state["appendix_files"] == state["appendix_files"]
+        )
+
+    def get_code_files_not_yet_included(self, code_filepaths):
+        """Returns the code files for which the previous run did not record an appendix, which are
+        exactly the code files that need a new appendix if the appendices are unchanged.
+
+        :param code_filepaths: List of absolute paths to the python files or compiled notebook pdfs.
+        """
+        return [
+            filepath
+            for filepath in code_filepaths
+            if not self.get_code_key(filepath) in self.included_code_files
+        ]
+
+    def get_included_code_files(self, code_filepaths):
+        """Returns a dictionary from absolute code filepath to absolute appendix filepath for the
+        incoming code files that the previous run recorded as included in an appendix.
+
+        :param code_filepaths: List of absolute paths to the python files or compiled notebook pdfs.
+        """
+        included_code_files = {}
+        for filepath in code_filepaths:
+            appendix_filename = self.included_code_files.get(self.get_code_key(filepath))
+            if not appendix_filename is None:
+                included_code_files[filepath] = f"{self.appendix_dir}{appendix_filename}"
+        return included_code_files
+
+    def get_stale_notebook_pdfs(self):
+        """Returns the absolute paths of the notebook pdfs that were out of date in the previous run."""
+        return [f"{self.root_dir}{key}" for key in self.stale_notebook_pdfs]
+
+    def save(self, state, included_code_files, stale_notebook_pdf_filepaths=None):
+        """Stores the state of this run together with the appendix of every included code file.
+
+        :param state: Dictionary of file fingerprints as returned by create_state.
+        :param included_code_files: Dictionary from absolute code filepath to absolute appendix filepath.
+        :param stale_notebook_pdf_filepaths: (Default value = None) List of absolute paths to the notebook
+        pdfs that are out of date, such that an unchanged project reports them without checking them again.
+        """
+        self.state = state
+        self.included_code_files = {
+            self.get_code_key(code_filepath): self.get_appendix_key(appendix_filepath)
+            for code_filepath, appendix_filepath in included_code_files.items()
+        }
+        self.stale_notebook_pdfs = [
+            self.get_code_key(filepath) for filepath in stale_notebook_pdf_filepaths or []
+        ]
+        write_file_if_changed(
+            json.dumps(
+                {
+                    "version": self.version,
+                    "state": self.state,
+                    "included_code_files": self.included_code_files,
+                    "stale_notebook_pdfs": self.stale_notebook_pdfs,
+                },
+                indent=1,
+                sort_keys=True,
+            ),
+            self.manifest_filepath,
+        )
+
+    def get_code_key(self, code_filepath):
+        """Returns the path of a code file relative to the root directory of this repository.
+
+        :param code_filepath: Absolute path to a python file or compiled notebook pdf.
+        """
+        return code_filepath[len(self.root_dir) :]
+
+    def get_appendix_key(self, appendix_filepath):
+        """Returns the filename of an appendix file.
+
+        :param appendix_filepath: Absolute path to an appendix .tex file.
+        """
+        return os.path.basename(appendix_filepath)
+
+
+def get_fingerprint(filepath):
+    """Returns the modification time in nanoseconds and the size of a file, or None if the file does not exist.
+
+    :param filepath: Path towards the file that is being fingerprinted.
+    """
+    try:
+        stat_result = os.stat(filepath)
+    except OSError:
+        return None
+    return [stat_result.st_mtime_ns, stat_result.st_size]
@@ -0,0 +1,176 @@
+# pre-renders syntax highlighted latex of python files, such that pdflatex does not highlight them
+import ast
+import bisect
+import hashlib
+import os
+
+from pygments import highlight
+from pygments.formatters import LatexFormatter
+from pygments.lexers import PythonLexer
+
+from .Write_files import read_text_if_exists, write_file_if_changed
+
+# Name of the directory in latex/projectN/ that contains the highlighted code fragments.
+highlighted_code_dirname = "Highlighted_code"
+
+
+def highlight_code_file(
+    code_filepath, fragment_filepath, highlight_code=True, max_lines_per_chunk=None
+):
+    """Writes the latex fragment of a python file, unless the fragment already contains the code of the
+    current content of the python file. The fragment starts with the sha256 hash of the python file, such
+    that an unchanged file is recognised by reading a single line. Returns True if the fragment was written.
+
+    Large files are split into chunks of at most max_lines_per_chunk lines, preferably at the start of top
+    level functions, classes and methods. When the code is highlighted, every chunk is preceded by the hash
+    of its code, and the rendered chunks of the previous fragment are reused, such that editing one function
+    only re-highlights its chunk. Without highlighting a chunk is a single \\pythonexternal line of which
+    the line range shifts with every edit above it, so those chunks are not cached.
+
+    :param code_filepath: Absolute path to the python file.
+    :param fragment_filepath: Absolute path to the .tex fragment that is (re)written.
+    :param highlight_code: (Default value = True) Highlight the code with Pygments, instead of including
+    line ranges of the python file with \\pythonexternal.
+    :param max_lines_per_chunk: (Default value = None) Maximum number of lines per chunk, the file is a
+    single chunk if it is not given.
+    """
+    with open(code_filepath, "rb") as f:
+        code = f.read()
+    mode = "highlighted" if highlight_code else "listings"
+    header = f"% sha256 {hashlib.sha256(code).hexdigest()} {mode} {max_lines_per_chunk}\n"
+    if read_first_line(fragment_filepath) == header:
+        return False
+
+    code = code.decode("utf-8", "replace")
+    fragment = [header]
+    chunks = get_code_chunks(code, max_lines_per_chunk)
+    if highlight_code:
+        rendered_chunks = get_rendered_chunks(read_text_if_exists(fragment_filepath))
+        fragment.append(render_style_definitions())
+        lines = code.splitlines(True)
+        for first_line, last_line in chunks:
+            chunk = "".join(lines[first_line - 1 : last_line])
+            chunk_hash = hashlib.sha256(chunk.encode("utf-8")).hexdigest()
+            if not chunk_hash in rendered_chunks:
+                rendered_chunks[chunk_hash] = render_highlighted_code(chunk)
+            fragment.append(f"% chunk {chunk_hash}\n")
+            fragment.append(rendered_chunks[chunk_hash])
+    else:
+        for first_line, last_line in chunks:
+            fragment.append(render_listing(first_line, last_line))
+    os.makedirs(os.path.dirname(fragment_filepath), exist_ok=True)
+    return write_file_if_changed("".join(fragment), fragment_filepath)
+
+
+def read_first_line(filepath):
+    """Returns the first line of a file including its newline, or None if the file can not be read.
+
+    :param filepath: Path towards the file that is being read.
+    """
+    try:
+        with open(filepath) as f:
+            return f.readline()
+    except (OSError, UnicodeDecodeError):
+        return None
+
+
+def render_style_definitions():
+    """Returns the definitions of the highlighting commands, which are only made once per document.
+    Requires \\usepackage{fancyvrb} and \\usepackage{color} in the preamble.
+    """
+    return (
+        "\\ifdefined\\PYhighlightingstyle\\else\\def\\PYhighlightingstyle{}\n"
+        + LatexFormatter().get_style_defs()
+        + "\n\\fi\n"
+    )
+
+
+def render_highlighted_code(code):
+    """Returns the syntax highlighted latex code of python code as a Verbatim environment.
+
+    :param code: The python code that is highlighted.
+    """
+    return highlight(code, PythonLexer(), LatexFormatter())
+
+
+def render_listing(first_line, last_line):
+    """Returns the latex code that lets the listings package include a line range of the python file
+    of which the path is stored in \\pythoncodepath by \\pythonhighlighted.
+
+    :param first_line: First line of the range, starting at 1.
+    :param last_line: Last line of the range, inclusive.
+    """
+    return f"\\pythonexternal[firstline={first_line},lastline={last_line}]{{\\pythoncodepath}}\n"
+
+
+def get_rendered_chunks(fragment):
+    """Returns a dictionary from chunk hash to rendered chunk, for the chunks in a previously written fragment.
+
+    :param fragment: Content of the previously written fragment, or None if there is none.
+    """
+    rendered_chunks = {}
+    if fragment is None:
+        return rendered_chunks
+    for part in fragment.split("\n% chunk ")[1:]:
+        chunk_hash, _, rendered_chunk = part.partition("\n")
+        rendered_chunks[chunk_hash] = rendered_chunk.rstrip("\n") + "\n"
+    return rendered_chunks
+
+
+def get_code_chunks(code, max_lines_per_chunk=None):
+    """Returns the list of (first line, last line) ranges, starting at line 1, in which python code is split.
+    The chunks contain at most max_lines_per_chunk lines, and end right before the start of a top level
+    statement or a statement in a top level class, if such a statement exists in the chunk.
+
+    :param code: The python code that is split.
+    :param max_lines_per_chunk: (Default value = None) Maximum number of lines per chunk, the code is a
+    single chunk if it is not given.
+    """
+    number_of_lines = len(code.splitlines())
+    if max_lines_per_chunk is None or number_of_lines <= max_lines_per_chunk:
+        return [(1, max(number_of_lines, 1))]
+    definition_lines = get_definition_start_lines(code)
+    chunks = []
+    first_line = 1
+    while number_of_lines - first_line + 1 > max_lines_per_chunk:
+        # the next chunk starts at a definition in (first_line, first_line + max_lines_per_chunk]
+        limit = first_line + max_lines_per_chunk
+        index = bisect.bisect_right(definition_lines, limit) - 1
+        if index >= 0 and definition_lines[index] > first_line:
+            next_first_line = definition_lines[index]
+        else:
+            next_first_line = limit
+        chunks.append((first_line, next_first_line - 1))
+        first_line = next_first_line
+    chunks.append((first_line, number_of_lines))
+    return chunks
+
+
+def get_definition_start_lines(code):
+    """Returns the sorted line numbers at which top level statements and the statements in top level
+    classes start (including their decorators). Returns an empty list if the code is not valid python.
+
+    :param code: The python code that is parsed.
+    """
+    try:
+        module = ast.parse(code)
+    except (SyntaxError, ValueError):
+        return []
+    nodes = list(module.body)
+    for node in module.body:
+        if isinstance(node, ast.ClassDef):
+            nodes.extend(node.body)
+    start_lines = set()
+    for node in nodes:
+        decorators = getattr(node, "decorator_list", [])
+        start_lines.add(min([node.lineno] + [decorator.lineno for decorator in decorators]))
+    return sorted(start_lines)
+
+
+def get_fragment_path(code_filepath, root_dir):
+    """Returns the path of the highlighted fragment of a python file, relative to latex/projectN/.
+
+    :param code_filepath: Absolute path to the python file.
+    :param root_dir: The root directory of this repository.
+    """
+    return f"{highlighted_code_dirname}/{code_filepath[len(root_dir):]}.tex"
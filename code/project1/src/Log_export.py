@@ -0,0 +1,70 @@
+# logs the progress and the duration of the phases of an export
+import logging
+import time
+
+logger = logging.getLogger(__name__)
+
+
+class Phase_timer:
+    """Measures the duration of consecutive phases (e.g. discover, index, create, order and write) of a
+    single run. Starting a phase ends the previous one, each ended phase is logged at DEBUG level and
+    stopping the timer logs a summary of all phases at INFO level.
+    """
+
+    def __init__(self, name, phase_logger=None):
+        self.name = name
+        self.logger = logger if phase_logger is None else phase_logger
+        self.durations = {}
+        self.phase = None
+        self.phase_start_time = None
+        self.start_time = time.perf_counter()
+
+    def start_phase(self, phase):
+        """Ends the current phase (if any) and starts the next one.
+
+        :param phase: Name of the phase that is started.
+        """
+        self.end_phase()
+        self.phase = phase
+        self.phase_start_time = time.perf_counter()
+
+    def end_phase(self):
+        """Ends the current phase and logs its duration."""
+        if self.phase is None:
+            return
+        duration = time.perf_counter() - self.phase_start_time
+        self.durations[self.phase] = self.durations.get(self.phase, 0.0) + duration
+        self.logger.debug("%s: %s took %.1f ms", self.name, self.phase, duration * 1000)
+        self.phase = None
+
+    def stop(self, message="done"):
+        """Ends the current phase and logs the total duration together with the duration of each phase.
+        Returns the dictionary from phase name to duration in seconds.
+
+        :param message: (Default value = "done") Short description of the outcome of the run.
+        """
+        self.end_phase()
+        total_duration = time.perf_counter() - self.start_time
+        self.logger.info(
+            "%s: %s in %.1f ms (%s)",
+            self.name,
+            message,
+            total_duration * 1000,
+            ", ".join(
+                f"{phase} {duration * 1000:.1f} ms"
+                for phase, duration in self.durations.items()
+            ),
+        )
+        return dict(self.durations)
+
+
+def configure_logging(verbosity=0):
+    """Shows the log messages of the exporter on stderr. Without configuration only warnings and
+    errors are shown, verbosity 1 also shows the summary of each run and verbosity 2 and higher also
+    show the duration of each phase and the generated latex code.
+
+    :param verbosity: (Default value = 0) Number of -v flags given on the command line.
+    """
+    level = [logging.WARNING, logging.INFO][verbosity] if verbosity < 2 else logging.DEBUG
+    logging.basicConfig(format="%(levelname)s %(name)s: %(message)s")
+    logging.getLogger(__name__.rpartition(".")[0] or __name__).setLevel(level)
@@ -1,5 +1,7 @@
 # Example code that creates plots directly in report
 # Code is an implementation of a genetic algorithm
+import logging
+import os
 import random
 from matplotlib import pyplot as plt
 from matplotlib import lines
@@ -7,9 +9,16 @@ import matplotlib.pyplot as plt
 import numpy as np
 
 from .Compile_latex import Compile_latex
+from .Compile_all_projects import compile_all
 from .Plot_to_tex import Plot_to_tex as plt_tex
 from .Run_jupyter_notebooks import Run_jupyter_notebook
 from .Export_code_to_latex import export_code_to_latex
+from .Export_all_projects import export_code_of_projects
+from .Optimize_images import Image_optimizer
+from .Render_plots import Plot_spec, render_plots
+from .Track_notebook_pdfs import Notebook_pdf_tracker, get_pdf_filepath
+
+logger = logging.getLogger(__name__)
 
 # define global variables for genetic algorithm example
 string_length = 100
@@ -30,19 +39,50 @@ class Main:
         for notebook_name in notebook_names:
             self.run_jupyter_notebook.run_notebook(f'{notebook_path}{notebook_name}')
     
-    def convert_notebooks_to_pdf(self,project_nr,notebook_names):
-        '''converts a jupyter notebook to pdf'''
+    def convert_notebooks_to_pdf(self,project_nr,notebook_names,force=False):
+        '''converts the jupyter notebooks of which the pdf is missing or out of date (or all if force is True) to pdf'''
         notebook_path = f'code/project{project_nr}/src/'
+        tracker = Notebook_pdf_tracker(notebook_path)
         
         for notebook_name in notebook_names:
-            self.run_jupyter_notebook.convert_notebook_to_pdf(f'{notebook_path}{notebook_name}')
-
-    def export_code_to_latex(self, project_nr):
-        export_code_to_latex('main.tex', project_nr)
+            notebook_filepath = f'{notebook_path}{notebook_name}'
+            if force or tracker.is_stale(notebook_filepath):
+                exit_status = self.run_jupyter_notebook.convert_notebook_to_pdf(notebook_filepath)
+                if exit_status == 0 and os.path.isfile(get_pdf_filepath(notebook_filepath)):
+                    tracker.record_conversion(notebook_filepath)
+        tracker.save()
+
+    def export_code_to_latex(self, project_nr,highlight_code=False,max_listing_lines=None,build_root=None,stale_notebook_pdfs='warn',
+            file_discovery=None,appendix_indices=None):
+        '''exports the code of a project into the appendices of its report, see export_code_to_latex for the options'''
+        export_code_to_latex('main.tex', project_nr,file_discovery,appendix_indices,highlight_code=highlight_code,
+            max_listing_lines=max_listing_lines,build_root=build_root,stale_notebook_pdfs=stale_notebook_pdfs)
+
+    def export_code_of_projects(self, project_nrs=None,highlight_code=False,max_listing_lines=None,build_root=None,stale_notebook_pdfs='warn'):
+        '''exports the code of multiple projects (all projects if project_nrs is None) in one run, see export_code_to_latex for the options'''
+        return export_code_of_projects(project_nrs,highlight_code=highlight_code,max_listing_lines=max_listing_lines,
+            build_root=build_root,stale_notebook_pdfs=stale_notebook_pdfs)
     
-    def compile_latex_report(self,project_nr):
-        '''compiles latex code to pdf'''
-        compile_latex =Compile_latex(project_nr ,'main.tex')
+    def optimize_images(self,project_nr,max_dpi=300):
+        '''recompresses the new or changed png images of the report losslessly and caps their resolution at max_dpi'''
+        results = Image_optimizer(f'latex/project{project_nr}/Images/',max_dpi).optimize_all()
+        for filename,(original_size,optimized_size) in results.items():
+            logger.info('Optimized %s from %d to %d bytes.',filename,original_size,optimized_size)
+        return results
+
+    def render_plots(self,plot_specs,max_workers=None):
+        '''renders a list of Plot_spec objects concurrently into the Images folders of the latex reports, returns a
+        dictionary from (project_nr, filename) to the exception that was raised while rendering it or None'''
+        return render_plots(plot_specs,max_workers)
+
+    def compile_latex_report(self,project_nr,use_format=False,preview=False):
+        '''compiles latex code to pdf, use_format loads the preamble from a precompiled format and preview only
+        typesets the changed chapters and appendices into main_preview.pdf, with placeholders for graphics'''
+        compile_latex =Compile_latex(project_nr ,'main.tex',use_format=use_format,preview=preview)
+
+    def compile_latex_reports(self,project_nrs=None,use_format=False,preview=False):
+        '''compiles the latex reports of multiple projects (all projects if project_nrs is None) concurrently'''
+        return compile_all(project_nrs,use_format=use_format,preview=preview)
     
     ################################################################
     ############example code to illustrate python-latex  image sync#########
@@ -100,7 +140,8 @@ class Main:
             results.append(max(results[-1], fitness))
         return results
 
-    def do4b(self,project_nr):
+    # plot_specs is an optional list to which the plot is added, to render it later together with other plots
+    def do4b(self,project_nr,plot_specs=None):
         optimum_found = 0
 
         # generate plot data
@@ -119,10 +160,13 @@ class Main:
 
         # plot multiple lines into report (res is an array of dataseries (representing the lines))
         # plt_tex.plotMultipleLines(plt_tex,x,y,"x-axis label","y-axis label",lineLabels,"filename",legend_position,project_nr)
-        plt_tex.plotMultipleLines(plt_tex,range(0, len(res)),plotResult,"[runs]]","fitness [%]",lineLabels,"4b",4,project_nr)
+        if plot_specs is None:
+            plt_tex.plotMultipleLines(plt_tex,range(0, len(res)),plotResult,"[runs]]","fitness [%]",lineLabels,"4b",4,project_nr)
+        else:
+            plot_specs.append(Plot_spec(range(0, len(res)),plotResult,"[runs]]","fitness [%]",lineLabels,"4b",4,project_nr))
         print("total optimum found: {} out of {} runs".format(optimum_found,10))
 
-    def do4c(self,project_nr):
+    def do4c(self,project_nr,plot_specs=None):
         optimum_found = 0
 
         # generate plot data
@@ -141,7 +185,10 @@ class Main:
 
         # plot multiple lines into report (res is an array of dataseries (representing the lines))
         # plt_tex.plotMultipleLines(plt_tex,x,y,"x-axis label","y-axis label",lineLabels,"filename",legend_position,project_nr)
-        plt_tex.plotMultipleLines(plt_tex,range(0, len(res)),plotResult,"[runs]]","fitness [%]",lineLabels,"4c",4,project_nr)
+        if plot_specs is None:
+            plt_tex.plotMultipleLines(plt_tex,range(0, len(res)),plotResult,"[runs]]","fitness [%]",lineLabels,"4c",4,project_nr)
+        else:
+            plot_specs.append(Plot_spec(range(0, len(res)),plotResult,"[runs]]","fitness [%]",lineLabels,"4c",4,project_nr))
         
         print("total optimum found: {} out of {} runs".format(optimum_found, 10))
         
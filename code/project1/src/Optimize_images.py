@@ -0,0 +1,154 @@
+# recompresses the png images of a report losslessly and caps their resolution at the print size
+import json
+import logging
+import os
+
+try:
+    from PIL import Image, ImageChops
+except ImportError:  # Pillow is installed together with matplotlib, without it the images are left as they are
+    Image = None
+
+from .Export_manifest import get_fingerprint
+from .Track_notebook_pdfs import get_file_hash
+from .Write_files import delete_file_if_exists, get_temporary_filepath, write_file_if_changed
+
+# Name of the file in latex/projectN/Images/ that records which images are optimized.
+optimized_images_filename = ".optimized_images.json"
+
+logger = logging.getLogger(__name__)
+
+
+class Image_optimizer:
+    """Optimizes the png images of a directory in place: fully opaque RGBA images become RGB, images with
+    at most 256 colours become palette images, and everything is saved with the strongest zlib
+    compression. These steps do not change a single pixel. Images that are wider than max_dpi at the
+    print width (e.g. 300 dpi at the width of an A4 text column) are scaled down to that width, with
+    the dpi of the image adjusted such that its printed size stays the same.
+
+    The hash of each optimized image is recorded, such that repeated runs skip images that are
+    unchanged since their optimization and only process new or regenerated images.
+    """
+
+    version = 1
+
+    def __init__(self, image_dir, max_dpi=300, print_width=6.5):
+        self.image_dir = image_dir
+        self.max_dpi = max_dpi
+        # width in inches at which the images are printed at most
+        self.print_width = print_width
+        self.record_filepath = os.path.join(image_dir, optimized_images_filename)
+        self.records = {}
+        try:
+            with open(self.record_filepath) as f:
+                records = json.load(f)
+            if records.get("version") == self.version:
+                self.records = records["images"]
+        except (OSError, ValueError):
+            pass
+
+    def optimize_all(self):
+        """Optimizes the png images of the directory that are new or changed since their last optimization,
+        and returns a dictionary from filename to (original size, optimized size) in bytes."""
+        results = {}
+        if Image is None:
+            logger.warning("Pillow is not installed, the images are not optimized.")
+            return results
+        for filename in sorted(os.listdir(self.image_dir)):
+            filepath = os.path.join(self.image_dir, filename)
+            if filename.lower().endswith(".png") and not self.is_optimized(filename):
+                original_size = os.path.getsize(filepath)
+                self.optimize(filepath)
+                self.records[filename] = {
+                    "fingerprint": get_fingerprint(filepath),
+                    "hash": get_file_hash(filepath),
+                }
+                results[filename] = (original_size, os.path.getsize(filepath))
+        # forget the images that were deleted
+        self.records = {
+            filename: record
+            for filename, record in self.records.items()
+            if os.path.isfile(os.path.join(self.image_dir, filename))
+        }
+        self.save()
+        return results
+
+    def is_optimized(self, filename):
+        """Returns True if an image has the content that it had after its last optimization. If only its
+        fingerprint changed (e.g. after a checkout), the recorded fingerprint is updated.
+
+        :param filename: Name of the image in the image directory.
+        """
+        record = self.records.get(filename)
+        if record is None:
+            return False
+        filepath = os.path.join(self.image_dir, filename)
+        fingerprint = get_fingerprint(filepath)
+        if fingerprint == record["fingerprint"]:
+            return True
+        if get_file_hash(filepath) == record["hash"]:
+            record["fingerprint"] = fingerprint
+            return True
+        return False
+
+    def optimize(self, filepath):
+        """Optimizes a single png image in place, if that makes it smaller or caps its resolution.
+
+        :param filepath: Path towards the png image.
+        """
+        with Image.open(filepath) as original:
+            original.load()
+        image = original
+        dpi = original.info.get("dpi")
+        max_width = int(self.max_dpi * self.print_width)
+        is_resized = image.width > max_width
+        if is_resized:
+            scale = max_width / image.width
+            image = image.resize((max_width, max(1, round(image.height * scale))), Image.LANCZOS)
+            if dpi:
+                dpi = (dpi[0] * scale, dpi[1] * scale)
+        image = remove_opaque_alpha(image)
+        image = convert_to_exact_palette(image)
+        save_options = {"optimize": True}
+        if dpi:
+            save_options["dpi"] = dpi
+        temporary_filepath = get_temporary_filepath(filepath)
+        try:
+            image.save(temporary_filepath, "PNG", **save_options)
+            if is_resized or os.path.getsize(temporary_filepath) < os.path.getsize(filepath):
+                os.replace(temporary_filepath, filepath)
+        finally:
+            delete_file_if_exists(temporary_filepath)
+
+    def save(self):
+        """Writes the records to the image directory, if they changed."""
+        if not self.records and not os.path.exists(self.record_filepath):
+            return
+        write_file_if_changed(
+            json.dumps({"version": self.version, "images": self.records}, indent=1, sort_keys=True),
+            self.record_filepath,
+        )
+
+
+def remove_opaque_alpha(image):
+    """Returns the image without its alpha channel if every pixel is fully opaque, e.g. the RGBA images
+    that matplotlib saves.
+
+    :param image: A Pillow image.
+    """
+    if image.mode in ["RGBA", "LA"] and image.getchannel("A").getextrema() == (255, 255):
+        return image.convert(image.mode[:-1])
+    return image
+
+
+def convert_to_exact_palette(image):
+    """Returns the image as a palette image if it has at most 256 colours, and as it is otherwise.
+
+    :param image: A Pillow image.
+    """
+    if image.mode != "RGB" or image.getcolors(256) is None:
+        return image
+    palette_image = image.convert("P", palette=Image.ADAPTIVE, colors=256)
+    # the palette must reproduce every pixel exactly
+    if ImageChops.difference(palette_image.convert("RGB"), image).getbbox() is None:
+        return palette_image
+    return image
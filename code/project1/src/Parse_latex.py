@@ -0,0 +1,233 @@
+# tokenizes the latex commands that include files in a report
+import os
+
+# Latex commands of which the first mandatory argument is a path to an included file.
+file_inclusion_commands = [
+    "input",
+    "include",
+    "pythonexternal",
+    "pythonhighlighted",
+    "includepdf",
+    "includegraphics",
+    "lstinputlisting",
+    "IfFileExists",
+]
+
+# Number of mandatory arguments of the file inclusion commands that take more than one argument.
+number_of_arguments = {"pythonhighlighted": 2}
+
+
+class Latex_command:
+    """stores a single latex command that includes a file, the line at which it starts and the
+    \\IfFileExists branches it is placed in."""
+
+    def __init__(self, name, argument, options, line_nr, conditions, arguments=None):
+        self.name = name
+        self.argument = argument
+        # all mandatory arguments, of which the first is the argument
+        self.arguments = [argument] if arguments is None else arguments
+        self.options = options
+        self.line_nr = line_nr
+        # tuple of (path, branch) pairs, branch is True in the first branch of \IfFileExists{path}.
+        self.conditions = conditions
+
+    def get_filename(self):
+        """Returns the filename of the file that is included by this command."""
+        return os.path.basename(self.argument)
+
+
+def tokenize_latex(lines, command_names=None):
+    """Returns the list of Latex_command objects of the uncommented file inclusion commands in a list
+    of lines of latex code, in order of appearance. Everything right of an unescaped % is skipped,
+    and the commands within the branches of \\IfFileExists store the condition of those branches.
+    The lines are scanned once, such that tokenizing is linear in the size of the latex code.
+
+    :param lines: List of lines of latex code.
+    :param command_names: (Default value = None) Names of the commands that are returned, without backslash.
+    All file_inclusion_commands are returned if it is not given.
+    """
+    if command_names is None:
+        command_names = file_inclusion_commands
+    command_names = set(command_names)
+    text = "".join(line if line.endswith("\n") else line + "\n" for line in lines)
+    tokenizer = Latex_tokenizer(text)
+    return [command for command in tokenizer.tokenize() if command.name in command_names]
+
+
+def group_commands_by_line(commands):
+    """Returns a dictionary from line number to the list of Latex_command objects that start at that line.
+
+    :param commands: List of Latex_command objects.
+    """
+    commands_by_line = {}
+    for command in commands:
+        commands_by_line.setdefault(command.line_nr, []).append(command)
+    return commands_by_line
+
+
+class Latex_tokenizer:
+    """Single pass scanner over latex code that yields the file inclusion commands."""
+
+    def __init__(self, text):
+        self.text = text
+        self.index = 0
+        self.line_nr = 0
+        self.brace_depth = 0
+        # open \IfFileExists statements as lists of [path, state, brace depth of the open branch]
+        self.conditionals = []
+
+    def tokenize(self):
+        """Returns the list of Latex_command objects of all file inclusion commands in the text."""
+        commands = []
+        text = self.text
+        while self.index < len(text):
+            character = text[self.index]
+            if character == "%":
+                self.skip_comment()
+            elif character == "\n":
+                self.line_nr = self.line_nr + 1
+                self.index = self.index + 1
+            elif character == "\\":
+                command = self.read_command()
+                if not command is None:
+                    commands.append(command)
+            elif character == "{":
+                self.open_brace()
+                self.index = self.index + 1
+            elif character == "}":
+                self.close_brace()
+                self.index = self.index + 1
+            else:
+                if not character.isspace():
+                    self.drop_conditional_awaiting_branch()
+                self.index = self.index + 1
+        return commands
+
+    def skip_comment(self):
+        """Moves the index to the end of the line of a comment."""
+        end_index = self.text.find("\n", self.index)
+        self.index = len(self.text) if end_index == -1 else end_index
+
+    def read_command(self):
+        """Reads a command that starts at the backslash at the current index, and returns it as a
+        Latex_command if it includes a file. Returns None otherwise."""
+        text = self.text
+        start_index = self.index + 1
+        end_index = start_index
+        while end_index < len(text) and (text[end_index].isalpha() or text[end_index] == "@"):
+            end_index = end_index + 1
+        if end_index == start_index:
+            # control symbol such as \% or \{, which never opens a comment or group
+            self.index = min(start_index + 1, len(text))
+            self.drop_conditional_awaiting_branch()
+            return None
+        name = text[start_index:end_index]
+        self.index = end_index
+        self.drop_conditional_awaiting_branch()
+        if not name in file_inclusion_commands:
+            return None
+        if text[end_index : end_index + 1] == "*":
+            # starred form, e.g. \includegraphics*
+            self.index = end_index + 1
+
+        line_nr = self.line_nr
+        conditions = self.get_conditions()
+        options = self.read_group("[", "]")
+        arguments = []
+        for _ in range(number_of_arguments.get(name, 1)):
+            argument = self.read_group("{", "}")
+            if argument is None:
+                break
+            arguments.append(argument.strip())
+        if not arguments:
+            return None
+        if name == "IfFileExists":
+            self.conditionals.append([arguments[0], "await_true", None])
+        return Latex_command(
+            name, arguments[0], options, line_nr, conditions, arguments
+        )
+
+    def read_group(self, opening, closing):
+        """Reads a (possibly nested) group that starts after optional whitespace at the current index,
+        and returns its content. Returns None, without moving the index, if no such group starts there.
+        Like TeX, the whitespace may contain line ends and comments, but not a blank line (a paragraph).
+
+        :param opening: The character that opens the group, "{" or "[".
+        :param closing: The character that closes the group, "}" or "]".
+        """
+        text = self.text
+        index = self.index
+        skipped_line_ends = 0
+        at_line_start = False
+        while index < len(text):
+            character = text[index]
+            if character == "%":
+                # a comment also removes the end of its line
+                end_index = text.find("\n", index)
+                if end_index == -1:
+                    return None
+                index = end_index
+                at_line_start = False
+            if text[index] == "\n":
+                if at_line_start:
+                    return None
+                at_line_start = True
+                skipped_line_ends = skipped_line_ends + 1
+            elif not text[index] in " \t":
+                break
+            index = index + 1
+        if index >= len(text) or text[index] != opening:
+            return None
+        self.line_nr = self.line_nr + skipped_line_ends
+        depth = 0
+        start_index = index + 1
+        while index < len(text):
+            character = text[index]
+            if character == "\\":
+                index = index + 2
+                continue
+            if character == "\n":
+                self.line_nr = self.line_nr + 1
+            elif character == opening:
+                depth = depth + 1
+            elif character == closing:
+                depth = depth - 1
+                if depth == 0:
+                    self.index = index + 1
+                    return text[start_index:index]
+            index = index + 1
+        # unbalanced group, treat the rest of the text as its content
+        self.index = len(text)
+        return text[start_index:]
+
+    def open_brace(self):
+        """Updates the brace depth and opens the next branch of an \\IfFileExists statement."""
+        self.brace_depth = self.brace_depth + 1
+        if self.conditionals and self.conditionals[-1][1] in ["await_true", "await_false"]:
+            conditional = self.conditionals[-1]
+            conditional[1] = "in_true" if conditional[1] == "await_true" else "in_false"
+            conditional[2] = self.brace_depth
+
+    def close_brace(self):
+        """Updates the brace depth and closes the branch of an \\IfFileExists statement if it ends."""
+        if self.conditionals and self.conditionals[-1][2] == self.brace_depth:
+            conditional = self.conditionals[-1]
+            if conditional[1] == "in_true":
+                conditional[1] = "await_false"
+                conditional[2] = None
+            else:
+                self.conditionals.pop()
+        self.brace_depth = self.brace_depth - 1
+
+    def drop_conditional_awaiting_branch(self):
+        """Forgets an \\IfFileExists statement of which the branches do not directly follow."""
+        if self.conditionals and self.conditionals[-1][1] in ["await_true", "await_false"]:
+            self.conditionals.pop()
+
+    def get_conditions(self):
+        """Returns the (path, branch) pairs of the \\IfFileExists branches that enclose the current index."""
+        return tuple(
+            (conditional[0], conditional[1] == "in_true")
+            for conditional in self.conditionals
+            if conditional[1] in ["in_true", "in_false"]
+        )
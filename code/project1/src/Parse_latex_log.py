@@ -0,0 +1,246 @@
+# parses the log and the terminal output of pdflatex into the problems and the build statistics of a report
+import bisect
+import re
+
+# Length after which pdflatex wraps the lines of its log and terminal output (max_print_line of TeX Live).
+max_print_line = 79
+
+# Extensions of the files that TeX opens, used to tell file names apart from text between parentheses.
+tex_file_extensions = [
+    ".tex", ".sty", ".cls", ".clo", ".cfg", ".def", ".fd", ".ldf", ".ltx", ".aux", ".toc", ".out",
+    ".lof", ".lot", ".bbl", ".pdf", ".png", ".jpg", ".jpeg", ".eps", ".dict", ".map", ".enc", ".py",
+]
+
+warning_pattern = re.compile(r"^(?:LaTeX(?: Font)?|Package \S+|Class \S+|pdfTeX) [Ww]arning")
+undefined_pattern = re.compile(r"(Reference|Citation) `([^']*)' on page (\d+) undefined")
+box_pattern = re.compile(
+    r"^(Overfull|Underfull) \\([hv]box) \((?:([\d.]+)pt too \w+|badness (\d+))\) (.*)$"
+)
+rerun_pattern = re.compile(r"Rerun to get|Label\(s\) may have changed|Please rerun LaTeX")
+output_pattern = re.compile(r"Output written on .* \((\d+) pages?, (\d+) bytes\)")
+file_open_pattern = re.compile(r"\(([^\s()\[\]{}<>\"]+)")
+
+
+class Compile_report:
+    """stores the problems and the build statistics of a compiled report, as found in the pdflatex log of
+    the last pass and in the terminal output of all passes."""
+
+    __slots__ = (
+        "errors",
+        "warnings",
+        "undefined_references",
+        "overfull_boxes",
+        "underfull_boxes",
+        "rerun_requested",
+        "pages",
+        "output_size",
+        "pass_durations",
+        "file_durations",
+        "file_list",
+    )
+
+    def __init__(self):
+        self.errors = []
+        self.warnings = []
+        # dictionaries with the kind ("Reference" or "Citation"), the key and the page
+        self.undefined_references = []
+        # dictionaries with the kind of box, its size in pt (or badness) and its location
+        self.overfull_boxes = []
+        self.underfull_boxes = []
+        # True if the last pass asks for another pass
+        self.rerun_requested = False
+        self.pages = None
+        # size of the pdf in bytes
+        self.output_size = None
+        # durations of the pdflatex passes in seconds
+        self.pass_durations = []
+        # time in seconds that pdflatex spent in each file, excluding the files that it included
+        self.file_durations = {}
+        # versions of the loaded files, as listed by \listfiles
+        self.file_list = {}
+
+    def to_dict(self):
+        """Returns the report as a dictionary that can be written as json."""
+        return {name: getattr(self, name) for name in self.__slots__}
+
+    def get_slowest_files(self, count=5):
+        """Returns the files in which pdflatex spent most time, with their durations.
+
+        :param count: (Default value = 5) Maximum number of returned files.
+        """
+        return sorted(self.file_durations.items(), key=lambda item: item[1], reverse=True)[:count]
+
+    def get_summary(self):
+        """Returns a one line summary of the report."""
+        summary = (
+            f"{self.pages} pages, {len(self.errors)} errors, {len(self.warnings)} warnings, "
+            f"{len(self.undefined_references)} undefined references, {len(self.overfull_boxes)} overfull boxes, "
+            f"{len(self.pass_durations)} passes in {sum(self.pass_durations):.1f} s"
+        )
+        slowest_files = ", ".join(
+            f"{filepath} {duration:.2f} s" for filepath, duration in self.get_slowest_files(3)
+        )
+        return f"{summary} (slowest: {slowest_files})" if slowest_files else summary
+
+
+def unwrap_lines(text):
+    """Returns the lines of pdflatex output, with the lines that pdflatex wrapped joined again.
+
+    :param text: The log or terminal output of pdflatex.
+    """
+    lines = []
+    wrapped = False
+    for line in text.split("\n"):
+        if wrapped:
+            lines[-1] += line
+        else:
+            lines.append(line)
+        wrapped = len(line) == max_print_line
+    return lines
+
+
+def parse_latex_log(log_text, report=None):
+    """Adds the errors, warnings, undefined references, boxes, rerun requests, output statistics and file
+    list of a pdflatex log to a Compile_report, and returns it.
+
+    :param log_text: Content of the .log file of the last pdflatex pass.
+    :param report: (Default value = None) Compile_report to which the log is added, a new one if it is not given.
+    """
+    report = Compile_report() if report is None else report
+    lines = unwrap_lines(log_text)
+    in_file_list = False
+    for line_nr, line in enumerate(lines):
+        if in_file_list:
+            if line.strip().startswith("****"):
+                in_file_list = False
+            elif line.strip():
+                name, _, version = line.strip().partition(" ")
+                report.file_list[name] = version.strip()
+        elif line.strip() == "*File List*":
+            in_file_list = True
+        elif line.startswith("! "):
+            # TeX shows the line of the error as "l.<line number> <code>" below the message
+            context = next(
+                (next_line for next_line in lines[line_nr + 1 : line_nr + 10] if next_line.startswith("l.")),
+                "",
+            )
+            report.errors.append(f"{line[2:]} {context}".strip())
+        elif warning_pattern.match(line):
+            report.warnings.append(get_warning(lines, line_nr))
+        box = box_pattern.match(line)
+        if box:
+            kind, box_type, size, badness, location = box.groups()
+            boxes = report.overfull_boxes if kind == "Overfull" else report.underfull_boxes
+            boxes.append(
+                {
+                    "box": box_type,
+                    "size": float(size) if size else None,
+                    "badness": int(badness) if badness else None,
+                    "location": location,
+                }
+            )
+        for kind, key, page in undefined_pattern.findall(line):
+            report.undefined_references.append({"kind": kind, "key": key, "page": int(page)})
+        if rerun_pattern.search(line):
+            report.rerun_requested = True
+        output = output_pattern.search(line)
+        if output:
+            report.pages, report.output_size = int(output.group(1)), int(output.group(2))
+        elif line.startswith("No pages of output"):
+            report.pages = 0
+    return report
+
+
+def get_warning(lines, line_nr):
+    """Returns a warning of the log, including the continuation lines that start with the name of the package.
+
+    :param lines: The unwrapped lines of the log.
+    :param line_nr: Index of the first line of the warning.
+    """
+    warning = [lines[line_nr].strip()]
+    package = re.match(r"^(?:Package|Class) (\S+)", lines[line_nr])
+    continuation = f"({package.group(1)})" if package else None
+    for line in lines[line_nr + 1 :]:
+        if continuation is None or not line.startswith(continuation):
+            break
+        warning.append(line[len(continuation) :].strip())
+    return " ".join(warning)
+
+
+def add_file_durations(timed_output, start_time, end_time, file_durations):
+    """Attributes the duration of a pdflatex pass to the files that were open, using the moments at which
+    pdflatex wrote "(<file>" when it opened a file and ")" when it closed it. The time between two markers
+    is added to the innermost open file, the time before the first and after the last file goes to
+    "(startup)" and "(shipout)".
+
+    :param timed_output: List of (time, text) pairs with the terminal output of the pass, as it arrived.
+    :param start_time: The time at which the pass started.
+    :param end_time: The time at which the pass ended.
+    :param file_durations: Dictionary from file to duration in seconds, to which the durations are added.
+    """
+    # join the wrapped lines, while keeping track of the time at which each part of the output arrived
+    text = ""
+    offsets = []
+    times = []
+    for chunk_time, chunk in timed_output:
+        offsets.append(len(text))
+        times.append(chunk_time)
+        text += chunk
+    # positions in the joined text at which a wrapping newline was removed
+    wrap_positions = []
+    joined_lines = []
+    joined_length = 0
+    for line in text.split("\n"):
+        joined_length += len(line)
+        if len(line) == max_print_line:
+            wrap_positions.append(joined_length)
+            joined_lines.append(line)
+        else:
+            joined_lines.append(line + "\n")
+            joined_length += 1
+    joined_text = "".join(joined_lines)
+
+    open_files = []
+    outside_file = "(startup)"
+    last_time = start_time
+    for match in re.finditer(r"[()]", joined_text):
+        # map the position in the joined text back to the output as it arrived
+        offset = match.start() + bisect.bisect_right(wrap_positions, match.start())
+        event_time = times[bisect.bisect_right(offsets, offset) - 1]
+        current_file = get_current_file(open_files, outside_file)
+        file_durations[current_file] = file_durations.get(current_file, 0.0) + event_time - last_time
+        last_time = event_time
+        if match.group() == ")":
+            if open_files:
+                open_files.pop()
+            continue
+        filepath = file_open_pattern.match(joined_text, match.start())
+        if filepath and is_tex_file(filepath.group(1)):
+            open_files.append(filepath.group(1))
+            outside_file = "(shipout)"
+        else:
+            # parentheses in messages, e.g. "(see the transcript file)"
+            open_files.append(None)
+    current_file = get_current_file(open_files, outside_file)
+    file_durations[current_file] = file_durations.get(current_file, 0.0) + end_time - last_time
+    return file_durations
+
+
+def get_current_file(open_files, default):
+    """Returns the innermost file that is open.
+
+    :param open_files: Stack of the open files, with None for parentheses that do not belong to a file.
+    :param default: The name that is returned if no file is open.
+    """
+    for filepath in reversed(open_files):
+        if filepath is not None:
+            return filepath
+    return default
+
+
+def is_tex_file(name):
+    """Returns True if a name that follows "(" in the output of pdflatex is the path of a file.
+
+    :param name: The text between "(" and the next whitespace or parenthesis.
+    """
+    return "/" in name or any(name.endswith(extension) for extension in tex_file_extensions)
@@ -8,6 +8,10 @@
 ###
 ### For a single line, use:
 ### plt_tex.plotSingleLine(plt_tex,range(0, len(dataseries)),dataseries,"x-axis label [units]","y-axis label [units]",lineLabel,"3b",4,11)
+###
+### To plot many figures, reuse one figure and canvas for all of them with:
+### with Figure_session() as session:
+###     plt_tex.plotSingleLine(plt_tex,x,y,"x-axis label","y-axis label",lineLabel,"3b",4,11,session=session)
 
 ### You can also plot a table directly into latex, see example_create_a_table(..)
 ### 
@@ -21,37 +25,72 @@
 ###    \end{tabular}
 ###\end{table}
 import random
+import matplotlib
 from matplotlib import lines
-import matplotlib.pyplot as plt
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from matplotlib.figure import Figure
 import numpy as np
 import os
+
+class Figure_session:
+    '''Renders figures on a standalone Agg figure and canvas, outside the global figure registry of pyplot,
+    such that nothing keeps a figure alive once it is saved. Use it as a context manager to reuse one figure
+    and canvas for many plots, the figure is cleared after each save and released when the session ends.'''
+
+    def __init__(self):
+        self.figure = None
+        self.canvas = None
+
+    def __enter__(self):
+        self.figure = Figure()
+        self.canvas = FigureCanvasAgg(self.figure)
+        return self
+
+    def __exit__(self,exc_type,exc_value,traceback):
+        self.figure.clear()
+        self.figure = None
+        self.canvas = None
+
+    def add_axes(self):
+        '''returns the axes of a new plot on the cleared figure'''
+        self.figure.clear()
+        return self.figure.add_subplot(111)
+
+    def save(self,filepath):
+        '''writes the plot to a png file and clears the figure for the next plot'''
+        self.canvas.print_figure(filepath)
+        self.figure.clear()
+
 class Plot_to_tex:
 
     def __init__(self):
         self.script_dir = self.get_script_dir()
         print("Created main")
 
-    # plot graph (legendPosition = integer 1 to 4)
-    def plotSingleLine(self,x_path,y_series,x_axis_label,y_axis_label,label,filename,legendPosition,project_nr):
-        fig=plt.figure();
-        ax=fig.add_subplot(111);
+    # plot graph (legendPosition = integer 1 to 4), session is an optional Figure_session that is reused
+    def plotSingleLine(self,x_path,y_series,x_axis_label,y_axis_label,label,filename,legendPosition,project_nr,session=None):
+        if session is None:
+            with Figure_session() as session:
+                return Plot_to_tex.plotSingleLine(self,x_path,y_series,x_axis_label,y_axis_label,label,filename,legendPosition,project_nr,session)
+        ax=session.add_axes();
         ax.plot(x_path,y_series,c='b',ls='-',label=label,fillstyle='none');
-        plt.legend(loc=legendPosition);
-        plt.xlabel(x_axis_label);
-        plt.ylabel(y_axis_label);
-        plt.savefig(os.path.dirname(__file__)+'/../../../latex/project'+str(project_nr)+'/Images/'+filename+'.png');
-#         plt.show();
-
-    # plot graphs
-    def plotMultipleLines(self,x,y_series,x_label,y_label,label,filename,legendPosition,project_nr):
-        fig=plt.figure();
-        ax=fig.add_subplot(111);
+        ax.legend(loc=legendPosition);
+        ax.set_xlabel(x_axis_label);
+        ax.set_ylabel(y_axis_label);
+        session.save(Plot_to_tex.get_image_filepath(filename,project_nr));
+
+    # plot graphs, session is an optional Figure_session that is reused
+    def plotMultipleLines(self,x,y_series,x_label,y_label,label,filename,legendPosition,project_nr,session=None):
+        if session is None:
+            with Figure_session() as session:
+                return Plot_to_tex.plotMultipleLines(self,x,y_series,x_label,y_label,label,filename,legendPosition,project_nr,session)
+        ax=session.add_axes();
 
         # generate colours
-        cmap = self.get_cmap(len(y_series[:,0]))
+        cmap = Plot_to_tex.get_cmap(len(y_series[:,0]))
 
         # generate line types
-        lineTypes = self.generateLineTypes(y_series)
+        lineTypes = Plot_to_tex.generateLineTypes(y_series)
 
         for i in range(0,len(y_series)):
             # overwrite linetypes to single type
@@ -59,19 +98,23 @@ class Plot_to_tex:
             ax.plot(x,y_series[i,:],ls=lineTypes[i],label=label[i],fillstyle='none',c=cmap(i)); # color
 
         # configure plot layout
-        plt.legend(loc=legendPosition);
-        plt.xlabel(x_label);
-        plt.ylabel(y_label);
-        plt.savefig(os.path.dirname(__file__)+'/../../../latex/project'+str(project_nr)+'/Images/'+filename+'.png');
+        ax.legend(loc=legendPosition);
+        ax.set_xlabel(x_label);
+        ax.set_ylabel(y_label);
+        session.save(Plot_to_tex.get_image_filepath(filename,project_nr));
         
         print(f'plotted lines')
 
+    def get_image_filepath(filename,project_nr):
+        '''returns the path of the png image with the given filename in the Images folder of a latex project'''
+        return os.path.dirname(__file__)+'/../../../latex/project'+str(project_nr)+'/Images/'+filename+'.png'
+
     # Generate random line colours
     # Source: https://stackoverflow.com/questions/14720331/how-to-generate-random-colors-in-matplotlib
     def get_cmap(n, name='hsv'):
         '''Returns a function that maps each index in 0, 1, ..., n-1 to a distinct
         RGB color; the keyword argument name must be a standard mpl colormap name.'''
-        return plt.cm.get_cmap(name, n)
+        return matplotlib.colormaps[name].resampled(n)
 
     def generateLineTypes(y_series):
         # generate varying linetypes
@@ -97,7 +140,7 @@ class Plot_to_tex:
         for col in range(1,cols):
             format = format+" & %s"
         format = format+""
-        plt.savetxt(os.path.dirname(__file__)+"/../../../latex/project"+str(project_nr)+"/tables/"+filename+".txt",table_matrix, delimiter=' & ', fmt=format, newline='  \\\\ \hline \n')
+        np.savetxt(os.path.dirname(__file__)+"/../../../latex/project"+str(project_nr)+"/tables/"+filename+".txt",table_matrix, delimiter=' & ', fmt=format, newline='  \\\\ \hline \n')
 
     # replace this with your own table creation and then pass it to put_table_in_tex(..)
     def example_create_a_table(self):
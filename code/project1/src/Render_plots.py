@@ -0,0 +1,149 @@
+# renders many line plots into the Images folders of latex reports concurrently
+import concurrent.futures
+import os
+import tempfile
+
+import numpy as np
+
+from .Plot_to_tex import Figure_session, Plot_to_tex
+
+# The Figure_session of a worker process, which is reused for all plots that the worker renders.
+worker_session = None
+
+
+class Plot_spec:
+    """stores a line plot that is rendered to latex/projectN/Images/<filename>.png: the x values, the y
+    values of a single line (1D) or of one line per row (2D), the axis labels, the label of each line and
+    the position of the legend (an integer 1 to 4)."""
+
+    __slots__ = (
+        "x",
+        "y_series",
+        "x_label",
+        "y_label",
+        "labels",
+        "filename",
+        "legend_position",
+        "project_nr",
+    )
+
+    def __init__(self, x, y_series, x_label, y_label, labels, filename, legend_position, project_nr):
+        self.x = x
+        self.y_series = y_series
+        self.x_label = x_label
+        self.y_label = y_label
+        # the label of a single line, or the list of labels of multiple lines
+        self.labels = labels
+        self.filename = filename
+        self.legend_position = legend_position
+        self.project_nr = project_nr
+
+
+def render_plots(plot_specs, max_workers=None):
+    """Renders plots concurrently on a process pool, with at most one worker per CPU core. The x and y values
+    are written once to .npy files in a temporary directory, from which the workers map them into memory,
+    instead of pickling the arrays with every task. Each worker reuses one Figure_session for all of its
+    plots. Returns, once all images are written, a dictionary from (project number, image filename) to the
+    exception that was raised while rendering the image, or None if it was rendered.
+
+    :param plot_specs: List of Plot_spec objects.
+    :param max_workers: (Default value = None) Maximum number of worker processes, the number of CPU cores if it is not given.
+    """
+    if max_workers is None:
+        max_workers = os.cpu_count() or 1
+    results = {}
+    if max_workers <= 1 or len(plot_specs) <= 1:
+        # starting worker processes takes longer than rendering a single plot
+        with Figure_session() as session:
+            for plot_spec in plot_specs:
+                try:
+                    render_plot(plot_spec, session)
+                    results[get_image_key(plot_spec)] = None
+                except Exception as error:
+                    results[get_image_key(plot_spec)] = error
+        return results
+    with tempfile.TemporaryDirectory() as array_dir:
+        tasks = [write_arrays(plot_spec, array_dir, plot_nr) for plot_nr, plot_spec in enumerate(plot_specs)]
+        with concurrent.futures.ProcessPoolExecutor(
+            max_workers=min(max_workers, len(plot_specs)), initializer=start_worker
+        ) as executor:
+            futures = {
+                executor.submit(render_plot_from_files, *task): get_image_key(plot_spec)
+                for task, plot_spec in zip(tasks, plot_specs)
+            }
+            for future in concurrent.futures.as_completed(futures):
+                results[futures[future]] = future.exception()
+    return {get_image_key(plot_spec): results[get_image_key(plot_spec)] for plot_spec in plot_specs}
+
+
+def get_image_key(plot_spec):
+    """Returns the (project number, image filename) that identifies the image of a plot, as projects can
+    contain images with the same filename.
+
+    :param plot_spec: The Plot_spec of the plot.
+    """
+    return (plot_spec.project_nr, plot_spec.filename)
+
+
+def render_plot(plot_spec, session):
+    """Renders a single plot with Plot_to_tex.
+
+    :param plot_spec: The Plot_spec of the plot.
+    :param session: The Figure_session on which the plot is rendered.
+    """
+    plot = Plot_to_tex.plotSingleLine if np.ndim(plot_spec.y_series) == 1 else Plot_to_tex.plotMultipleLines
+    plot(
+        Plot_to_tex,
+        plot_spec.x,
+        np.asarray(plot_spec.y_series),
+        plot_spec.x_label,
+        plot_spec.y_label,
+        plot_spec.labels,
+        plot_spec.filename,
+        plot_spec.legend_position,
+        plot_spec.project_nr,
+        session=session,
+    )
+
+
+def write_arrays(plot_spec, array_dir, plot_nr):
+    """Writes the x and y values of a plot to .npy files, and returns the Plot_spec without its values
+    together with the paths of the two files.
+
+    :param plot_spec: The Plot_spec of the plot.
+    :param array_dir: Directory in which the .npy files are written.
+    :param plot_nr: Number of the plot, that makes the filenames unique.
+    """
+    x_filepath = os.path.join(array_dir, f"{plot_nr}_x.npy")
+    y_filepath = os.path.join(array_dir, f"{plot_nr}_y.npy")
+    np.save(x_filepath, np.asarray(plot_spec.x))
+    np.save(y_filepath, np.asarray(plot_spec.y_series))
+    spec_without_arrays = Plot_spec(
+        None,
+        None,
+        plot_spec.x_label,
+        plot_spec.y_label,
+        plot_spec.labels,
+        plot_spec.filename,
+        plot_spec.legend_position,
+        plot_spec.project_nr,
+    )
+    return spec_without_arrays, x_filepath, y_filepath
+
+
+def start_worker():
+    """Creates the Figure_session of a worker process."""
+    global worker_session
+    worker_session = Figure_session().__enter__()
+
+
+def render_plot_from_files(plot_spec, x_filepath, y_filepath):
+    """Renders a plot of which the x and y values are stored in .npy files. Runs in a worker process.
+
+    :param plot_spec: The Plot_spec of the plot, without its x and y values.
+    :param x_filepath: Path towards the .npy file with the x values.
+    :param y_filepath: Path towards the .npy file with the y values.
+    """
+    plot_spec.x = np.load(x_filepath, mmap_mode="r")
+    plot_spec.y_series = np.load(y_filepath, mmap_mode="r")
+    render_plot(plot_spec, worker_session)
@@ -0,0 +1,174 @@
+# runs an external command (e.g. pdflatex) unattended, with a timeout and without leaving processes behind
+import codecs
+import collections
+import os
+import signal
+import subprocess
+import sys
+import threading
+import time
+
+
+class Command_result:
+    """stores the outcome of a command that was run with run_command."""
+
+    __slots__ = ("command", "exit_status", "duration", "timed_out", "cancelled", "output_tail")
+
+    def __init__(self, command, exit_status, duration, timed_out, cancelled, output_tail):
+        self.command = command
+        # None if the command could not be started, negative if it was killed by a signal
+        self.exit_status = exit_status
+        self.duration = duration
+        self.timed_out = timed_out
+        self.cancelled = cancelled
+        # the last lines that the command wrote to stdout and stderr
+        self.output_tail = output_tail
+
+    def succeeded(self):
+        """Returns True if the command ran to completion with exit status 0."""
+        return self.exit_status == 0 and not self.timed_out and not self.cancelled
+
+
+def run_command(
+    command,
+    cwd=None,
+    environment=None,
+    timeout=None,
+    output_filepath=None,
+    cancel_event=None,
+    echo_output=False,
+    tail_lines=20,
+    output_handler=None,
+):
+    """Runs a command in its own process group without stdin, such that it can never wait for user input,
+    and streams its stdout and stderr into a file as it arrives. If the timeout expires, the cancel event is
+    set or the caller is interrupted (Ctrl+C), the whole process group is killed. Returns a Command_result,
+    a KeyboardInterrupt is raised again after the process group is killed.
+
+    :param command: List with the program and its arguments.
+    :param cwd: (Default value = None) Directory in which the command runs.
+    :param environment: (Default value = None) Environment variables of the command, those of this process if it is not given.
+    :param timeout: (Default value = None) Wall-clock time in seconds after which the command is killed.
+    :param output_filepath: (Default value = None) File to which the output of the command is appended.
+    :param cancel_event: (Default value = None) threading.Event (or multiprocessing.Event) that kills the command when it is set.
+    :param echo_output: (Default value = False) Also print the output of the command while it runs.
+    :param tail_lines: (Default value = 20) Number of trailing output lines that are kept in the result.
+    :param output_handler: (Default value = None) Function that is called with each piece of output as soon as it arrives.
+    """
+    start_time = time.perf_counter()
+    try:
+        process = subprocess.Popen(
+            command,
+            cwd=cwd,
+            env=environment,
+            stdin=subprocess.DEVNULL,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.STDOUT,
+            **get_process_group_options(),
+        )
+    except OSError as error:
+        return Command_result(command, None, 0.0, False, False, [str(error)])
+
+    output_tail = collections.deque(maxlen=tail_lines)
+    reader = threading.Thread(
+        target=stream_output,
+        args=(process.stdout, output_filepath, output_tail, echo_output, output_handler),
+        daemon=True,
+    )
+    reader.start()
+    timed_out = False
+    cancelled = False
+    try:
+        while process.poll() is None:
+            if timeout is not None and time.perf_counter() - start_time > timeout:
+                timed_out = True
+            elif cancel_event is not None and cancel_event.is_set():
+                cancelled = True
+            else:
+                try:
+                    process.wait(timeout=0.1)
+                except subprocess.TimeoutExpired:
+                    pass
+                continue
+            kill_process_group(process)
+    except BaseException:
+        kill_process_group(process)
+        raise
+    finally:
+        reader.join(timeout=5)
+    return Command_result(
+        command,
+        process.returncode,
+        time.perf_counter() - start_time,
+        timed_out,
+        cancelled,
+        list(output_tail),
+    )
+
+
+def stream_output(stream, output_filepath, output_tail, echo_output, output_handler=None):
+    """Copies the output of a command into a file as soon as it arrives (not only at the end of each line,
+    e.g. pdflatex flushes the names of the files it opens in the middle of a line), until the command
+    closes its output.
+
+    :param stream: The stdout of the command.
+    :param output_filepath: File to which the output is appended, or None.
+    :param output_tail: Deque that keeps the last lines of the output.
+    :param echo_output: Also print the output.
+    :param output_handler: (Default value = None) Function that is called with each piece of output.
+    """
+    output_file = None if output_filepath is None else open(output_filepath, "a", encoding="utf-8")
+    decoder = codecs.getincrementaldecoder("utf-8")(errors="replace")
+    partial_line = ""
+    try:
+        for data in iter(lambda: stream.read1(1 << 16), b""):
+            text = decoder.decode(data)
+            if output_handler is not None:
+                output_handler(text)
+            lines = (partial_line + text).split("\n")
+            partial_line = lines.pop()
+            output_tail.extend(lines)
+            if output_file is not None:
+                output_file.write(text)
+                output_file.flush()
+            if echo_output:
+                sys.stdout.write(text)
+                sys.stdout.flush()
+        if partial_line:
+            output_tail.append(partial_line)
+    finally:
+        stream.close()
+        if output_file is not None:
+            output_file.close()
+
+
+def get_process_group_options():
+    """Returns the Popen options that start a command in a new process group, such that the command and
+    the processes it starts can be killed together."""
+    if os.name == "nt":
+        return {"creationflags": subprocess.CREATE_NEW_PROCESS_GROUP}
+    return {"start_new_session": True}
+
+
+def kill_process_group(process, grace_period=2.0):
+    """Terminates the process group of a command, and kills it if it did not exit within the grace period.
+
+    :param process: The Popen object of the command.
+    :param grace_period: (Default value = 2.0) Seconds between terminating and killing the process group.
+    """
+    if process.poll() is not None:
+        return
+    if os.name == "nt":
+        process.kill()
+        process.wait()
+        return
+    for kill_signal in [signal.SIGTERM, signal.SIGKILL]:
+        try:
+            os.killpg(process.pid, kill_signal)
+        except ProcessLookupError:
+            pass
+        try:
+            process.wait(timeout=grace_period)
+            return
+        except subprocess.TimeoutExpired:
+            pass
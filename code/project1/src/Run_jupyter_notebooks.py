@@ -28,9 +28,9 @@ class Run_jupyter_notebook:
         with open(notebook_filename, 'w', encoding='utf-8') as f:
             nbformat.write(nb, f)
     
-    # converts jupyter notebook to pdf
+    # converts jupyter notebook to pdf, returns the exit status of nbconvert
     def convert_notebook_to_pdf(self,notebook_filename):
-        os.system(f'jupyter nbconvert --to pdf {notebook_filename}')
+        return os.system(f'jupyter nbconvert --to pdf {notebook_filename}')
     
     def get_script_dir(self):
         ''' returns the directory of this script regardles of from which level the code is executed '''
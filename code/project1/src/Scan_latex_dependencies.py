@@ -0,0 +1,238 @@
+# scans the files that a latex report depends on, starting from its main tex file
+import argparse
+import os
+import re
+
+from .Parse_latex import tokenize_latex
+
+# Commands of which the included file is itself latex code that is scanned.
+latex_inclusion_commands = ["input", "include"]
+
+# Extensions that pdflatex tries for \includegraphics paths without extension, in order.
+graphics_extensions = [".pdf", ".png", ".jpg", ".jpeg", ".eps"]
+
+graphicspath_pattern = re.compile(r"\\graphicspath\s*\{((?:\s*\{[^{}]*\})+)\s*\}")
+
+
+class Latex_dependency:
+    """stores a single file inclusion of a latex file: the including file, the command with its argument
+    and line, and the resolved path of the included file relative to the root of the repository."""
+
+    __slots__ = ("source", "target", "command", "argument", "line_nr", "exists", "optional")
+
+    def __init__(self, source, target, command, argument, line_nr, exists, optional=False):
+        self.source = source
+        self.target = target
+        self.command = command
+        self.argument = argument
+        self.line_nr = line_nr
+        self.exists = exists
+        # True if the latex code falls back to something else when the file is missing
+        self.optional = optional
+
+    def get_diagnostic(self):
+        """Returns a message in the file:line format of compilers, that tells the included file is missing."""
+        return (
+            f"{self.source}:{self.line_nr + 1}: \\{self.command}{{{self.argument}}} "
+            f"includes missing file {self.target}"
+        )
+
+
+class Dependency_graph:
+    """The files that a latex report depends on. Each latex file maps to the Latex_dependency objects of
+    the files that it includes in the \\IfFileExists branches that are taken when the report is compiled
+    from the root of the repository. All paths are relative to the root of the repository."""
+
+    def __init__(self, root_dir, main_filepath):
+        self.root_dir = root_dir
+        self.main_filepath = main_filepath
+        # dictionary from latex file to the list of its Latex_dependency objects, in order of appearance
+        self.dependencies = {}
+
+    def get_files(self):
+        """Returns the main tex file and all existing files that it includes directly or indirectly, in the
+        order in which pdflatex reads them."""
+        files = []
+        self.add_files(self.main_filepath, files)
+        return files
+
+    def add_files(self, filepath, files):
+        """Appends a file to files, followed by the existing files that it includes that are not in files yet.
+
+        :param filepath: Path of the file relative to the root of the repository.
+        :param files: List of paths to which the files are appended.
+        """
+        files.append(filepath)
+        for dependency in self.dependencies.get(filepath, []):
+            if dependency.exists and not dependency.target in files:
+                self.add_files(dependency.target, files)
+
+    def get_missing(self):
+        """Returns the Latex_dependency objects of the included files that do not exist, except the
+        optional ones."""
+        return [
+            dependency
+            for dependencies in self.dependencies.values()
+            for dependency in dependencies
+            if not dependency.exists and not dependency.optional
+        ]
+
+    def get_dependents(self, filepath):
+        """Returns the latex files that include a file directly or indirectly.
+
+        :param filepath: Path of the included file relative to the root of the repository.
+        """
+        dependents = []
+        targets = [os.path.normpath(filepath)]
+        while targets:
+            target = targets.pop()
+            for source, dependencies in self.dependencies.items():
+                if not source in dependents and any(dependency.target == target for dependency in dependencies):
+                    dependents.append(source)
+                    targets.append(source)
+        return dependents
+
+    def get_diagnostics(self):
+        """Returns a message per missing file, see Latex_dependency.get_diagnostic."""
+        return [dependency.get_diagnostic() for dependency in self.get_missing()]
+
+
+def scan_latex_dependencies(main_filepath, root_dir, graphics_paths=None):
+    """Returns the Dependency_graph of a latex file. The \\input and \\include commands are followed
+    recursively, and the files of \\pythonexternal, \\pythonhighlighted, \\lstinputlisting, \\includepdf and
+    \\includegraphics are resolved the way pdflatex resolves them when it runs from the root of the
+    repository. Commented commands and the \\IfFileExists branches that are not taken are skipped, every
+    file is scanned once, in the order in which pdflatex reads them.
+
+    :param main_filepath: Path of the main tex file relative to the root of the repository.
+    :param root_dir: The root directory of the repository, from which pdflatex runs.
+    :param graphics_paths: (Default value = None) Directories relative to the root in which \\includegraphics
+    searches, read from the \\graphicspath of the main tex file if it is not given.
+    """
+    main_filepath = os.path.normpath(main_filepath)
+    graph = Dependency_graph(root_dir, main_filepath)
+    if graphics_paths is None:
+        graphics_paths = get_graphics_paths(read_latex_file(os.path.join(root_dir, main_filepath)))
+    unscanned = [main_filepath]
+    while unscanned:
+        source = unscanned.pop()
+        if source in graph.dependencies:
+            continue
+        graph.dependencies[source] = []
+        included_filepaths = []
+        latex_code = read_latex_file(os.path.join(root_dir, source))
+        for command in tokenize_latex(latex_code.splitlines()):
+            if command.name == "IfFileExists" or not is_taken(command.conditions, root_dir):
+                continue
+            for argument_nr, argument in enumerate(command.arguments):
+                if "#" in argument or "\\" in argument:
+                    # argument of a macro definition or a path that is only known while compiling
+                    continue
+                target = resolve_path(command.name, argument, root_dir, graphics_paths)
+                dependency = Latex_dependency(
+                    source,
+                    target,
+                    command.name,
+                    argument,
+                    command.line_nr,
+                    os.path.isfile(os.path.join(root_dir, target)),
+                    # \pythonhighlighted falls back to \pythonexternal without a pre-highlighted fragment
+                    command.name == "pythonhighlighted" and argument_nr == 0,
+                )
+                graph.dependencies[source].append(dependency)
+                if dependency.exists and command.name in latex_inclusion_commands:
+                    included_filepaths.append(target)
+        # the first included file is scanned next, such that the files are scanned in document order
+        unscanned.extend(reversed(included_filepaths))
+    return graph
+
+
+def resolve_path(command_name, argument, root_dir, graphics_paths):
+    """Returns the path, relative to the root of the repository, of the file that a command includes. If
+    the file does not exist, the path that pdflatex tries first is returned.
+
+    :param command_name: Name of the command without backslash.
+    :param argument: The argument of the command that holds the path.
+    :param root_dir: The root directory of the repository, from which pdflatex runs.
+    :param graphics_paths: Directories relative to the root in which \\includegraphics searches.
+    """
+    if command_name in latex_inclusion_commands:
+        candidates = [get_tex_path(argument), argument]
+    elif command_name == "includepdf":
+        candidates = [argument, f"{argument}.pdf"]
+    elif command_name == "includegraphics":
+        candidates = [
+            os.path.join(directory, f"{argument}{extension}")
+            for directory in [""] + graphics_paths
+            for extension in [""] + graphics_extensions
+        ]
+    else:
+        candidates = [argument]
+    for candidate in candidates:
+        if os.path.isfile(os.path.join(root_dir, candidate)):
+            return os.path.normpath(candidate)
+    return os.path.normpath(candidates[0])
+
+
+def get_graphics_paths(latex_code):
+    """Returns the directories of the \\graphicspath commands in latex code.
+
+    :param latex_code: The latex code of the main tex file.
+    """
+    paths = []
+    for groups in graphicspath_pattern.findall(latex_code):
+        paths.extend(path.strip() for path in re.findall(r"\{([^{}]*)\}", groups))
+    return paths
+
+
+def read_latex_file(filepath):
+    """Returns the content of a latex file, or an empty string if it can not be read.
+
+    :param filepath: Path towards the latex file.
+    """
+    try:
+        with open(filepath, encoding="utf-8", errors="replace") as f:
+            return f.read()
+    except OSError:
+        return ""
+
+
+def is_taken(conditions, root_dir):
+    """Returns True if the \\IfFileExists branches of a command are taken when compiling from the root.
+
+    :param conditions: The (path, branch) pairs of the command, see Latex_command.
+    :param root_dir: The root directory of the repository, from which pdflatex runs.
+    """
+    return all(
+        os.path.isfile(os.path.join(root_dir, path)) == branch for path, branch in conditions
+    )
+
+
+def get_tex_path(argument):
+    """Returns the path of the file that \\input reads, which gets the .tex extension if it has none.
+
+    :param argument: The argument of the \\input command.
+    """
+    return argument if argument.endswith(".tex") else f"{argument}.tex"
+
+
+def parse_args():
+    """Returns the command line arguments of the dependency scan."""
+    parser = argparse.ArgumentParser(
+        description="Lists the files that the report of a project depends on, and the missing ones."
+    )
+    parser.add_argument("project_nr", type=int)
+    parser.add_argument("--latex-filename", default="main.tex")
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    root_dir = os.path.normpath(f"{os.path.dirname(__file__)}/../../..")
+    graph = scan_latex_dependencies(f"latex/project{args.project_nr}/{args.latex_filename}", root_dir)
+    for filepath in graph.get_files():
+        print(filepath)
+    for diagnostic in graph.get_diagnostics():
+        print(diagnostic)
+    if graph.get_missing():
+        raise SystemExit(1)
@@ -0,0 +1,147 @@
+# tracks whether the pdf of a jupyter notebook was converted from the current content of the notebook
+import hashlib
+import json
+import os
+
+from .Export_manifest import get_fingerprint
+from .Write_files import write_file_if_changed
+
+# Name of the file in code/projectN/src/ that records from which notebook content each pdf was converted.
+notebook_pdfs_filename = ".notebook_pdfs.json"
+
+
+class Notebook_pdf_tracker:
+    """Records, per notebook of a src directory, the hash of the cell sources and outputs from which its
+    pdf was converted, together with the hash of that pdf. A pdf is stale if it is missing, or if the
+    notebook or the pdf changed since the conversion. The hashes are only computed if the modification
+    time or size of a file differs from the recorded one. Notebooks without a record are compared on
+    modification time only.
+    """
+
+    version = 1
+
+    def __init__(self, src_dir):
+        self.src_dir = src_dir
+        self.record_filepath = os.path.join(src_dir, notebook_pdfs_filename)
+        self.records = {}
+        try:
+            with open(self.record_filepath) as f:
+                records = json.load(f)
+            if records.get("version") == self.version:
+                self.records = records["notebooks"]
+        except (OSError, ValueError):
+            pass
+
+    def is_stale(self, notebook_filepath):
+        """Returns True if the pdf of a notebook does not exist, or was not converted from the current
+        cell sources and outputs of the notebook.
+
+        :param notebook_filepath: Path towards the .ipynb file of which the pdf is checked.
+        """
+        pdf_filepath = get_pdf_filepath(notebook_filepath)
+        pdf_fingerprint = get_fingerprint(pdf_filepath)
+        if pdf_fingerprint is None:
+            return True
+        record = self.records.get(self.get_key(notebook_filepath))
+        if record is None:
+            notebook_fingerprint = get_fingerprint(notebook_filepath)
+            return notebook_fingerprint is None or notebook_fingerprint[0] > pdf_fingerprint[0]
+        return not (
+            self.is_recorded(record, "notebook", notebook_filepath, get_notebook_hash)
+            and self.is_recorded(record, "pdf", pdf_filepath, get_file_hash)
+        )
+
+    def is_recorded(self, record, name, filepath, get_hash):
+        """Returns True if a file has the recorded content. If only its fingerprint changed (e.g. after a
+        checkout), the recorded fingerprint is updated such that the hash is not computed again.
+
+        :param record: The record of a notebook.
+        :param name: Either "notebook" or "pdf".
+        :param filepath: Path towards the notebook or pdf.
+        :param get_hash: Function that returns the hash of the file.
+        """
+        fingerprint = get_fingerprint(filepath)
+        if fingerprint is None:
+            return False
+        if fingerprint == record[f"{name}_fingerprint"]:
+            return True
+        if get_hash(filepath) == record[f"{name}_hash"]:
+            record[f"{name}_fingerprint"] = fingerprint
+            return True
+        return False
+
+    def record_conversion(self, notebook_filepath):
+        """Records that the pdf of a notebook was just converted from the current content of the notebook.
+
+        :param notebook_filepath: Path towards the .ipynb file that was converted.
+        """
+        pdf_filepath = get_pdf_filepath(notebook_filepath)
+        self.records[self.get_key(notebook_filepath)] = {
+            "notebook_fingerprint": get_fingerprint(notebook_filepath),
+            "notebook_hash": get_notebook_hash(notebook_filepath),
+            "pdf_fingerprint": get_fingerprint(pdf_filepath),
+            "pdf_hash": get_file_hash(pdf_filepath),
+        }
+
+    def save(self):
+        """Writes the records to the src directory, if they changed."""
+        if not self.records and not os.path.exists(self.record_filepath):
+            return
+        write_file_if_changed(
+            json.dumps(
+                {"version": self.version, "notebooks": self.records},
+                indent=1,
+                sort_keys=True,
+            ),
+            self.record_filepath,
+        )
+
+    def get_key(self, notebook_filepath):
+        """Returns the path of a notebook relative to the src directory.
+
+        :param notebook_filepath: Path towards the .ipynb file.
+        """
+        return os.path.relpath(notebook_filepath, self.src_dir).replace(os.sep, "/")
+
+
+def get_pdf_filepath(notebook_filepath):
+    """Returns the path of the pdf that nbconvert creates next to a notebook.
+
+    :param notebook_filepath: Path towards the .ipynb file.
+    """
+    return notebook_filepath[: -len(".ipynb")] + ".pdf"
+
+
+def get_notebook_hash(notebook_filepath):
+    """Returns the sha256 hash of the cell types, sources and outputs of a notebook, such that changes in
+    metadata (e.g. execution counts and timestamps) do not make its pdf stale.
+
+    :param notebook_filepath: Path towards the .ipynb file.
+    """
+    with open(notebook_filepath, encoding="utf-8") as f:
+        notebook = json.load(f)
+    cells = []
+    for cell in notebook.get("cells", []):
+        outputs = []
+        for output in cell.get("outputs", []):
+            outputs.append(
+                {
+                    key: value
+                    for key, value in output.items()
+                    if key not in ["execution_count", "metadata"]
+                }
+            )
+        cells.append([cell.get("cell_type"), cell.get("source"), outputs])
+    return hashlib.sha256(json.dumps(cells, sort_keys=True).encode("utf-8")).hexdigest()
+
+
+def get_file_hash(filepath):
+    """Returns the sha256 hash of the content of a file.
+
+    :param filepath: Path towards the file that is hashed.
+    """
+    file_hash = hashlib.sha256()
+    with open(filepath, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            file_hash.update(block)
+    return file_hash.hexdigest()
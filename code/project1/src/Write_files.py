@@ -0,0 +1,103 @@
+# writes generated files atomically and only if their content changed
+import os
+import shutil
+import uuid
+
+
+def write_file_if_changed(text, filepath):
+    """Writes text to a file if the file does not yet contain exactly that text. Returns True if
+    the file was written, and False if the file was left untouched (such that its modification time
+    stays valid for make, latexmk and the Overleaf sync).
+
+    :param text: The content that is being written to file, as a single string.
+    :param filepath: Path towards the file that is being written.
+    """
+    if read_text_if_exists(filepath) == text:
+        return False
+    write_file_atomically(text, filepath)
+    return True
+
+
+def write_file_atomically(text, filepath):
+    """Writes text to a temporary file in the directory of the target file, and then renames it
+    to the target file. An interrupted run therefore leaves either the old or the new file, and
+    never a truncated one.
+
+    :param text: The content that is being written to file, as a single string.
+    :param filepath: Path towards the file that is being written.
+    """
+    temporary_filepath = get_temporary_filepath(filepath)
+    try:
+        with open(temporary_filepath, "x") as f:
+            f.write(text)
+            f.flush()
+            os.fsync(f.fileno())
+        if os.path.exists(filepath):
+            copy_permissions(filepath, temporary_filepath)
+        os.replace(temporary_filepath, filepath)
+    except BaseException:
+        delete_file_if_exists(temporary_filepath)
+        raise
+
+
+def copy_file_atomically(source_filepath, filepath):
+    """Copies a (binary) file to a temporary file in the directory of the target file, and then renames
+    it to the target file, such that readers of the target file never see a partially copied file.
+
+    :param source_filepath: Path towards the file that is being copied.
+    :param filepath: Path towards the file that is being written.
+    """
+    temporary_filepath = get_temporary_filepath(filepath)
+    try:
+        with open(source_filepath, "rb") as source, open(temporary_filepath, "xb") as f:
+            shutil.copyfileobj(source, f)
+            f.flush()
+            os.fsync(f.fileno())
+        if os.path.exists(filepath):
+            copy_permissions(filepath, temporary_filepath)
+        os.replace(temporary_filepath, filepath)
+    except BaseException:
+        delete_file_if_exists(temporary_filepath)
+        raise
+
+
+def read_text_if_exists(filepath):
+    """Returns the content of a file as a single string, or None if the file can not be read.
+
+    :param filepath: Path towards the file that is being read.
+    """
+    try:
+        with open(filepath) as f:
+            return f.read()
+    except (OSError, UnicodeDecodeError):
+        return None
+
+
+def get_temporary_filepath(filepath):
+    """Returns a unique hidden filepath in the same directory as the incoming filepath, such that
+    renaming it onto the incoming filepath stays on the same filesystem.
+
+    :param filepath: Path towards the file that is being written.
+    """
+    directory, filename = os.path.split(filepath)
+    return os.path.join(directory, f".{filename}.{uuid.uuid4().hex}.tmp")
+
+
+def copy_permissions(source_filepath, destination_filepath):
+    """Copies the permission bits of an existing file onto another file.
+
+    :param source_filepath: Path towards the file of which the permissions are copied.
+    :param destination_filepath: Path towards the file that receives the permissions.
+    """
+    os.chmod(destination_filepath, os.stat(source_filepath).st_mode & 0o7777)
+
+
+def delete_file_if_exists(filepath):
+    """Deletes a file if it exists.
+
+    :param filepath: Path towards the file that is being deleted.
+    """
+    try:
+        os.remove(filepath)
+    except FileNotFoundError:
+        pass
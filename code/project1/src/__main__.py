@@ -17,9 +17,6 @@ main.convert_notebooks_to_pdf(project_nr,notebook_names)
 # export the code to latex
 main.export_code_to_latex(project_nr)
 
-# compile the latex report
-main.compile_latex_report(project_nr)
-
 ################################################################
 ############example code to illustrate python-latex  image sync#########
 ##############runs arbitrary genetic algorithm, can be deleted###########
@@ -34,10 +31,20 @@ res = main.do_run_a()
 
 # run a genetic algorithm to create some data for another plot.
 print("now running b")
-main.do4b(project_nr)
+plot_specs = []
+main.do4b(project_nr,plot_specs)
 
 # run a genetic algorithm to create some data for another plot.
 print("now running 4c")
-main.do4c(project_nr)
+main.do4c(project_nr,plot_specs)
+
+# render the plots of 4b and 4c concurrently
+main.render_plots(plot_specs)
+
+# optimize the images of the report, including the plots that were just rendered
+main.optimize_images(project_nr)
+
+# compile the latex report
+main.compile_latex_report(project_nr)
 
 print(f'Done.')
\ No newline at end of file
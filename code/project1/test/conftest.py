@@ -0,0 +1,113 @@
+# fakes and example repositories that are shared by the tests of the modules in src
+import os
+import time
+from unittest import mock
+
+from ..src import Compile_latex as compile_latex_module
+from ..src import Export_code_to_latex as export_module
+from ..src.Export_code_to_latex import export_code_to_latex
+from ..src.Run_command import Command_result
+
+
+class Fake_latex_commands:
+    """Stands in for run_command in Compile_latex, such that the passes can be tested without pdflatex. Each
+    pdflatex pass writes the next of the given .aux contents (the last one is repeated) together with the
+    .fls, .log and .pdf files, pdflatex -ini writes a format and bibtex writes a .bbl file."""
+
+    def __init__(self, aux_contents, exit_status=0, timed_out=False, cancelled=False, bibtex_exit_status=0):
+        self.aux_contents = list(aux_contents)
+        self.exit_status = exit_status
+        self.bibtex_exit_status = bibtex_exit_status
+        self.timed_out = timed_out
+        self.cancelled = cancelled
+        self.commands = []
+
+    def __call__(self, command, cwd=None, environment=None, timeout=None, output_filepath=None, cancel_event=None, echo_output=False, tail_lines=20, output_handler=None):
+        self.commands.append(command)
+        if command[0] == "pdflatex":
+            options = dict(argument[1:].split("=", 1) for argument in command if argument.startswith("-") and "=" in argument)
+            jobname = options.get("jobname", os.path.basename(command[-1])[: -len(".tex")])
+            build_path = os.path.join(cwd, options["output-directory"], jobname)
+            if "-ini" in command:
+                outputs = {".fmt": "format"}
+            else:
+                pass_nr = len(self.get_passes())
+                outputs = {
+                    ".aux": self.aux_contents[min(pass_nr, len(self.aux_contents)) - 1],
+                    ".log": "Output written on main.pdf (1 page, 3 bytes).\n",
+                    ".pdf": "pdf",
+                }
+            outputs[".fls"] = f"PWD {cwd}\nINPUT {command[-1]}\nOUTPUT {build_path}.log\n"
+            for extension, content in outputs.items():
+                with open(build_path + extension, "w") as f:
+                    f.write(content)
+            if not output_handler is None:
+                output_handler(f"({command[-1]})")
+        elif command[0] == "bibtex":
+            with open(os.path.join(cwd, command[1] + ".bbl"), "w") as f:
+                f.write("\\begin{thebibliography}{1}\\end{thebibliography}\n")
+            return Command_result(command, self.bibtex_exit_status, 0.0, False, False, ["I found no \\bibstyle command"])
+        return Command_result(command, self.exit_status, 0.0, self.timed_out, self.cancelled, ["! Fake error."])
+
+    def get_passes(self):
+        """Returns the pdflatex passes that typeset the report, without the format builds."""
+        return [command for command in self.commands if command[0] == "pdflatex" and not "-ini" in command]
+
+    def get_programs(self):
+        """Returns the programs of the commands, with "pdflatex -ini" for the format builds."""
+        return [command[0] + (" -ini" if "-ini" in command else "") for command in self.commands]
+
+
+# creates code/projectN/src with python files and latex/projectN/ with an empty appendices environment
+def create_example_project(root_dir, project_nr, code_filenames=("__main__.py", "Main.py")):
+    os.makedirs(f"{root_dir}/code/project{project_nr}/src")
+    os.makedirs(f"{root_dir}/latex/project{project_nr}/Appendices")
+    for code_filename in code_filenames:
+        write_example_file(f"{root_dir}/code/project{project_nr}/src/{code_filename}", "print(1)\n")
+    write_example_file(
+        f"{root_dir}/latex/project{project_nr}/main.tex",
+        "\\documentclass{article}\n\\begin{document}\n\\begin{appendices}\n\\end{appendices}\n\\end{document}\n",
+    )
+    return f"{root_dir}/code/project{project_nr}/src"
+
+
+# writes a file with a modification time that differs from the previous one, even on coarse clocks
+def write_example_file(filepath, content):
+    with open(filepath, "w") as f:
+        f.write(content)
+    modification_time = time.time() + len(content) % 7
+    os.utime(filepath, (modification_time, modification_time))
+
+
+# exports the code of a project in a repository of which the src directory of project1 is script_dir
+def export_example_project(script_dir, project_nr, **kwargs):
+    with mock.patch.object(export_module, "get_script_dir", return_value=script_dir):
+        export_code_to_latex("main.tex", project_nr, **kwargs)
+
+
+# creates latex/projectN/main.tex that cites from latex/projectN/refs.bib
+def create_example_report(root_dir, body="Text \\cite{a}.", project_nr=1):
+    os.makedirs(f"{root_dir}/code/project{project_nr}/src", exist_ok=True)
+    os.makedirs(f"{root_dir}/latex/project{project_nr}", exist_ok=True)
+    write_example_file(f"{root_dir}/latex/project{project_nr}/refs.bib", "@misc{a, title={A}}\n")
+    write_example_file(
+        f"{root_dir}/latex/project{project_nr}/main.tex",
+        f"\\documentclass{{article}}\n\\begin{{document}}\n{body}\n\\bibliography{{refs}}\n\\end{{document}}\n",
+    )
+
+
+# compiles latex/project1/main.tex of a repository with fake latex commands
+def compile_example_report(root_dir, latex_commands, **kwargs):
+    with mock.patch.object(compile_latex_module.Compile_latex, "get_script_dir", return_value=f"{root_dir}/code/project1/src"):
+        with mock.patch.object(compile_latex_module, "run_command", latex_commands):
+            return compile_latex_module.Compile_latex(1, "main.tex", **kwargs)
+
+
+# returns the appendix files of a project with their contents
+def read_example_appendices(root_dir, project_nr):
+    appendix_dir = f"{root_dir}/latex/project{project_nr}/Appendices"
+    appendices = {}
+    for appendix_filename in sorted(os.listdir(appendix_dir)):
+        with open(f"{appendix_dir}/{appendix_filename}") as f:
+            appendices[appendix_filename] = f.read()
+    return appendices
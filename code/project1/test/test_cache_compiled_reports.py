@@ -0,0 +1,34 @@
+import unittest
+import os
+import tempfile
+from ..src.Cache_compiled_reports import Compile_cache
+
+
+class Test_cache_compiled_reports(unittest.TestCase):
+
+    # tests a cached report is found again when its inputs get their earlier content back
+    def test_compile_cache(self):
+        with tempfile.TemporaryDirectory() as build_dir:
+            input_filepath = f"{build_dir}/chapter.tex"
+            pdf_filepath = f"{build_dir}/main.pdf"
+            for filepath, content in [(input_filepath, "a"), (pdf_filepath, "pdf a")]:
+                with open(filepath, "w") as f:
+                    f.write(content)
+            cache = Compile_cache(f"{build_dir}/cache")
+            cache.add([input_filepath], "main", [pdf_filepath], {"bibliography": None})
+            cache.save()
+
+            with open(input_filepath, "w") as f:
+                f.write("b")
+            self.assertIsNone(Compile_cache(f"{build_dir}/cache").find("main"))
+            with open(input_filepath, "w") as f:
+                f.write("a")
+            self.assertIsNone(Compile_cache(f"{build_dir}/cache").find("other document"))
+            entry = Compile_cache(f"{build_dir}/cache").find("main")
+            self.assertEqual([input_filepath], entry["inputs"])
+            os.makedirs(f"{build_dir}/restored")
+            self.assertEqual([f"{build_dir}/restored/main.pdf"], cache.restore(entry, f"{build_dir}/restored"))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,84 @@
+import unittest
+import concurrent.futures
+import contextlib
+import functools
+import io
+import multiprocessing
+import os
+import tempfile
+from unittest import mock
+from ..src import Compile_all_projects
+from ..src import Compile_latex as compile_latex_module
+from .conftest import Fake_latex_commands, write_example_file, create_example_report
+
+
+class Test_compile_all_projects(unittest.TestCase):
+
+    # tests the status that is reported for each outcome of compiling a project
+    def test_compile_project_status(self):
+        with tempfile.TemporaryDirectory() as root_dir:
+            create_example_report(root_dir, body="Text.")
+            main_tex_filepath = f"{root_dir}/latex/project1/main.tex"
+            with open(main_tex_filepath) as f:
+                main_tex = f.read()
+
+            def compile_project(latex_commands):
+                with mock.patch.object(compile_latex_module.Compile_latex, "get_script_dir", return_value=f"{root_dir}/code/project1/src"):
+                    with mock.patch.object(compile_latex_module, "run_command", latex_commands):
+                        return Compile_all_projects.compile_project(1)
+
+            result = compile_project(Fake_latex_commands(["\\relax\n"]))
+            self.assertEqual("compiled", result.status)
+            self.assertEqual(1, result.report["pages"])
+            self.assertEqual("up to date", compile_project(Fake_latex_commands(["\\relax\n"])).status)
+
+            write_example_file(main_tex_filepath, "\\begin{document}Other text.\\end{document}\n")
+            self.assertEqual("compiled", compile_project(Fake_latex_commands(["\\relax\n"])).status)
+            # the first version is restored from the compile cache
+            write_example_file(main_tex_filepath, main_tex)
+            self.assertEqual("cached", compile_project(Fake_latex_commands(["\\relax\n"])).status)
+
+            for status, latex_commands in [
+                ("failed", Fake_latex_commands(["\\relax\n"], exit_status=1)),
+                ("timed out", Fake_latex_commands(["\\relax\n"], exit_status=-9, timed_out=True)),
+                ("cancelled", Fake_latex_commands(["\\relax\n"], exit_status=-15, cancelled=True)),
+                ("error", mock.Mock(side_effect=RuntimeError("pdflatex crashed"))),
+            ]:
+                write_example_file(main_tex_filepath, f"\\begin{{document}}{status}\\end{{document}}\n")
+                result = compile_project(latex_commands)
+                self.assertEqual(status, result.status)
+                self.assertNotEqual(0, result.exit_status)
+
+
+    # tests the reports of multiple projects are compiled on worker processes, where a failing report does not stop the others
+    @unittest.skipUnless("fork" in multiprocessing.get_all_start_methods(), "the workers inherit the patched latex commands")
+    def test_compile_all(self):
+        def latex_commands(command, cwd=None, *args, **kwargs):
+            failing = any(argument.startswith("latex/project2/") for argument in command)
+            return Fake_latex_commands(["\\relax\n"], exit_status=1 if failing else 0)(command, cwd, *args, **kwargs)
+
+        with tempfile.TemporaryDirectory() as root_dir:
+            for project_nr in [1, 2]:
+                create_example_report(root_dir, body="Text.", project_nr=project_nr)
+            # the workers are forked, such that they inherit the patched latex commands
+            process_pool = functools.partial(concurrent.futures.ProcessPoolExecutor, mp_context=multiprocessing.get_context("fork"))
+            output = io.StringIO()
+            with mock.patch.object(compile_latex_module.Compile_latex, "get_script_dir", return_value=f"{root_dir}/code/project1/src"):
+                with mock.patch.object(compile_latex_module, "run_command", latex_commands):
+                    with mock.patch.object(concurrent.futures, "ProcessPoolExecutor", process_pool):
+                        with contextlib.redirect_stdout(output):
+                            results = Compile_all_projects.compile_all([1, 2], max_workers=2)
+
+            self.assertEqual({1: "compiled", 2: "failed"}, {project_nr: result.status for project_nr, result in results.items()})
+            self.assertEqual([0, 1], [results[project_nr].exit_status for project_nr in [1, 2]])
+            self.assertTrue(os.path.isfile(f"{root_dir}/latex/project1/main.pdf"))
+            self.assertFalse(os.path.exists(f"{root_dir}/latex/project2/main.pdf"))
+            summary = output.getvalue().splitlines()
+            self.assertTrue(summary[0].startswith("project1: compiled in "))
+            self.assertIn("1 pages, 0 warnings", summary[0])
+            self.assertTrue(summary[1].startswith("project2: failed in "))
+            self.assertEqual("Compiled 2 reports, 1 failed.", summary[2])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,137 @@
+import unittest
+import os
+import tempfile
+from .conftest import Fake_latex_commands, write_example_file, create_example_report, compile_example_report
+
+
+class Test_compile_latex(unittest.TestCase):
+
+    # tests the report is compiled until its auxiliary files stop changing, with bibtex after the first pass
+    def test_compile_latex_fixpoint(self):
+        with tempfile.TemporaryDirectory() as root_dir:
+            create_example_report(root_dir)
+            cited = "\\citation{a}\n\\bibdata{refs}\n"
+            latex_commands = Fake_latex_commands([cited, cited + "\\bibcite{a}{1}\n"])
+            compile_latex = compile_example_report(root_dir, latex_commands)
+
+            self.assertEqual(["pdflatex", "bibtex", "pdflatex", "pdflatex"], latex_commands.get_programs())
+            self.assertEqual(0, compile_latex.exit_status)
+            self.assertEqual(1, compile_latex.report.pages)
+            self.assertEqual(3, len(compile_latex.report.pass_durations))
+            with open(f"{root_dir}/latex/project1/main.pdf") as f:
+                self.assertEqual("pdf", f.read())
+
+            # auxiliary files that keep changing stop after max_passes
+            write_example_file(f"{root_dir}/latex/project1/main.tex", "\\begin{document}changed\\end{document}\n")
+            latex_commands = Fake_latex_commands([str(pass_nr) for pass_nr in range(10)])
+            compile_example_report(root_dir, latex_commands, max_passes=3)
+            self.assertEqual(["pdflatex"] * 3, latex_commands.get_programs())
+
+
+    # tests the auxiliary files are written to the build directory, and an unchanged report is not compiled again
+    def test_compile_latex_skips_unchanged_report(self):
+        with tempfile.TemporaryDirectory() as root_dir:
+            create_example_report(root_dir)
+            cited = "\\citation{a}\n\\bibdata{refs}\n"
+            compile_example_report(root_dir, Fake_latex_commands([cited]))
+            for filename in ["main.aux", "main.bbl", "main.log", "compile_state.json"]:
+                self.assertTrue(os.path.isfile(f"{root_dir}/latex/project1/build/{filename}"))
+            self.assertFalse(os.path.exists(f"{root_dir}/latex/project1/main.aux"))
+
+            latex_commands = Fake_latex_commands([cited])
+            compile_latex = compile_example_report(root_dir, latex_commands)
+            self.assertTrue(compile_latex.is_up_to_date)
+            self.assertEqual([], latex_commands.commands)
+
+            # an edit of the body is compiled again, without bibtex as the bibliography did not change
+            write_example_file(f"{root_dir}/latex/project1/main.tex", "\\begin{document}Edited \\cite{a}.\\end{document}\n")
+            latex_commands = Fake_latex_commands([cited])
+            compile_latex = compile_example_report(root_dir, latex_commands)
+            self.assertFalse(compile_latex.is_up_to_date)
+            # the .aux file of the previous compilation is unchanged by the first pass, so one pass suffices
+            self.assertEqual(["pdflatex"], latex_commands.get_programs())
+
+            # an edit of the .bib file runs bibtex again
+            write_example_file(f"{root_dir}/latex/project1/refs.bib", "@misc{a, title={B}}\n")
+            latex_commands = Fake_latex_commands([cited])
+            compile_example_report(root_dir, latex_commands)
+            self.assertEqual(["pdflatex", "bibtex", "pdflatex", "pdflatex"], latex_commands.get_programs())
+
+
+    # tests the precompiled format is built once, and only rebuilt when the preamble changes
+    def test_compile_latex_format(self):
+        with tempfile.TemporaryDirectory() as root_dir:
+            create_example_report(root_dir, body="Text.")
+            main_tex_filepath = f"{root_dir}/latex/project1/main.tex"
+            latex_commands = Fake_latex_commands(["\\relax\n"])
+            compile_example_report(root_dir, latex_commands, use_format=True)
+            self.assertEqual(["pdflatex -ini"], latex_commands.get_programs()[:1])
+            self.assertEqual(1, latex_commands.get_programs().count("pdflatex -ini"))
+            for command in latex_commands.get_passes():
+                self.assertIn("-fmt=latex/project1/build/main_preamble", command)
+            self.assertTrue(os.path.isfile(f"{root_dir}/latex/project1/build/main_preamble.fmt"))
+
+            # an edit of the body reuses the format
+            write_example_file(main_tex_filepath, "\\documentclass{article}\n\\begin{document}\nEdited.\n\\end{document}\n")
+            latex_commands = Fake_latex_commands(["\\relax\n"])
+            compile_example_report(root_dir, latex_commands, use_format=True)
+            self.assertNotIn("pdflatex -ini", latex_commands.get_programs())
+            for command in latex_commands.get_passes():
+                self.assertIn("-fmt=latex/project1/build/main_preamble", command)
+
+            # an edit of the preamble rebuilds the format
+            write_example_file(main_tex_filepath, "\\documentclass{report}\n\\begin{document}\nEdited.\n\\end{document}\n")
+            latex_commands = Fake_latex_commands(["\\relax\n"])
+            compile_example_report(root_dir, latex_commands, use_format=True)
+            self.assertEqual(1, latex_commands.get_programs().count("pdflatex -ini"))
+
+
+    # tests a preview only typesets the changed chapter, and the whole report if nothing changed since the last build
+    def test_compile_latex_preview(self):
+        with tempfile.TemporaryDirectory() as root_dir:
+            create_example_report(root_dir, body="\\input{latex/project1/Chapters/one.tex}\n\\input{latex/project1/Chapters/two.tex}")
+            os.makedirs(f"{root_dir}/latex/project1/Chapters")
+            for chapter in ["one", "two"]:
+                write_example_file(f"{root_dir}/latex/project1/Chapters/{chapter}.tex", f"\\section{{{chapter}}}\n")
+            preview_filepath = f"{root_dir}/latex/project1/build/main_preview.tex"
+            compile_example_report(root_dir, Fake_latex_commands(["\\relax\n"]))
+
+            latex_commands = Fake_latex_commands(["\\relax\n"])
+            compile_example_report(root_dir, latex_commands, preview=True)
+            self.assertEqual("latex/project1/build/main_preview.tex", latex_commands.get_passes()[0][-1])
+            with open(preview_filepath) as f:
+                self.assertIn("\\includeonly{latex/project1/Chapters/one,latex/project1/Chapters/two}", f.read())
+            self.assertTrue(os.path.isfile(f"{root_dir}/latex/project1/main_preview.pdf"))
+
+            write_example_file(f"{root_dir}/latex/project1/Chapters/two.tex", "\\section{edited}\n")
+            latex_commands = Fake_latex_commands(["\\relax\n"])
+            compile_example_report(root_dir, latex_commands, preview=True)
+            self.assertEqual(["pdflatex"], latex_commands.get_programs())
+            with open(preview_filepath) as f:
+                self.assertIn("\\includeonly{latex/project1/Chapters/two}", f.read())
+
+
+    # tests a failing bibtex fails the compilation, while bibtex warnings do not
+    def test_compile_latex_bibtex_failure(self):
+        with tempfile.TemporaryDirectory() as root_dir:
+            create_example_report(root_dir)
+            cited = "\\citation{a}\n\\bibdata{refs}\n"
+            latex_commands = Fake_latex_commands([cited], bibtex_exit_status=2)
+            compile_latex = compile_example_report(root_dir, latex_commands)
+            self.assertEqual(["pdflatex", "bibtex"], latex_commands.get_programs())
+            self.assertEqual(2, compile_latex.exit_status)
+            self.assertEqual("bibtex", compile_latex.exit_program)
+            self.assertIn("bibtex exited with status 2, see", compile_latex.report.errors[0])
+            self.assertFalse(os.path.exists(f"{root_dir}/latex/project1/main.pdf"))
+            self.assertFalse(os.path.exists(f"{root_dir}/latex/project1/build/compile_state.json"))
+
+            # the bibliography is run again, and its warnings do not fail the compilation
+            latex_commands = Fake_latex_commands([cited], bibtex_exit_status=1)
+            compile_latex = compile_example_report(root_dir, latex_commands)
+            self.assertEqual(["pdflatex", "bibtex", "pdflatex", "pdflatex"], latex_commands.get_programs())
+            self.assertEqual(0, compile_latex.exit_status)
+            self.assertTrue(os.path.isfile(f"{root_dir}/latex/project1/main.pdf"))
+
+
+if __name__ == "__main__":
+    unittest.main()
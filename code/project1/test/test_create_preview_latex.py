@@ -0,0 +1,36 @@
+import unittest
+import os
+import tempfile
+from ..src.Create_preview_latex import create_preview_latex, get_report_units
+
+
+class Test_create_preview_latex(unittest.TestCase):
+
+    # tests the preview includes the chapters of the branch that is taken with \include, and typesets only the given ones
+    def test_create_preview_latex(self):
+        with tempfile.TemporaryDirectory() as root_dir:
+            os.makedirs(f"{root_dir}/latex/project1/Chapters")
+            for filename in ["main.tex", "Chapters/a.tex", "Chapters/b.tex"]:
+                with open(f"{root_dir}/latex/project1/{filename}", "w") as f:
+                    f.write("")
+            main_tex_code = "\n".join([
+                "\\documentclass{article}",
+                "\\input{latex/project1/preamble.tex}",
+                "\\begin{document}",
+                "\\IfFileExists{latex/project1/main.tex}{\\input{latex/project1/Chapters/a.tex}",
+                "\\input{latex/project1/Chapters/b}",
+                "}{\\input{Chapters/a.tex}}",
+                "\\end{document}",
+            ])
+            units = get_report_units(main_tex_code, root_dir)
+            preview_lines = create_preview_latex(main_tex_code, units, ["latex/project1/Chapters/b.tex"], root_dir).splitlines()
+
+        self.assertEqual(["latex/project1/Chapters/a.tex", "latex/project1/Chapters/b.tex"], units)
+        self.assertIn("\\includeonly{latex/project1/Chapters/b}", preview_lines)
+        self.assertIn("\\IfFileExists{latex/project1/main.tex}{\\include{latex/project1/Chapters/a}", preview_lines)
+        self.assertIn("}{\\input{Chapters/a.tex}}", preview_lines)
+        self.assertLess(preview_lines.index("\\PassOptionsToPackage{draft}{graphicx}"), preview_lines.index("\\documentclass{article}"))
+
+
+if __name__ == "__main__":
+    unittest.main()
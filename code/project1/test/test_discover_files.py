@@ -0,0 +1,23 @@
+import unittest
+import os
+import tempfile
+from ..src.Discover_files import File_discovery
+
+
+class Test_discover_files(unittest.TestCase):
+
+    # tests the file discovery skips ignored directories and .gitignore patterns
+    def test_file_discovery_prunes_ignored_files(self):
+        with tempfile.TemporaryDirectory() as src_dir:
+            for relative_path in ["Main.py", "__pycache__/Main.py", "data/generated.py", "venv2/pyvenv.cfg", "venv2/lib.py", "sub/Plot_to_tex.py"]:
+                os.makedirs(os.path.dirname(f"{src_dir}/{relative_path}"), exist_ok=True)
+                open(f"{src_dir}/{relative_path}", "w").close()
+            with open(f"{src_dir}/.gitignore", "w") as f:
+                f.write("data/\n")
+            filepaths = File_discovery().get_filenames_in_dir(".py", src_dir)
+
+            self.assertEqual([f"{src_dir}/Main.py", f"{src_dir}/sub/Plot_to_tex.py"], filepaths)
+
+
+if __name__ == "__main__":
+    unittest.main()
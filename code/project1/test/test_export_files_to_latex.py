@@ -1,7 +1,12 @@
 import unittest
 import os
+import tempfile
+from unittest import mock
 from ..src.Main import Main
 from ..src.Export_code_to_latex import *
+from ..src import Export_code_to_latex as export_module
+from ..src import Export_all_projects
+from .conftest import create_example_project, write_example_file, export_example_project, read_example_appendices
 import testbook
 
 class Test_main(unittest.TestCase):
@@ -27,14 +32,214 @@ class Test_main(unittest.TestCase):
         self.assertEqual(expected_result,result)
 	    
         
-    def check_if_appendix_contains_file(self):
-        filepaths = ['/home/username/Documents/git/Code-LatexReportTemplate/code/project1/src/Main.py']
-        root_dir = '/home/username/Documents/git/Code-LatexReportTemplate/'
-        appendix_content = ["\section{Appendix Main.py}\label{app:2}","\pythonexternal{latex/project1/../../code/project1/src/Main.py}"]
-        project_nr = 1
-        result = check_if_appendix_contains_file(filepath, appendix_content, project_nr, root_dir)
-        expected_result = 1 #expect the command to be in line number 1.
-        self.assertEqual(result,expected_result)
+    # tests the appendix index resolves the appendices that include a code file
+    def test_appendix_index_finds_included_code(self):
+        with tempfile.TemporaryDirectory() as appendix_dir:
+            appendix_dir = appendix_dir + "/"
+            with open(appendix_dir + "AppA.tex", "w") as f:
+                f.write("\\section{Appendix Main.py}\\label{app:2}\n")
+                f.write("\\pythonexternal{latex/project1/../../code/project1/src/Main.py}\n")
+            with open(appendix_dir + "AppB.tex", "w") as f:
+                f.write("%\\pythonexternal{latex/project1/../../code/project1/src/Plot_to_tex.py}\n")
+            appendix_index = Appendix_index(appendix_dir)
+            root_dir = "/home/username/Code-LatexReportTemplate/"
+            code_filepaths = [f"{root_dir}code/project1/src/Main.py", f"{root_dir}code/project1/src/Plot_to_tex.py"]
+            contained_codes = get_code_files_already_included_in_appendices(code_filepaths, appendix_dir, ".py", 1, root_dir, appendix_index)
+
+            self.assertEqual([code_filepaths[0]], [code.code_filepath for code in contained_codes])
+            self.assertEqual(1, contained_codes[0].file_line_nr)
+            self.assertEqual(1, len(appendix_index.get_appendices_of_type("python")))
+            self.assertEqual(1, len(appendix_index.get_appendices_of_type("no_code")))
+
+    # tests appendices of deleted code files are left out, and deleted if they were auto generated
+    def test_deactivate_orphaned_appendices(self):
+        with tempfile.TemporaryDirectory() as root_dir:
+            root_dir = root_dir + "/"
+            appendix_dir = f"{root_dir}latex/project1/Appendices/"
+            os.makedirs(appendix_dir)
+            os.makedirs(f"{root_dir}code/project1/src")
+            open(f"{root_dir}code/project1/src/Main.py", "w").close()
+            for appendix_filename, code_filename in [("AppB.tex", "Main.py"), ("AppC.tex", "Deleted.py"), ("Auto_generated_py_App0.tex", "Renamed.py")]:
+                with open(appendix_dir + appendix_filename, "w") as f:
+                    f.write(f"\\pythonexternal{{latex/project1/../../code/project1/src/{code_filename}}}\n")
+            appendix_index = Appendix_index(appendix_dir)
+            orphaned_appendix_filepaths = deactivate_orphaned_appendices(appendix_index, [root_dir])
+
+            self.assertEqual(["AppC.tex", "Auto_generated_py_App0.tex"], sorted(map(get_filename_from_dir, orphaned_appendix_filepaths)))
+            self.assertEqual(["AppB.tex"], [appendix.appendix_filename for appendix in appendix_index.appendices])
+            self.assertTrue(os.path.isfile(appendix_dir + "AppC.tex"))
+            self.assertFalse(os.path.isfile(appendix_dir + "Auto_generated_py_App0.tex"))
+
+    # tests an unchanged project is skipped, and that adding a code file only adds its appendix
+    def test_export_manifest(self):
+        with tempfile.TemporaryDirectory() as root_dir:
+            script_dir = create_example_project(root_dir, 1)
+            main_filepath = f"{root_dir}/latex/project1/main.tex"
+            export_example_project(script_dir, 1)
+            self.assertTrue(os.path.isfile(f"{root_dir}/latex/project1/.export_manifest.json"))
+            appendices = read_example_appendices(root_dir, 1)
+            self.assertEqual(["Auto_generated_py_App0.tex", "Auto_generated_py_App1.tex"], list(appendices))
+            main_modification_time = os.stat(main_filepath).st_mtime_ns
+
+            with mock.patch.object(export_module, "create_appendices_with_code") as create_appendices:
+                export_example_project(script_dir, 1)
+            create_appendices.assert_not_called()
+            self.assertEqual(main_modification_time, os.stat(main_filepath).st_mtime_ns)
+
+            write_example_file(f"{script_dir}/Added.py", "print(2)\n")
+            export_example_project(script_dir, 1)
+            added_appendices = read_example_appendices(root_dir, 1)
+            self.assertEqual(appendices, {name: added_appendices[name] for name in appendices})
+            self.assertIn("code/project1/src/Added.py", added_appendices["Auto_generated_py_App2.tex"])
+            with open(main_filepath) as f:
+                self.assertIn("Auto_generated_py_App2.tex", f.read())
+
+    # tests the appendix of a deleted code file is not reported as including that file on the next export
+    def test_export_manifest_after_deleted_appendix(self):
+        with tempfile.TemporaryDirectory() as root_dir:
+            script_dir = create_example_project(root_dir, 1, ("__main__.py", "Main.py", "Old.py"))
+            export_example_project(script_dir, 1)
+            os.remove(f"{script_dir}/Old.py")
+            write_example_file(f"{script_dir}/New.py", "print(3)\n")
+            export_example_project(script_dir, 1)
+            appendices = read_example_appendices(root_dir, 1)
+
+            self.assertEqual(3, len(appendices))
+            self.assertFalse(any("Old.py" in content for content in appendices.values()))
+            self.assertEqual(1, sum("New.py" in content for content in appendices.values()))
+
+
+    # tests the projects that are exported in one run each include only their own code
+    def test_export_code_of_projects(self):
+        with tempfile.TemporaryDirectory() as root_dir:
+            script_dir = create_example_project(root_dir, 1)
+            create_example_project(root_dir, 2, ("__main__.py", "Other.py"))
+            os.makedirs(f"{root_dir}/code/project3/src")
+            with mock.patch.object(export_module, "get_script_dir", return_value=script_dir):
+                with mock.patch.object(Export_all_projects, "get_script_dir", return_value=script_dir):
+                    self.assertEqual([1, 2], Export_all_projects.get_project_nrs())
+                    self.assertEqual({1: None, 2: None}, Export_all_projects.export_code_of_projects(max_workers=2))
+
+            for project_nr, other_project_nr in [(1, 2), (2, 1)]:
+                with open(f"{root_dir}/latex/project{project_nr}/main.tex") as f:
+                    latex_code = f.read() + "".join(read_example_appendices(root_dir, project_nr).values())
+                self.assertIn(f"latex/project{project_nr}/Appendices/Auto_generated_py_App1.tex", latex_code)
+                self.assertIn(f"code/project{project_nr}/src/__main__.py", latex_code)
+                self.assertNotIn(f"project{other_project_nr}", latex_code)
+
+
+    # tests the export options are passed on by Main and by the export of multiple projects
+    def test_export_options_of_main(self):
+        with tempfile.TemporaryDirectory() as root_dir:
+            script_dir = create_example_project(root_dir, 1, ("Main.py",))
+            create_example_project(root_dir, 2, ("Main.py",))
+            with mock.patch.object(export_module, "get_script_dir", return_value=script_dir):
+                Main().export_code_to_latex(1, build_root="root")
+                with mock.patch.object(Export_all_projects, "get_script_dir", return_value=script_dir):
+                    self.assertEqual({2: None}, Main().export_code_of_projects([2], build_root="project"))
+            self.assertEqual(
+                "\\pythonexternal{latex/project1/../../code/project1/src/Main.py}",
+                read_example_appendices(root_dir, 1)["Auto_generated_py_App0.tex"].splitlines()[-1],
+            )
+            self.assertEqual(
+                "\\pythonexternal{../../code/project2/src/Main.py}",
+                read_example_appendices(root_dir, 2)["Auto_generated_py_App0.tex"].splitlines()[-1],
+            )
+
+
+    # tests the highlighted listings are refused for a report that does not define \pythonhighlighted
+    def test_export_highlighted_code_requires_definition(self):
+        with tempfile.TemporaryDirectory() as root_dir:
+            script_dir = create_example_project(root_dir, 1)
+            with self.assertRaises(ValueError):
+                export_example_project(script_dir, 1, highlight_code=True)
+            self.assertEqual({}, read_example_appendices(root_dir, 1))
+
+
+    # tests the existing appendices switch to the highlighted code when it is turned on, and back when it is turned off
+    def test_export_switches_highlight_code(self):
+        with tempfile.TemporaryDirectory() as root_dir:
+            script_dir = create_example_project(root_dir, 1, ("Main.py",))
+            export_example_project(script_dir, 1)
+            self.assertIn("\\pythonexternal", read_example_appendices(root_dir, 1)["Auto_generated_py_App0.tex"])
+
+            main_tex_filepath = f"{root_dir}/latex/project1/main.tex"
+            with open(main_tex_filepath) as f:
+                main_tex = f.read()
+            write_example_file(main_tex_filepath, main_tex.replace("\\begin{document}", "\\newcommand\\pythonhighlighted[2]{\\input{#1}}\n\\begin{document}"))
+            export_example_project(script_dir, 1, highlight_code=True)
+            appendices = read_example_appendices(root_dir, 1)
+            self.assertEqual(["Auto_generated_py_App0.tex"], list(appendices))
+            self.assertIn("\\pythonhighlighted", appendices["Auto_generated_py_App0.tex"])
+            self.assertNotIn("\\pythonexternal", appendices["Auto_generated_py_App0.tex"])
+            self.assertTrue(os.path.isfile(f"{root_dir}/latex/project1/Highlighted_code/code/project1/src/Main.py.tex"))
+
+            export_example_project(script_dir, 1)
+            self.assertIn("\\pythonexternal", read_example_appendices(root_dir, 1)["Auto_generated_py_App0.tex"])
+
+
+    # tests the appendix records only keep paths and line numbers, and read their content when it is requested
+    def test_appendix_reads_content_lazily(self):
+        with tempfile.TemporaryDirectory() as appendix_dir:
+            appendix_filepath = f"{appendix_dir}/AppA.tex"
+            with open(appendix_filepath, "w") as f:
+                f.write("\\section{Appendix Main.py}\n\\pythonexternal{latex/project1/../../code/project1/src/Main.py}\n")
+            appendix = Appendix_index(appendix_dir + "/").get_appendices_of_type("python")[0]
+
+            self.assertFalse(hasattr(appendix, "__dict__"))
+            with self.assertRaises(AttributeError):
+                appendix.appendix_content = []
+            self.assertEqual(("Main.py", 1), (appendix.code_filename, appendix.appendix_inclusion_line_nr))
+            with open(appendix_filepath, "w") as f:
+                f.write("\\section{Appendix Main.py}\n\\pythonexternal{changed}\n")
+            self.assertEqual("\\pythonexternal{changed}\n", appendix.appendix_inclusion_line)
+
+
+    # tests switching an exported project to a build root leaves a single inclusion in each appendix
+    def test_export_switches_build_root(self):
+        with tempfile.TemporaryDirectory() as root_dir:
+            script_dir = create_example_project(root_dir, 1)
+            write_example_file(f"{script_dir}/notebook.ipynb", "{}")
+            write_example_file(f"{script_dir}/notebook.pdf", "pdf")
+            export_example_project(script_dir, 1, stale_notebook_pdfs="ignore")
+            appendices = read_example_appendices(root_dir, 1)
+            self.assertEqual(3, len(appendices))
+            self.assertEqual([2, 2, 2], [content.count("\\pythonexternal") + content.count("\\includepdf") for content in appendices.values()])
+
+            export_example_project(script_dir, 1, stale_notebook_pdfs="ignore", build_root="root")
+            appendices = read_example_appendices(root_dir, 1)
+            self.assertEqual(3, len(appendices))
+            for content in appendices.values():
+                self.assertEqual(1, content.count("\\pythonexternal") + content.count("\\includepdf"))
+                self.assertNotIn("\\IfFileExists", content)
+                self.assertIn("{latex/project1/../../code/project1/src/", content)
+            with open(f"{root_dir}/latex/project1/main.tex") as f:
+                main_tex_code = f.read()
+            self.assertNotIn("\\IfFileExists", main_tex_code)
+            self.assertEqual(3, main_tex_code.count("\\input{latex/project1/Appendices/Auto_generated_"))
+
+
+    # tests an unchanged project reports its stale notebook pdfs from the manifest, without checking them again
+    def test_export_caches_stale_notebook_pdfs(self):
+        with tempfile.TemporaryDirectory() as root_dir:
+            script_dir = create_example_project(root_dir, 1)
+            write_example_file(f"{script_dir}/notebook.pdf", "pdf")
+            write_example_file(f"{script_dir}/notebook.ipynb", "{ }")
+            with self.assertLogs(export_module.logger, level="WARNING"):
+                export_example_project(script_dir, 1)
+
+            with mock.patch.object(export_module, "get_stale_notebook_pdf_paths") as get_stale_paths:
+                with self.assertLogs(export_module.logger, level="WARNING") as logs:
+                    export_example_project(script_dir, 1)
+                with self.assertRaises(ValueError):
+                    export_example_project(script_dir, 1, stale_notebook_pdfs="error")
+            get_stale_paths.assert_not_called()
+            self.assertIn("notebook.pdf", logs.output[0])
+
+            # a pdf that is newer than its notebook without a recorded conversion is up to date
+            notebook_modification_time = os.stat(f"{script_dir}/notebook.ipynb").st_mtime
+            os.utime(f"{script_dir}/notebook.pdf", (notebook_modification_time + 10, notebook_modification_time + 10))
+            export_example_project(script_dir, 1, stale_notebook_pdfs="error")
  
  
 if __name__ == '__main__':
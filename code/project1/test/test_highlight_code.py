@@ -0,0 +1,64 @@
+import unittest
+import os
+import tempfile
+from unittest import mock
+from ..src import Highlight_code as highlight_code_module
+from ..src.Highlight_code import get_code_chunks, highlight_code_file
+
+
+class Test_highlight_code(unittest.TestCase):
+
+    # tests large python files are split into chunks at the start of functions
+    def test_get_code_chunks(self):
+        code = "import os\n\n\ndef a():\n    return 1\n\n\n@staticmethod\ndef b():\n    return 2\n"
+
+        self.assertEqual([(1, 10)], get_code_chunks(code))
+        self.assertEqual([(1, 3), (4, 7), (8, 10)], get_code_chunks(code, 4))
+        self.assertEqual([(1, 2), (3, 4), (5, 5)], get_code_chunks("x = (\n1,\n2,\n3,\n4)\n", 2))
+
+
+    # tests the highlighted fragment of a python file is only rendered again when the file changes
+    def test_highlight_code_file(self):
+        with tempfile.TemporaryDirectory() as directory:
+            code_filepath = f"{directory}/Main.py"
+            fragment_filepath = f"{directory}/Highlighted_code/Main.py.tex"
+            with open(code_filepath, "w") as f:
+                f.write("def a():\n    return 1\n")
+            self.assertTrue(highlight_code_file(code_filepath, fragment_filepath))
+            with open(fragment_filepath) as f:
+                fragment = f.read()
+            self.assertTrue(fragment.startswith("% sha256 "))
+            self.assertIn("\\begin{Verbatim}", fragment)
+            self.assertIn("\\PY{k}{def}", fragment)
+
+            os.utime(fragment_filepath, ns=(1, 1))
+            with mock.patch.object(highlight_code_module, "render_highlighted_code") as render:
+                self.assertFalse(highlight_code_file(code_filepath, fragment_filepath))
+            render.assert_not_called()
+            self.assertEqual(1, os.stat(fragment_filepath).st_mtime_ns)
+
+
+    # tests the listing chunks follow the line ranges of the code, and the highlighted chunks are reused by content
+    def test_highlight_code_file_chunks(self):
+        with tempfile.TemporaryDirectory() as directory:
+            code_filepath = f"{directory}/Main.py"
+            fragment_filepath = f"{directory}/Main.py.tex"
+            code = "def a():\n    return 1\n\n\ndef b():\n    return 2\n"
+            with open(code_filepath, "w") as f:
+                f.write("import os\n" + code)
+            highlight_code_file(code_filepath, fragment_filepath, False, 4)
+            with open(fragment_filepath) as f:
+                self.assertIn("\\pythonexternal[firstline=2,lastline=5]{\\pythoncodepath}\n\\pythonexternal[firstline=6,lastline=7]", f.read())
+
+            with open(code_filepath, "w") as f:
+                f.write(code)
+            highlight_code_file(code_filepath, f"{directory}/highlighted.tex", True, 4)
+            with open(code_filepath, "w") as f:
+                f.write("import os\n" + code)
+            with mock.patch.object(highlight_code_module, "render_highlighted_code", return_value="new\n") as render:
+                highlight_code_file(code_filepath, f"{directory}/highlighted.tex", True, 4)
+            render.assert_called_once_with("import os\n")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,24 @@
+import unittest
+import logging
+from ..src.Log_export import Phase_timer
+
+
+class Test_log_export(unittest.TestCase):
+
+    # tests the phase timer logs each phase at DEBUG level and a summary of all phases at INFO level
+    def test_phase_timer(self):
+        with self.assertLogs("phase_timer_test", level="DEBUG") as logs:
+            timer = Phase_timer("project1", logging.getLogger("phase_timer_test"))
+            timer.start_phase("discover")
+            timer.start_phase("write")
+            timer.start_phase("discover")
+            durations = timer.stop("created 2 appendices")
+
+        self.assertEqual(["discover", "write"], list(durations))
+        self.assertEqual(["DEBUG", "DEBUG", "DEBUG", "INFO"], [record.levelname for record in logs.records])
+        self.assertTrue(logs.records[-1].getMessage().startswith("project1: created 2 appendices in "))
+        self.assertIn("discover ", logs.records[-1].getMessage())
+
+
+if __name__ == "__main__":
+    unittest.main()
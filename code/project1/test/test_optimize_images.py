@@ -0,0 +1,27 @@
+import unittest
+import tempfile
+from ..src.Optimize_images import Image_optimizer
+
+
+class Test_optimize_images(unittest.TestCase):
+
+    # tests the images are optimized without changing their pixels, and only once
+    def test_image_optimizer(self):
+        from PIL import Image
+
+        with tempfile.TemporaryDirectory() as image_dir:
+            image = Image.new("RGBA", (300, 200), (255, 255, 255, 255))
+            image.paste((0, 0, 255, 255), (10, 10, 100, 100))
+            image.save(f"{image_dir}/plot.png")
+            Image.new("RGB", (3000, 100)).save(f"{image_dir}/wide.png", dpi=(600, 600))
+
+            self.assertEqual(["plot.png", "wide.png"], sorted(Image_optimizer(image_dir, max_dpi=100, print_width=6).optimize_all()))
+            self.assertEqual({}, Image_optimizer(image_dir, max_dpi=100, print_width=6).optimize_all())
+            with Image.open(f"{image_dir}/plot.png") as optimized:
+                self.assertEqual(list(image.getdata()), list(optimized.convert("RGBA").getdata()))
+            with Image.open(f"{image_dir}/wide.png") as optimized:
+                self.assertEqual((600, 20), optimized.size)
+
+
+if __name__ == "__main__":
+    unittest.main()
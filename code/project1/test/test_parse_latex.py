@@ -0,0 +1,43 @@
+import unittest
+from ..src.Parse_latex import tokenize_latex
+
+
+class Test_parse_latex(unittest.TestCase):
+
+    # tests the tokenizer skips comments and records the \IfFileExists branch of each command
+    def test_tokenize_latex(self):
+        lines = [
+            "\\IfFileExists{latex/project1/main.tex}{\\input{latex/project1/Appendices/AppAB.tex} \\newpage\n",
+            "%\\input{latex/project1/Appendices/AppA.tex} \\newpage\n",
+            "}{\\input{Appendices/AppAB.tex} 50\\% % \\input{Appendices/AppA.tex}\n",
+            "}\\end{appendices}\n",
+        ]
+        commands = tokenize_latex(lines, ["input"])
+
+        self.assertEqual(["latex/project1/Appendices/AppAB.tex", "Appendices/AppAB.tex"], [command.argument for command in commands])
+        self.assertEqual([0, 2], [command.line_nr for command in commands])
+        self.assertEqual(((("latex/project1/main.tex", True),), (("latex/project1/main.tex", False),)), tuple(command.conditions for command in commands))
+
+
+    # tests the arguments of a command may follow on the next line or after a comment, but not after a blank line
+    def test_tokenize_latex_arguments_on_next_line(self):
+        lines = [
+            "\\input\n",
+            "{chapter}\n",
+            "\\pythonhighlighted{fragment}%\n",
+            "  {code.py}\n",
+            "\\input\n",
+            "\n",
+            "{not_an_argument}\n",
+            "\\IfFileExists{main.tex}\n",
+            "{\\include{last}}{}\n",
+        ]
+        commands = tokenize_latex(lines)
+
+        self.assertEqual([["chapter"], ["fragment", "code.py"], ["main.tex"], ["last"]], [command.arguments for command in commands])
+        self.assertEqual([0, 2, 7, 8], [command.line_nr for command in commands])
+        self.assertEqual((("main.tex", True),), commands[3].conditions)
+
+
+if __name__ == "__main__":
+    unittest.main()
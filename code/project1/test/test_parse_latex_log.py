@@ -0,0 +1,31 @@
+import unittest
+from ..src.Parse_latex_log import add_file_durations, parse_latex_log
+
+
+class Test_parse_latex_log(unittest.TestCase):
+
+    # tests the problems and statistics are read from a pdflatex log, and the time is attributed to the open files
+    def test_parse_latex_log(self):
+        log = "\n".join([
+            "LaTeX Warning: Reference `fig:a' on page 2 undefined on input line 12.",
+            "Package hyperref Warning: Token not allowed in a PDF string (Unicode):",
+            "(hyperref)                removing `math shift' on input line 20.",
+            "Overfull \\hbox (12.5pt too wide) in paragraph at lines 30--31",
+            "Output written on latex/project1/build/main.pdf (12 pages, 3456 bytes).",
+        ])
+        report = parse_latex_log(log)
+
+        self.assertEqual(2, len(report.warnings))
+        self.assertTrue(report.warnings[1].endswith("removing `math shift' on input line 20."))
+        self.assertEqual([{"kind": "Reference", "key": "fig:a", "page": 2}], report.undefined_references)
+        self.assertEqual(12.5, report.overfull_boxes[0]["size"])
+        self.assertEqual((12, 3456), (report.pages, report.output_size))
+
+        # pdflatex wraps the name of x.yyy...sty after 79 characters
+        output = [(1.0, "(./main.tex (/tex/article.cls (see the transcript)"), (3.0, ")\n(./x"), (4.0, "." + "y" * 74 + "\n.sty)"), (6.0, ")")]
+        durations = add_file_durations(output, 0.0, 7.0, {})
+        self.assertEqual({"(startup)": 1.0, "./main.tex": 2.0, "/tex/article.cls": 2.0, "./x." + "y" * 74 + ".sty": 1.0, "(shipout)": 1.0}, durations)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,27 @@
+import unittest
+import os
+import tempfile
+from ..src.Plot_to_tex import Figure_session
+
+
+class Test_plot_to_tex(unittest.TestCase):
+
+    # tests a figure session reuses one figure for many plots, outside the figure registry of pyplot
+    def test_figure_session(self):
+        from matplotlib._pylab_helpers import Gcf
+
+        with tempfile.TemporaryDirectory() as image_dir:
+            with Figure_session() as session:
+                figure = session.figure
+                for plot_nr in range(3):
+                    session.add_axes().plot([0, 1], [plot_nr, 1])
+                    session.save(f"{image_dir}/plot{plot_nr}.png")
+                    self.assertIs(figure, session.figure)
+                    self.assertEqual([], session.figure.axes)
+            self.assertIsNone(session.figure)
+            self.assertEqual(["plot0.png", "plot1.png", "plot2.png"], sorted(os.listdir(image_dir)))
+        self.assertEqual({}, dict(Gcf.figs))
+
+
+if __name__ == "__main__":
+    unittest.main()
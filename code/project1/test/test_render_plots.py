@@ -0,0 +1,34 @@
+import unittest
+import concurrent.futures
+import functools
+import multiprocessing
+import os
+import tempfile
+from unittest import mock
+from ..src.Plot_to_tex import Plot_to_tex
+from ..src.Render_plots import Plot_spec, render_plots
+import numpy as np
+
+
+class Test_render_plots(unittest.TestCase):
+
+    # tests plots are rendered on worker processes, and images with the same filename in different projects are kept apart
+    @unittest.skipUnless("fork" in multiprocessing.get_all_start_methods(), "the workers inherit the patched image paths")
+    def test_render_plots(self):
+        with tempfile.TemporaryDirectory() as image_dir:
+            plot_specs = [
+                Plot_spec(np.arange(3), np.arange(3), "x", "y", "line", "plot", 1, 1),
+                Plot_spec(np.arange(3), np.ones((2, 3)), "x", "y", ["a", "b"], "plot", 2, 2),
+                Plot_spec(np.arange(3), np.zeros(3), "x", "y", "line", "other", 3, 1),
+            ]
+            # the workers are forked, such that they inherit the patched image paths
+            process_pool = functools.partial(concurrent.futures.ProcessPoolExecutor, mp_context=multiprocessing.get_context("fork"))
+            with mock.patch.object(Plot_to_tex, "get_image_filepath", lambda filename, project_nr: f"{image_dir}/project{project_nr}_{filename}.png"):
+                with mock.patch.object(concurrent.futures, "ProcessPoolExecutor", process_pool):
+                    results = render_plots(plot_specs, max_workers=2)
+            self.assertEqual({(1, "plot"): None, (2, "plot"): None, (1, "other"): None}, results)
+            self.assertEqual(["project1_other.png", "project1_plot.png", "project2_plot.png"], sorted(os.listdir(image_dir)))
+
+
+if __name__ == "__main__":
+    unittest.main()
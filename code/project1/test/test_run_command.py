@@ -0,0 +1,20 @@
+import unittest
+import sys
+import time
+from ..src.Run_command import run_command
+
+
+class Test_run_command(unittest.TestCase):
+
+    # tests a command that does not finish is killed after the timeout, and its output is kept
+    def test_run_command_timeout(self):
+        result = run_command([sys.executable, "-c", "import time; print('started', flush=True); time.sleep(30)"], timeout=0.5)
+
+        self.assertTrue(result.timed_out)
+        self.assertFalse(result.succeeded())
+        self.assertEqual(["started"], result.output_tail)
+        self.assertLess(result.duration, 10)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,48 @@
+import unittest
+import os
+import tempfile
+from ..src.Scan_latex_dependencies import scan_latex_dependencies
+
+
+class Test_scan_latex_dependencies(unittest.TestCase):
+
+    # tests the dependencies are followed recursively, except in comments and in branches that are not taken
+    def test_scan_latex_dependencies(self):
+        with tempfile.TemporaryDirectory() as root_dir:
+            os.makedirs(f"{root_dir}/latex/Images")
+            files = {
+                "main.tex": "\\graphicspath{ {latex/Images/} }\n\\input{chapter}\n%\\input{old.tex}\n\\IfFileExists{main.tex}{}{\\input{other.tex}}\n",
+                "chapter.tex": "\\includegraphics[width=2cm]{figure}\n\\pythonexternal{code.py}\n",
+                "latex/Images/figure.png": "",
+            }
+            for filename, content in files.items():
+                with open(f"{root_dir}/{filename}", "w") as f:
+                    f.write(content)
+            graph = scan_latex_dependencies("main.tex", root_dir)
+
+        self.assertEqual(["main.tex", "chapter.tex", "latex/Images/figure.png"], graph.get_files())
+        self.assertEqual(["chapter.tex:2: \\pythonexternal{code.py} includes missing file code.py"], graph.get_diagnostics())
+        self.assertEqual(["chapter.tex", "main.tex"], graph.get_dependents("latex/Images/figure.png"))
+
+
+    # tests the files are listed in the order in which they are included, also when inclusions are nested
+    def test_scan_latex_dependencies_in_document_order(self):
+        with tempfile.TemporaryDirectory() as root_dir:
+            files = {
+                "main.tex": "\\input{first}\n\\input{second}\n",
+                "first.tex": "\\input{nested}\n\\input{second}\n",
+                "nested.tex": "\\pythonexternal{code.py}\n",
+                "second.tex": "",
+                "code.py": "",
+            }
+            for filename, content in files.items():
+                with open(f"{root_dir}/{filename}", "w") as f:
+                    f.write(content)
+            graph = scan_latex_dependencies("main.tex", root_dir)
+
+        self.assertEqual(["main.tex", "first.tex", "nested.tex", "code.py", "second.tex"], graph.get_files())
+        self.assertEqual(["main.tex", "first.tex", "nested.tex", "second.tex"], list(graph.dependencies))
+
+
+if __name__ == "__main__":
+    unittest.main()
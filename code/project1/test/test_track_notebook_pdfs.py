@@ -0,0 +1,34 @@
+import unittest
+import json
+import tempfile
+from ..src.Track_notebook_pdfs import Notebook_pdf_tracker
+
+
+class Test_track_notebook_pdfs(unittest.TestCase):
+
+    # tests a notebook pdf becomes stale when the cells change, but not when only metadata changes
+    def test_notebook_pdf_tracker(self):
+        with tempfile.TemporaryDirectory() as src_dir:
+            notebook_filepath = f"{src_dir}/a.ipynb"
+            notebook = {"cells": [{"cell_type": "code", "source": "1+1", "outputs": [], "execution_count": 1}]}
+            with open(notebook_filepath, "w") as f:
+                json.dump(notebook, f)
+            self.assertTrue(Notebook_pdf_tracker(src_dir).is_stale(notebook_filepath))
+            with open(f"{src_dir}/a.pdf", "w") as f:
+                f.write("pdf")
+            tracker = Notebook_pdf_tracker(src_dir)
+            tracker.record_conversion(notebook_filepath)
+            tracker.save()
+
+            notebook["cells"][0]["execution_count"] = 2
+            with open(notebook_filepath, "w") as f:
+                json.dump(notebook, f)
+            self.assertFalse(Notebook_pdf_tracker(src_dir).is_stale(notebook_filepath))
+            notebook["cells"][0]["source"] = "1+2"
+            with open(notebook_filepath, "w") as f:
+                json.dump(notebook, f)
+            self.assertTrue(Notebook_pdf_tracker(src_dir).is_stale(notebook_filepath))
+
+
+if __name__ == "__main__":
+    unittest.main()
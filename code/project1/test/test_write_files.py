@@ -0,0 +1,37 @@
+import unittest
+import os
+import tempfile
+from unittest import mock
+from ..src.Write_files import copy_file_atomically, write_file_atomically, write_file_if_changed
+
+
+class Test_write_files(unittest.TestCase):
+
+    # tests generated files are only written if their content changes, keep their permissions and leave no temporary file
+    def test_write_files(self):
+        with tempfile.TemporaryDirectory() as directory:
+            filepath = f"{directory}/main.tex"
+            self.assertTrue(write_file_if_changed("a\n", filepath))
+            os.chmod(filepath, 0o640)
+            os.utime(filepath, ns=(1, 1))
+            self.assertFalse(write_file_if_changed("a\n", filepath))
+            self.assertEqual(1, os.stat(filepath).st_mtime_ns)
+
+            self.assertTrue(write_file_if_changed("b\n", filepath))
+            self.assertEqual(0o640, os.stat(filepath).st_mode & 0o777)
+            copy_file_atomically(filepath, f"{directory}/copy.tex")
+            with open(f"{directory}/copy.tex") as f:
+                self.assertEqual("b\n", f.read())
+
+            with mock.patch("os.fsync", side_effect=OSError("disk full")):
+                with self.assertRaises(OSError):
+                    write_file_atomically("c\n", filepath)
+                with self.assertRaises(OSError):
+                    copy_file_atomically(filepath, f"{directory}/copy.tex")
+            with open(filepath) as f:
+                self.assertEqual("b\n", f.read())
+            self.assertEqual(["copy.tex", "main.tex"], sorted(os.listdir(directory)))
+
+
+if __name__ == "__main__":
+    unittest.main()